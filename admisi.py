@@ -1,14 +1,22 @@
-from bs4 import BeautifulSoup
 from datetime import datetime
 from playwright.sync_api import sync_playwright
 import urllib.parse
 import time
+from resource_blocking import SITE_POLICIES, install_resource_blocking
+from date_parser import parse_datetime
+from html_parser import parse_html
+from extraction import SITE_SPECS
+from navigation import WaitStats, goto_ready, wait_for_count, wait_ready
+from url_frontier import URLFrontier
+from metrics import METRICS
 
 # ======================
 # 🔑 CONFIGURATION (MODIFY THESE FOR TESTING/PRODUCTION)
 # ======================
 BASE_URL = "https://www.admisi.com/market-information/grains/"  # Grain-filtered source
 CUTOFF = datetime(2026, 1, 1)  # Stop when encountering first article OLDER than this
+LISTING_SPEC = SITE_SPECS["admisi"]["listing"]
+WAIT_STATS = WaitStats()
 
 # TESTING SAFEGUARDS (set to None for full production run)
 MAX_CANDIDATE_URLS = 10      # Max URLs to collect from listing page (Phase 1)
@@ -23,12 +31,6 @@ DATE_SELECTORS = [
     "div.meta time",
     "[itemprop='datePublished']"
 ]
-DATE_FORMATS = [
-    "%B %d, %Y",    # "January 15, 2026"
-    "%m/%d/%Y",     # "01/15/2026"
-    "%Y-%m-%d",     # "2026-01-15"
-    "%d %B %Y"      # "15 January 2026"
-]
 CONTENT_SELECTOR = ".article-content, .content, div[itemprop='articleBody']"  # Main text container
 MIN_TEXT_LENGTH = 300  # Skip if article text < this (filters video-only)
 VIDEO_SELECTORS = "video, iframe[src*='youtube'], iframe[src*='vimeo'], .video-player"
@@ -36,6 +38,8 @@ VIDEO_SELECTORS = "video, iframe[src*='youtube'], iframe[src*='vimeo'], .video-p
 # ======================
 # 🚀 SCRAPER EXECUTION
 # ======================
+METRICS.configure_from_env(source="Admisi")
+
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=False, slow_mo=100)
     context = browser.new_context(
@@ -44,6 +48,7 @@ with sync_playwright() as p:
         locale="en-US",
         timezone_id="America/Chicago"
     )
+    block_stats = install_resource_blocking(context, SITE_POLICIES["admisi"])
     page = context.new_page()
     
     print(f"🚀 Navigating to grains page: {BASE_URL}")
@@ -63,7 +68,8 @@ with sync_playwright() as p:
                 if page.locator(selector).is_visible(timeout=2000):
                     page.click(selector)
                     print("✓ Cookies accepted")
-                    page.wait_for_timeout(800)
+                    # Banner gone = page usable again
+                    wait_ready(page, selector, timeout=2000, stats=WAIT_STATS, label="cookie banner", state="hidden")
                     break
         except Exception as e:
             print(f"ℹ Cookie handling: {str(e)[:70]}")
@@ -86,7 +92,7 @@ with sync_playwright() as p:
         print(f"🔍 PHASE 1: Collecting candidate URLs (max: {MAX_CANDIDATE_URLS or '∞'})")
         print("="*60)
         
-        candidate_urls = []
+        candidate_urls = URLFrontier()
         load_count = 0
         stop_loading = False
         
@@ -95,23 +101,21 @@ with sync_playwright() as p:
                 print(f"ℹ Reached MAX_CANDIDATE_URLS ({MAX_CANDIDATE_URLS})")
                 break
                 
-            soup = BeautifulSoup(page.content(), "html.parser")
-            article_divs = soup.find_all("div", class_="col-sm-6")
+            article_divs = LISTING_SPEC.extract(parse_html(page.content()))["links"]
             new_urls = 0
             
             print(f"\n📦 Batch #{load_count + 1}: Found {len(article_divs)} article containers")
             
             for div in article_divs:
                 try:
-                    a_tag = div.find("a", href=True)
-                    if not a_tag or not a_tag["href"].strip():
+                    href = (div["href"] or "").strip()
+                    if not href:
                         continue
                     
-                    full_url = urllib.parse.urljoin(BASE_URL, a_tag["href"].strip())
-                    if full_url in candidate_urls:
+                    full_url = urllib.parse.urljoin(BASE_URL, href)
+                    if not candidate_urls.add(full_url):
                         continue
                     
-                    candidate_urls.append(full_url)
                     new_urls += 1
                     
                     if MAX_CANDIDATE_URLS and len(candidate_urls) >= MAX_CANDIDATE_URLS:
@@ -137,9 +141,10 @@ with sync_playwright() as p:
                     btn = page.locator(selector)
                     if btn.is_visible(timeout=2000):
                         print(f"\n🖱️ Clicking 'Load More' (Batch #{load_count + 2})...")
+                        shown = page.locator("div.col-sm-6").count()
                         btn.click()
-                        page.wait_for_load_state("networkidle", timeout=10000)
-                        page.wait_for_timeout(1200)
+                        # Done as soon as the next batch of containers is in the DOM
+                        wait_for_count(page, "div.col-sm-6", shown, timeout=10000, stats=WAIT_STATS, label="load more")
                         load_count += 1
                         load_more_found = True
                         break
@@ -156,7 +161,7 @@ with sync_playwright() as p:
             exit(1)
         
         print(f"\n✅ Phase 1 Complete: {len(candidate_urls)} candidate URLs collected")
-        print(f"   First URL sample: {candidate_urls[0][:70]}...")
+        print(f"   First URL sample: {next(iter(candidate_urls))[:70]}...")
         
         # ===== PHASE 2: VALIDATE ARTICLES (open pages, check date + content) =====
         print("\n" + "="*60)
@@ -169,7 +174,9 @@ with sync_playwright() as p:
         processed_count = 0
         cutoff_reached = False
         
-        for idx, url in enumerate(candidate_urls, 1):
+        idx = 0
+        while (url := candidate_urls.pop()) is not None:
+            idx += 1
             # Enforce processing limit
             if MAX_ARTICLES_TO_PROCESS and processed_count >= MAX_ARTICLES_TO_PROCESS:
                 print(f"\n🛑 STOPPED: Reached MAX_ARTICLES_TO_PROCESS ({MAX_ARTICLES_TO_PROCESS})")
@@ -180,8 +187,8 @@ with sync_playwright() as p:
                 
             print(f"\n[{idx}/{len(candidate_urls)}] Opening: {url[:65]}...")
             try:
-                page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                page.wait_for_timeout(800)  # Visual stability
+                # Date element present = article rendered enough to validate
+                goto_ready(page, url, DATE_SELECTORS, timeout=5000, stats=WAIT_STATS, goto_timeout=30000)
                 
                 # ===== EXTRACT DATE FROM ARTICLE PAGE =====
                 article_date = None
@@ -191,13 +198,7 @@ with sync_playwright() as p:
                         elem = page.locator(selector).first
                         if elem and elem.is_visible(timeout=2000):
                             date_text = elem.inner_text().strip()
-                            # Try all date formats
-                            for fmt in DATE_FORMATS:
-                                try:
-                                    article_date = datetime.strptime(date_text, fmt)
-                                    break
-                                except ValueError:
-                                    continue
+                            article_date = parse_datetime(date_text, default=None)
                             if article_date:
                                 break
                     except:
@@ -293,6 +294,9 @@ with sync_playwright() as p:
     
     finally:
         try:
+            print(f"\n🚫 {block_stats.summary()}")
+            print(f"⏱️ {WAIT_STATS.summary()}")
+            print(f"📈 {METRICS.summary()}")
             browser.close()
             print("\n✓ Browser closed successfully")
         except:
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet storage for the article corpus, written alongside the CSVs.
+
+Layout (hive partitioning, one dataset for every source):
+    articles_parquet/source=Brownfield/month=2026-02/part-<run>-0.parquet
+
+author/categories/tags are dictionary-encoded, body is zstd-compressed, and
+metadata readers can project columns without ever touching body bytes:
+
+    df = read_articles("articles_parquet", columns=METADATA_COLUMNS)
+
+Before writing, every row's body is checked against a MinHash/LSH index kept
+next to the data (<root>/_near_dup.sqlite, see near_dup.py); syndicated copies
+of an article already stored from another URL are linked there and not
+written again.
+
+pyarrow is optional; without it write_articles() prints a warning and skips.
+"""
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+DEFAULT_ROOT = "articles_parquet"
+NEAR_DUP_FILE = "_near_dup.sqlite"  # '_' prefix: skipped by pyarrow dataset discovery
+_near_dup_indexes = {}
+
+DICTIONARY_COLUMNS = ['author', 'categories', 'tags', 'sector', 'commodity']
+METADATA_COLUMNS = ['article_id', 'date', 'title', 'author', 'categories', 'tags',
+                    'url', 'scraped_at', 'source', 'body_char_count']
+
+# Column spellings used by the different scrapers -> shared schema
+RENAMES = {
+    'URL': 'url',
+    'Title': 'title',
+    'article_date': 'date',
+    'Source': 'source',
+    'tag': 'tags',
+    'len': 'body_char_count',
+    'key points': 'key_points',
+}
+
+
+def normalize_articles(df, source=None):
+    """Rename scraper-specific columns, fill source/body_char_count, derive month"""
+    df = df.rename(columns={k: v for k, v in RENAMES.items() if k in df.columns and v not in df.columns})
+    if source is not None or 'source' not in df.columns:
+        df['source'] = source or 'Unknown'
+    df['source'] = df['source'].fillna('Unknown').astype(str)
+    if 'body' in df.columns:
+        df['body'] = df['body'].fillna('').astype(str)
+        if 'body_char_count' not in df.columns:
+            df['body_char_count'] = df['body'].str.len()
+    dates = pd.to_datetime(df['date'], errors='coerce', format='ISO8601') if 'date' in df.columns else pd.Series(pd.NaT, index=df.index)
+    df['month'] = dates.dt.strftime('%Y-%m').fillna('unknown')
+    # Mixed str/date/NaN object columns don't round-trip; store everything else as text
+    for col in df.columns:
+        if col not in ('body_char_count', 'month') and df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) else
+                                  (None if pd.isna(v) else str(v)))
+    return df
+
+
+def near_dup_index(root=DEFAULT_ROOT):
+    """The dataset's near-duplicate index, opened once per process"""
+    key = str(Path(root).resolve())
+    if key not in _near_dup_indexes:
+        from near_dup import NearDupIndex
+        _near_dup_indexes[key] = NearDupIndex(Path(root) / NEAR_DUP_FILE)
+    return _near_dup_indexes[key]
+
+
+def write_articles(data, root=DEFAULT_ROOT, source=None, replace=False, near_dup=True):
+    """
+    Append rows (DataFrame or list of dicts) to the partitioned dataset.
+    replace=True first clears the partitions being written (full rebuilds).
+    near_dup=False skips the near-duplicate check (or pass a NearDupIndex).
+    Returns the number of rows written (0 if pyarrow is missing or data empty).
+    """
+    if not HAS_PARQUET:
+        print("⚠️ pyarrow not installed - skipping Parquet output (pip install pyarrow)")
+        return 0
+    df = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+    if df.empty:
+        return 0
+    df = normalize_articles(df, source)
+    if near_dup:
+        index = near_dup_index(root) if near_dup is True else near_dup
+        before = len(df)
+        df = index.filter(df)
+        if len(df) < before:
+            print(f"🔗 {before - len(df)} near-duplicate articles linked instead of stored ({index.summary()})")
+        if df.empty:
+            return 0
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    file_format = ds.ParquetFileFormat()
+    options = file_format.make_write_options(
+        compression='zstd',
+        use_dictionary=[c for c in DICTIONARY_COLUMNS if c in table.column_names],
+    )
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    ds.write_dataset(
+        table,
+        root,
+        format=file_format,
+        file_options=options,
+        partitioning=['source', 'month'],
+        partitioning_flavor='hive',
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        existing_data_behavior='delete_matching' if replace else 'overwrite_or_ignore',
+    )
+    return len(df)
+
+
+def read_articles(root=DEFAULT_ROOT, columns=None, sources=None, dedupe=True):
+    """
+    Load the dataset as a DataFrame. `columns` projects (e.g. METADATA_COLUMNS,
+    which never reads body pages); `sources` filters partitions. With dedupe,
+    the most recently scraped row per URL wins.
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning='hive')
+    # Sources have different columns; merge every file's footer schema
+    schema = pa.unify_schemas([dataset.schema] + [f.physical_schema for f in dataset.get_fragments()],
+                              promote_options='permissive')
+    dataset = ds.dataset(root, schema=schema, format='parquet', partitioning='hive')
+    names = set(dataset.schema.names)
+    if columns is not None:
+        columns = [c for c in columns if c in names]
+        if dedupe:
+            columns += [c for c in ('url', 'scraped_at') if c in names and c not in columns]
+    filt = ds.field('source').isin(list(sources)) if sources else None
+    df = dataset.to_table(columns=columns, filter=filt).to_pandas()
+    if dedupe and 'url' in df.columns:
+        if 'scraped_at' in df.columns:
+            df = df.sort_values('scraped_at', kind='stable')
+        df = df.drop_duplicates(subset=['url'], keep='last').reset_index(drop=True)
+    return df
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Asyncio crawl primitives shared by the scrapers: per-host token bucket,
+per-host concurrency limit and a pool of Playwright pages draining a job queue.
+
+The politeness budget lives on the host, not on the worker, so N pages in one
+browser together never exceed `rate` requests/sec against the same site. With a
+RateController (rate_control.py) the per-host rate adapts to the responses
+instead of staying fixed.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/sec, bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available, then take it. Returns seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                METRICS.observe("sleep_seconds", delay, reason="token_bucket")
+                await asyncio.sleep(delay)
+
+
+class HostLimiter:
+    """
+    Per-host concurrency cap + token bucket, created lazily per netloc.
+    `controller` (RateController) replaces the fixed-rate bucket with adaptive pacing.
+    """
+
+    def __init__(self, rate=0.5, burst=1, max_concurrency=2, controller=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.controller = controller
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = (
+                asyncio.Semaphore(self.max_concurrency),
+                TokenBucket(self.rate, self.burst),
+            )
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """Hold one concurrency slot for `url`'s host after paying one token"""
+        semaphore, bucket = self._host(url)
+        async with semaphore:
+            if self.controller is not None:
+                await self.controller.wait_async(url)
+            else:
+                await bucket.acquire()
+            yield
+
+
+async def run_page_pool(context_factory, queue, handler, concurrency):
+    """
+    Drain `queue` with `concurrency` pages, each in its own browser context.
+
+    `context_factory()` returns a new BrowserContext; `handler(page, job, queue)`
+    processes one job and may enqueue follow-up jobs. Returns once the queue is
+    empty and every worker is idle.
+    """
+    contexts = [await context_factory() for _ in range(concurrency)]
+    pages = [await ctx.new_page() for ctx in contexts]
+
+    async def worker(page):
+        while True:
+            job = await queue.get()
+            try:
+                await handler(page, job, queue)
+            except Exception as e:
+                print(f"  ❌ Job failed {job!r:.80}: {type(e).__name__}: {str(e)[:80]}")
+            finally:
+                queue.task_done()
+
+    tasks = [asyncio.create_task(worker(page)) for page in pages]
+    try:
+        await queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for ctx in contexts:
+            await ctx.close()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: date_parser vs the per-call strptime parsers it replaced.
+
+Rebuilds the visible date strings for every row of the brownfield export
+("February 11, 2026", plus the other formats admisi tried and a share of
+"Published: N days ago"), checks both sides agree, then times them.
+
+Usage: python bench_dates.py [brownfield_complete_*.csv] [--repeat 5]
+"""
+import argparse
+import glob
+import random
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import date_parser
+from date_parser import parse_date
+
+ADMISI_FORMATS = ["%B %d, %Y", "%m/%d/%Y", "%Y-%m-%d", "%d %B %Y"]
+
+
+def legacy_parse_date(s):
+    """The split + strptime parser that brownfield/mercado/producer each carried"""
+    month = {
+        "January": "01", "Jan": "01", "February": "02", "Feb": "02", "March": "03", "Mar": "03",
+        "April": "04", "Apr": "04", "May": "05", "June": "06", "Jun": "06", "July": "07", "Jul": "07",
+        "August": "08", "Aug": "08", "September": "09", "Sep": "09", "Sept": "09",
+        "October": "10", "Oct": "10", "November": "11", "Nov": "11", "December": "12", "Dec": "12"
+    }
+    l = s.split()
+    year = l[2]
+    m = month[l[0]]
+    day = l[1].rstrip(',')
+    if int(day) < 10:
+        day = '0' + day
+    return datetime.strptime(f"{year}-{m}-{day}", "%Y-%m-%d").date()
+
+
+def legacy_cascade(s):
+    """admisi's loop over DATE_FORMATS with try/except per candidate"""
+    for fmt in ADMISI_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def build_inputs(csv_path, seed=0):
+    df = pd.read_csv(csv_path, usecols=['article_date', 'scraped_at']).dropna()
+    dates = pd.to_datetime(df['article_date']).dt.date.tolist()
+    scraped = pd.to_datetime(df['scraped_at']).tolist()
+    rng = random.Random(seed)
+
+    site_strings = [f"{d:%B} {d.day}, {d.year}" for d in dates]
+    mixed = [d.strftime(rng.choice(ADMISI_FORMATS)) for d in dates]
+    relative = []
+    for d, s in zip(dates, scraped):
+        days = (s.date() - d).days
+        relative.append((f"Published: {days} days ago" if days else "Published: today", s))
+    return dates, site_strings, mixed, relative
+
+
+def timed(fn, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, baseline, cold, warm, n):
+    print(f"{label:<28} {baseline / n * 1e6:8.2f} µs  {cold / n * 1e6:8.2f} µs  {warm / n * 1e6:8.2f} µs"
+          f"  {baseline / cold:6.1f}x  {baseline / warm:6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('csv', nargs='?', default=None)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    csv_path = args.csv or sorted(glob.glob('brownfield_complete_*.csv'))[-1]
+
+    dates, site_strings, mixed, relative = build_inputs(csv_path)
+    n = len(dates)
+    assert [legacy_parse_date(s) for s in site_strings] == dates
+    assert [parse_date(s) for s in site_strings] == dates
+    assert [parse_date(s) for s in mixed] == [legacy_cascade(s) for s in mixed] == dates
+    assert [parse_date(text, scraped_at) for text, scraped_at in relative] == dates
+
+    def cold(fn, items):
+        # cache cleared before every pass: pure regex cost
+        best = float('inf')
+        for _ in range(args.repeat):
+            date_parser._parse.cache_clear()
+            best = min(best, timed(fn, items, 1))
+        return best
+
+    print(f"{n:,} rows from {csv_path}, best of {args.repeat}")
+    print(f"{'':<28} {'strptime':>11}  {'cold':>11}  {'memoised':>11}  {'cold':>7}  {'memo':>7}")
+    report("site format (Month D, YYYY)",
+           timed(legacy_parse_date, site_strings, args.repeat),
+           cold(parse_date, site_strings), timed(parse_date, site_strings, args.repeat), n)
+    report("mixed formats (cascade)",
+           timed(legacy_cascade, mixed, args.repeat),
+           cold(parse_date, mixed), timed(parse_date, mixed, args.repeat), n)
+
+    relative_parse = lambda item: parse_date(*item)
+    date_parser._parse.cache_clear()
+    rel = timed(relative_parse, relative, args.repeat)
+    print(f"{'relative (N days ago)':<28} {'n/a':>11}  {'':>11}  {rel / n * 1e6:8.2f} µs")
+    print(f"cache: {date_parser.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
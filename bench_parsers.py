@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark: html.parser + BeautifulSoup vs the html_parser backends.
+
+For every saved page in fixtures/html/ this runs what a scraper does per
+document: the fetcher's selector check, then field extraction. The legacy
+path parses twice with html.parser; the new path parses once (memoised) with
+each installed backend. Extracted values must match across backends.
+
+A second table times extraction alone on an already-parsed document: one
+select per field (as the scrapers did inline) vs the compiled SITE_SPECS
+extractor, which plans the same select_one()/select() calls once per spec.
+
+Fixtures are reconstructions of each site's markup (same classes/nesting as
+the live pages, padded with the usual WordPress head/nav/footer weight);
+real fetches from this sandbox come back as Cloudflare challenges.
+
+Usage: python bench_parsers.py [--repeat 20]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import html_parser
+from extraction import SITE_SPECS
+from html_parser import BACKENDS, parse_html
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures' / 'html'
+
+# What each scraper checks (fetcher selectors) and then extracts: (field, css, mode)
+SITE_SELECTORS = {
+    'brownfield_listing': (['div.entry-content.cat-container'], [
+        ('pages', 'span.pages', 'text'),
+        ('urls', 'div.entry-content.cat-container', ('records', [('href', 'h2 a', 'href')])),
+    ]),
+    'brownfield_article': (['p.post_title'], [
+        ('date', 'time', 'text'),
+        ('title', 'p.post_title', 'text'),
+        ('author', 'span.entry-author-name', 'text'),
+        ('categories', 'span.entry-categories', 'first_texts'),
+        ('tags', 'div.pull-right', 'last_texts'),
+        ('body', 'div.singleimg', 'siblings'),
+    ]),
+    'producer_listing': (['div.archive-articles-list'], [
+        ('articles', 'div.archive-articles-list article',
+         ('records', [('datetime', 'time.updated.dtstamp', 'datetime'), ('href', 'h2.entry-title a', 'href')])),
+    ]),
+    'producer_article': (['h1.entry-title'], [
+        ('title', 'h1.entry-title', 'text'),
+        ('author', 'a.tw\\:align-top.tw\\:text-lg', 'text'),
+        ('date', 'p.entry-details-date', 'text'),
+        ('body', 'div.body-text', 'spaced'),
+        ('summary', 'h2.deck', 'text'),
+        ('tag', 'p.entry-details-categories.tw\\:text-sm', 'text'),
+    ]),
+    'mecardo_listing': (['article'], [
+        ('articles', 'article', ('records', [('href', 'a[href]', 'href'), ('date_text', 'span.elementor-post-date', None)])),
+    ]),
+    'mecardo_article': (['h1.elementor-heading-title'], [
+        ('date', 'span.elementor-post-info__item--type-date', 'text'),
+        ('title', 'h1.elementor-heading-title.elementor-size-default', 'text'),
+        ('author', 'span.elementor-post-info__item--type-author', 'text'),
+        ('terms', 'a.elementor-post-info__terms-list-item', 'texts'),
+        ('body', 'div.elementor-column.elementor-col-66.elementor-element-6aa3776', 'raw'),
+        ('key_points', 'div.elementor-element-8714261.elementor-widget-text-editor', 'raw'),
+    ]),
+}
+
+
+def extract(doc, fields):
+    out = {}
+    for name, css, mode in fields:
+        if mode == 'text':
+            node = doc.select_one(css)
+            out[name] = node.text(strip=True) if node else None
+        elif mode == 'raw':
+            node = doc.select_one(css)
+            out[name] = node.text().strip() if node else None
+        elif mode == 'spaced':
+            node = doc.select_one(css)
+            out[name] = node.text(' ', strip=True) if node else None
+        elif mode == 'texts':
+            out[name] = [n.text(strip=True) for n in doc.select(css)]
+        elif mode == 'first_texts':
+            node = doc.select_one(css)
+            out[name] = [a.text(strip=True) for a in node.select('a')] if node else []
+        elif mode == 'last_texts':
+            nodes = doc.select(css)
+            out[name] = [a.text(strip=True) for a in nodes[-1].select('a')[1:]] if nodes else []
+        elif mode == 'hrefs':
+            out[name] = [n.attr('href') for n in doc.select(css)]
+        elif mode == 'datetimes':
+            out[name] = [n.attr('datetime') for n in doc.select(css)]
+        elif mode == 'siblings':
+            node, parts = doc.select_one(css), []
+            for sib in (node.next_siblings() if node else ()):
+                if sib.tag == 'div':
+                    break
+                if sib.tag == 'p' and not sib.attr('class'):
+                    parts.append(sib.text(strip=True))
+            out[name] = '\n\n'.join(parts)
+        else:  # ('records', [(key, css, attr or None for text)]): one select per container and key
+            out[name] = []
+            for container in doc.select(css):
+                record = {}
+                for key, sub_css, attr in mode[1]:
+                    node = container.select_one(sub_css)
+                    record[key] = None if node is None else node.attr(attr) if attr else node.text(strip=True)
+                out[name].append(record)
+    return out
+
+
+def legacy(html, checks, fields):
+    """Fetcher check and extraction each build their own html.parser tree"""
+    soup = BeautifulSoup(html, 'html.parser')
+    assert any(soup.select_one(sel) is not None for sel in checks)
+    return extract(html_parser.SoupNode(BeautifulSoup(html, 'html.parser')), fields)
+
+
+def single_parse(html, checks, fields, backend):
+    doc = parse_html(html, backend)
+    assert any(doc.select_one(sel) is not None for sel in checks)
+    return extract(parse_html(html, backend), fields)
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        html_parser._parse_memo.cache_clear()  # every pass is a fresh document
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def best_of_warm(fn, repeat, loops=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def bench_specs(repeat):
+    """Extraction only: per-field selects vs the compiled spec, same parsed doc"""
+    print("\nExtraction only (document already parsed), ms per document")
+    print(f"{'fixture':<20}" + ''.join(f" {b + ' fields':>19} {b + ' spec':>17}" for b in BACKENDS))
+    totals = {key: 0.0 for b in BACKENDS for key in (f'{b}:fields', f'{b}:spec')}
+    for name, (_, fields) in SITE_SELECTORS.items():
+        site, kind = name.split('_')
+        spec = SITE_SPECS[site][kind]
+        html = (FIXTURES_DIR / f'{name}.html').read_text(encoding='utf-8')
+        line = f"{name:<20}"
+        for backend in BACKENDS:
+            doc = parse_html(html, backend, memo=False)
+            assert spec.extract(doc) == SITE_SPECS[site][kind].extract(parse_html(html, BACKENDS[-1], memo=False))
+            per_field = best_of_warm(lambda: extract(doc, fields), repeat)
+            compiled = best_of_warm(lambda: spec.extract(doc), repeat)
+            totals[f'{backend}:fields'] += per_field
+            totals[f'{backend}:spec'] += compiled
+            line += f" {per_field * 1e3:19.3f} {compiled * 1e3:17.3f}"
+        print(line)
+    print(f"{'total':<20}" + ''.join(f" {totals[f'{b}:fields'] * 1e3:19.3f} {totals[f'{b}:spec'] * 1e3:17.3f}"
+                                     for b in BACKENDS))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Backends: {', '.join(BACKENDS)} | best of {args.repeat}, ms per document\n")
+    print(f"{'fixture':<20} {'KB':>5} {'legacy x2':>10}" + ''.join(f" {b:>12}" for b in BACKENDS))
+    totals = {'legacy': 0.0, **{b: 0.0 for b in BACKENDS}}
+    for name, (checks, fields) in SITE_SELECTORS.items():
+        html = (FIXTURES_DIR / f'{name}.html').read_text(encoding='utf-8')
+        expected = legacy(html, checks, fields)
+        for backend in BACKENDS:
+            got = single_parse(html, checks, fields, backend)
+            assert got == expected, f"{name}: {backend} differs from html.parser"
+
+        row = {'legacy': best_of(lambda: legacy(html, checks, fields), args.repeat)}
+        for backend in BACKENDS:
+            row[backend] = best_of(lambda: single_parse(html, checks, fields, backend), args.repeat)
+        for key, value in row.items():
+            totals[key] += value
+        print(f"{name:<20} {len(html) / 1024:5.0f} {row['legacy'] * 1e3:10.2f}"
+              + ''.join(f" {row[b] * 1e3:12.2f}" for b in BACKENDS))
+
+    print(f"{'total':<26} {totals['legacy'] * 1e3:10.2f}" + ''.join(f" {totals[b] * 1e3:12.2f}" for b in BACKENDS))
+    print(f"{'speedup':<26} {'1.0x':>10}" + ''.join(f" {totals['legacy'] / totals[b]:11.1f}x" for b in BACKENDS))
+
+    bench_specs(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
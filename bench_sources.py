@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline per-source benchmark: every scraper stage timed on recorded fixtures.
+
+For Brownfield, Producer, Mecardo and Admisi this runs what a scrape costs per
+article, stage by stage, on fixtures/html/<source>_{listing,article}.html:
+
+    parse      parse_html() of the article page (+ its share of the listing page)
+    extract    SITE_SPECS extraction on the parsed documents
+    dates      parse_date() of every visible date string (cache cleared: cold)
+    clean      text_cleaning.clean_html_text() of the article page
+    serialize  the extracted row written as CSV
+
+Listing-page costs are divided by the number of articles the listing yields.
+FRB H10 runs the testsl.py pipeline on fixtures/frb_h10_chunk.csv instead
+(read_csv / long-frame build / date columns / to_csv) and reports rows/sec.
+
+Peak memory is the Python-heap peak (tracemalloc) of one full pass; buffers
+allocated inside selectolax/lxml's C code are not counted.
+
+Results are compared with fixtures/bench_baseline.json (per backend); stages
+more than --tolerance slower are flagged, and --check exits 1 on any, or when
+a backend or source has no baseline to compare against (create one on the
+reference machine with --save-baseline and commit it).
+
+Usage: python bench_sources.py [--repeat 20] [--backend all] [--save-baseline] [--check]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import date_parser
+from date_parser import parse_date
+from extraction import SITE_SPECS
+from html_parser import BACKENDS, DEFAULT_BACKEND, parse_html
+from text_cleaning import clean_html_text
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+HTML_DIR = FIXTURES_DIR / 'html'
+FRB_FIXTURE = FIXTURES_DIR / 'frb_h10_chunk.csv'
+BASELINE_FILE = FIXTURES_DIR / 'bench_baseline.json'
+
+STAGES = ['parse', 'extract', 'dates', 'clean', 'serialize']
+
+# source -> (SITE_SPECS key, listing field holding the article links,
+#            (css, attribute or None for text) of the dates parsed on the listing / article page)
+SOURCES = {
+    'Brownfield': ('brownfield', 'urls', [], [('time', None)]),
+    'Producer': ('producer', 'articles', [('time.updated.dtstamp', 'datetime')], [('p.entry-details-date', None)]),
+    'Mecardo': ('mecardo', 'articles', [('span.elementor-post-date', None)],
+                [('span.elementor-post-info__item--type-date', None)]),
+    'Admisi': ('admisi', 'links', [('span.date', None)], [('time', None)]),
+}
+
+
+def best_of(fn, repeat, loops=5, setup=None):
+    """Best mean seconds per call over `repeat` rounds of `loops` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(loops):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            total += time.perf_counter() - start
+        best = min(best, total / loops)
+    return best
+
+
+def peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def date_strings(doc, selectors):
+    """The date strings a scraper would parse from `doc`"""
+    return [node.attr(attr) if attr else node.text(strip=True)
+            for css, attr in selectors for node in doc.select(css)]
+
+
+def serialize(row):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(row))
+    writer.writeheader()
+    writer.writerow(row)
+    return out.getvalue()
+
+
+def bench_html_source(name, backend, repeat):
+    site, links_field, listing_dates, article_dates = SOURCES[name]
+    specs = SITE_SPECS[site]
+    listing_html = (HTML_DIR / f'{site}_listing.html').read_text(encoding='utf-8')
+    article_html = (HTML_DIR / f'{site}_article.html').read_text(encoding='utf-8')
+
+    listing_doc = parse_html(listing_html, backend, memo=False)
+    article_doc = parse_html(article_html, backend, memo=False)
+    per_listing = max(1, len(specs['listing'].extract(listing_doc)[links_field]))
+    row = {'url': f'fixture://{site}', **specs['article'].extract(article_doc)}
+    dates = date_strings(listing_doc, listing_dates) + date_strings(article_doc, article_dates)
+    if not all(parse_date(d, default=None) for d in dates):
+        raise AssertionError(f"{name}: unparsed date in {dates}")
+
+    times = {
+        'parse': (best_of(lambda: parse_html(article_html, backend, memo=False), repeat)
+                  + best_of(lambda: parse_html(listing_html, backend, memo=False), repeat) / per_listing),
+        'extract': (best_of(lambda: specs['article'].extract(article_doc), repeat)
+                    + best_of(lambda: specs['listing'].extract(listing_doc), repeat) / per_listing),
+        'dates': best_of(lambda: [parse_date(d, default=None) for d in dates], repeat,
+                         setup=date_parser._parse.cache_clear) if dates else 0.0,
+        'clean': best_of(lambda: clean_html_text(article_html), repeat),
+        'serialize': best_of(lambda: serialize(row), repeat),
+    }
+
+    def one_article():
+        doc = parse_html(article_html, backend, memo=False)
+        fields = specs['article'].extract(doc)
+        [parse_date(d, default=None) for d in date_strings(doc, article_dates)]
+        clean_html_text(article_html)
+        serialize({'url': row['url'], **fields})
+
+    total = sum(times.values())
+    return {**times, 'total': total, 'per_sec': 1 / total, 'peak_kb': peak_kb(one_article), 'unit': 'articles'}
+
+
+def bench_frb(repeat):
+    import pandas as pd
+    import testsl  # pipeline functions only; main() is guarded
+
+    text = FRB_FIXTURE.read_text(encoding='utf-8')
+    df = pd.read_csv(io.StringIO(text), header=0)
+    date_cols = [col for col in df.columns if testsl.DATE_COL.match(col)]
+    out = testsl.build_long_frame([df])
+
+    times = {
+        'parse': best_of(lambda: pd.read_csv(io.StringIO(text), header=0), repeat, loops=1),
+        'extract': best_of(lambda: testsl.build_long_frame([df]), repeat, loops=1),
+        'dates': best_of(lambda: pd.to_datetime(date_cols).strftime('%Y-%m-%d'), repeat, loops=1),
+        'clean': 0.0,
+        'serialize': best_of(lambda: out.to_csv(io.StringIO(), index=False), repeat, loops=1),
+    }
+
+    def one_chunk():
+        frame = testsl.build_long_frame([pd.read_csv(io.StringIO(text), header=0)])
+        frame.to_csv(io.StringIO(), index=False)
+
+    total = sum(times.values())
+    return {**times, 'total': total, 'per_sec': len(out) / total, 'peak_kb': peak_kb(one_chunk), 'unit': 'rows'}
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(baseline):
+    tmp = BASELINE_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    os.replace(tmp, BASELINE_FILE)
+
+
+def report(backend, results, baseline, tolerance):
+    """Print the stage table (ms per article / per FRB chunk); returns (regressions, sources without a baseline)"""
+    print(f"\nBackend: {backend} | ms per article (FRB H10: per chunk)")
+    print(f"{'source':<12}" + ''.join(f" {s:>9}" for s in STAGES) + f" {'total':>9} {'per sec':>12} {'peak KB':>9}")
+    regressions, unchecked = [], []
+    for name, r in results.items():
+        print(f"{name:<12}" + ''.join(f" {r[s] * 1e3:9.3f}" for s in STAGES)
+              + f" {r['total'] * 1e3:9.3f} {r['per_sec']:8.0f} {r['unit'][:3]:<3} {r['peak_kb']:9.0f}")
+        base = baseline.get(name)
+        if not base:
+            unchecked.append(f"{backend}/{name}")
+            continue
+        deltas = []
+        for key in STAGES + ['total', 'peak_kb']:
+            if not base.get(key):
+                deltas.append(f" {'':>9}")
+                continue
+            change = r[key] / base[key] - 1
+            flag = '!' if change > tolerance else ' '
+            deltas.append(f" {change * 100:+7.1f}%{flag}")
+            if change > tolerance:
+                regressions.append(f"{backend}/{name}/{key}: {change * 100:+.1f}%")
+        print(f"{'  vs base':<12}" + ''.join(deltas[:len(STAGES) + 1]) + f" {'':>12}" + deltas[-1])
+    if not baseline:
+        print("(no baseline for this backend yet: run with --save-baseline)")
+    return regressions, unchecked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, help=f"one of {', '.join(BACKENDS)}, or 'all'")
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Flag stages slower than baseline by more than this')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these numbers as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if any stage regressed beyond --tolerance')
+    args = parser.parse_args()
+    backends = BACKENDS if args.backend == 'all' else [args.backend]
+
+    stored = load_baseline()
+    frb = bench_frb(args.repeat)
+    regressions, unchecked = [], []
+    for backend in backends:
+        results = {name: bench_html_source(name, backend, args.repeat) for name in SOURCES}
+        results['FRB H10'] = frb
+        found, missing = report(backend, results, stored.get(backend, {}), args.tolerance)
+        regressions += found
+        unchecked += missing
+        stored[backend] = results
+    print(f"\nbest of {args.repeat} | date cache: {date_parser.cache_info()}")
+
+    if args.save_baseline:
+        save_baseline(stored)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    if regressions:
+        print("Regressions: " + "; ".join(regressions))
+    if unchecked and args.check and not args.save_baseline:
+        print("No baseline to check: " + ", ".join(unchecked))
+    if args.check and (regressions or (unchecked and not args.save_baseline)):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
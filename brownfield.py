@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import requests
 import pandas as pd
 from datetime import datetime
@@ -6,131 +5,162 @@ import time
 import re
 
 from playwright.sync_api import sync_playwright
+from fetcher import Fetcher
+from response_cache import ResponseCache
+from resource_blocking import SITE_POLICIES, install_resource_blocking
+from article_store import write_articles
+from html_parser import parse_html
+from extraction import SITE_SPECS
+from rate_control import RateController
+from navigation import WaitStats, goto_ready
+from url_frontier import URLFrontier
+from wp_discovery import WPDiscovery
+from page_planner import PagePlanner
+from metrics import METRICS
 
 BASE_URL = "https://www.brownfieldagnews.com/crops-markets/"  # Fixed: removed trailing spaces
+SITE_ROOT = "https://www.brownfieldagnews.com"
 article_limit = 4800
 max_pages_to_scrape =600 # Maximum pages to scrape (adjust as needed)
+START_DATE = None  # e.g. datetime(2018, 1, 1).date(): only touch the listing pages covering
+END_DATE = None    # START_DATE..END_DATE (either may stay open), located by PagePlanner
+LISTING_WORKERS = 4  # listing pages fetched in parallel over HTTP
+USE_HTTP_FETCH = True  # Try plain HTTP first, render in Chromium only when needed
+ARTICLE_SELECTORS = ["p.post_title", "div.singleimg"]
+LISTING_SELECTORS = ["div.entry-content.cat-container"]
+LISTING_SPEC = SITE_SPECS["brownfield"]["listing"]
+ARTICLE_SPEC = SITE_SPECS["brownfield"]["article"]
+CACHE_DIR = "http_cache"  # SCRAPER_OFFLINE=1 replays everything from here
+WAIT_STATS = WaitStats()
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
 def safe_goto(page, url, retries=3):
     for i in range(retries):
         try:
-            page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            page.wait_for_timeout(2000)
-            return True
+            # Listing or article content, whichever this URL is
+            _, ready = goto_ready(page, url, LISTING_SELECTORS + ARTICLE_SELECTORS, timeout=15000, stats=WAIT_STATS)
+            if ready:
+                return True
+            print(f"Retry {i+1}/{retries}: no content after 15s for {url}")
         except Exception as e:
             print(f"Retry {i+1}/{retries} failed for {url}: {e}")
+            METRICS.inc("retries_total", reason="navigation")
+            METRICS.observe("sleep_seconds", 5, reason="retry")
             time.sleep(5)
     return False
 
-def parse_date(s):
-    month = {
-        "January": "01", "Jan": "01",
-        "February": "02", "Feb": "02", 
-        "March": "03", "Mar": "03",
-        "April": "04", "Apr": "04",
-        "May": "05",
-        "June": "06", "Jun": "06",
-        "July": "07", "Jul": "07",
-        "August": "08", "Aug": "08",
-        "September": "09", "Sep": "09", "Sept": "09",
-        "October": "10", "Oct": "10",
-        "November": "11", "Nov": "11",
-        "December": "12", "Dec": "12"
-    }
-    l = s.split(sep=' ')
-    year = l[2]
-    m = month[l[0]]
-    day = l[1].replace(",", "")
-    if int(day) < 10:
-        day = '0' + day
-    date = year + "-" + m + "-" + day
-    format_str = "%Y-%m-%d"
-    datetime_object = datetime.strptime(date, format_str).date()
-    return datetime_object
+def listing_url(page_num):
+    return BASE_URL if page_num == 1 else f"{BASE_URL}page/{page_num}/"
+
+def listing_dates(fetcher, page_num):
+    """Article dates on one listing page, for the planner (None if it won't load)"""
+    html = fetcher.fetch(listing_url(page_num), LISTING_SELECTORS)
+    if html is None:
+        return None
+    return LISTING_SPEC.extract(parse_html(html))["dates"]
+
+def crawl_listing_pages(fetcher):
+    """Fallback discovery: the rendered /page/N/ listings covering the date window, returns a URLFrontier"""
+    print("Navigating to:", BASE_URL)
+    html = fetcher.fetch(BASE_URL, LISTING_SELECTORS)
+    if html is None:
+        raise RuntimeError(f"could not load {BASE_URL}")
+    print("Page loaded successfully!")
+
+    # Get total pages from pagination
+    # Extract total pages from "Page 1 of 620"
+    total_pages = LISTING_SPEC.extract(parse_html(html))["total_pages"] or 1
+    print(f"Found {total_pages} total pages")
+
+    # Probe a few pages instead of walking all of them to find the window's edges
+    first_page, last_page = 1, total_pages
+    if START_DATE is not None or END_DATE is not None:
+        planner = PagePlanner(lambda n: listing_dates(fetcher, n), last_page=total_pages)
+        planned = planner.plan(START_DATE, END_DATE)
+        print(planner.summary())
+        if planned is None:
+            return URLFrontier()
+        first_page, last_page = planned
+
+    # Calculate actual pages to scrape
+    last_page = min(last_page, first_page + max_pages_to_scrape - 1)
+    print(f"Will scrape pages {first_page}-{last_page}")
+
+    # Collect all article URLs across pages, LISTING_WORKERS pages at a time
+    all_urls = URLFrontier()
+    for batch_start in range(first_page, last_page + 1, LISTING_WORKERS):
+        page_nums = range(batch_start, min(batch_start + LISTING_WORKERS, last_page + 1))
+        print(f"Fetching pages {page_nums[0]}-{page_nums[-1]}")
+        pages = fetcher.fetch_many([listing_url(n) for n in page_nums], LISTING_SELECTORS, LISTING_WORKERS)
+        for page_num, html in zip(page_nums, pages):
+            if html is None:
+                print(f"Failed to load page {page_num}, skipping")
+                continue
+
+            # Extract article URLs from current page
+            page_urls = LISTING_SPEC.extract(parse_html(html))["urls"]
+
+            print(f"Found {len(page_urls)} articles on page {page_num}")
+            all_urls.update(page_urls)
+
+        # Stop if we've collected enough articles
+        if len(all_urls) >= article_limit:
+            print(f"Collected {len(all_urls)} articles, stopping pagination")
+            break
+    return all_urls
+
+METRICS.configure_from_env(source="Brownfield")
 
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=False, slow_mo=50)
 
     context = browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+        user_agent=USER_AGENT,
         viewport={"width": 1280, "height": 800},
         locale="en-US",
         timezone_id="America/Chicago",
         ignore_https_errors=True
     )
 
+    block_stats = install_resource_blocking(context, SITE_POLICIES["brownfield"])
     page = context.new_page()
+    fetcher = Fetcher(
+        fallback=lambda u: page.content() if safe_goto(page, u) else None,
+        user_agent=USER_AGENT,
+        use_http=USE_HTTP_FETCH,
+        cache=ResponseCache(CACHE_DIR),
+        rate=RateController(initial_rate=0.5, user_agent=USER_AGENT),
+    )
     
-    print("Navigating to:", BASE_URL)
+    print("Discovering articles from", SITE_ROOT)
     
     try:
-        page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
-        print("Page loaded successfully!")
-        page.wait_for_timeout(3000)
-        
-        # Get total pages from pagination
-        html = page.content()
-        soup = BeautifulSoup(html, "html.parser")
-        total_pages = 1
-        pages_span = soup.find("span", class_="pages")
-        if pages_span:
-            try:
-                # Extract total pages from "Page 1 of 620"
-                total_pages = int(pages_span.get_text().split("of")[-1].strip())
-                print(f"Found {total_pages} total pages")
-            except Exception as e:
-                print(f"Error parsing pagination: {e}")
-        
-        # Calculate actual pages to scrape
-        pages_to_scrape = min(total_pages, max_pages_to_scrape)
-        print(f"Will scrape up to {pages_to_scrape} pages")
-        
-        # Collect all article URLs across pages
-        all_urls = []
-        for page_num in range(1, pages_to_scrape + 1):
-            # For page 1 we're already on it, navigate for others
-            if page_num > 1:
-                next_page_url = f"{BASE_URL}page/{page_num}/"
-                print(f"Navigating to page {page_num}: {next_page_url}")
-                if not safe_goto(page, next_page_url):
-                    print(f"Failed to load page {page_num}, skipping")
-                    continue
-                page.wait_for_timeout(2000)
-            
-            # Extract article URLs from current page
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-            page_urls = []
-            
-            for div in soup.find_all("div", class_="entry-content cat-container"):
-                try:
-                    href = div.find("h2").find("a").get("href", "").strip()
-                    if href:
-                        page_urls.append(href)
-                except Exception as e:
-                    print(f"Error extracting URL from div: {e}")
-            
-            print(f"Found {len(page_urls)} articles on page {page_num}")
-            all_urls.extend(page_urls)
-            
-            # Stop if we've collected enough articles
-            if len(all_urls) >= article_limit:
-                print(f"Collected {len(all_urls)} articles, stopping pagination")
-                break
+        discovery = WPDiscovery(SITE_ROOT, fetcher.get, cache=fetcher.cache)
+        posts = discovery.posts(term="crops-markets", after=START_DATE, before=END_DATE, limit=article_limit)
+        print(discovery.summary())
+        if posts is not None:
+            all_urls = URLFrontier()
+            for post in posts:
+                all_urls.add(post.url, date=post.date)
+        else:
+            all_urls = crawl_listing_pages(fetcher)
         
         print(f"\nTotal article URLs collected: {len(all_urls)}")
         print(f"Processing first {article_limit} articles")
         
         # Process articles
         data = []
-        for i,url in enumerate(all_urls[:article_limit]):
+        # Newest first: a cut-short run still has the latest articles
+        i = 0
+        while i < article_limit and (url := all_urls.pop()) is not None:
             print(f"\nProcessing {i} : {url}")
-            if not safe_goto(page, url):
+            i += 1
+            html = fetcher.fetch(url, ARTICLE_SELECTORS)
+            if html is None:
                 print(f"Navigation failed for {url}")
                 continue
                 
             try:
-                soup = BeautifulSoup(page.content(), "html.parser")
                 row = {
                     "url": url,
                     "scraped_at": datetime.now().strftime('%Y%m%d_%H%M%S'),
@@ -143,54 +173,10 @@ with sync_playwright() as p:
                     "len": 0
                 }
                 
-                # Date extraction
-                if (time_tag := soup.find("time")):
-                    try:
-                        row["article_date"] = parse_date(time_tag.get_text().strip())
-                    except Exception as e:
-                        print(f"Date parse error: {e}")
-                
-                # Title extraction
-                if (title_tag := soup.find("p", class_="post_title")):
-                    row["title"] = title_tag.get_text(strip=True)
-                
-                # Author extraction
-                if (author_tag := soup.find("span", class_="entry-author-name")):
-                    row["author"] = author_tag.get_text(strip=True)
-                
-                # Categories extraction
-                if (cat_span := soup.find("span", class_="entry-categories")):
-                    cats = [a.get_text(strip=True) for a in cat_span.find_all("a")]
-                    row["categories"] = "|".join(cats)
-                
-                # Tags extraction
-                tag_divs = soup.find_all("div", class_="pull-right")
-                if tag_divs:
-                    tag_container = tag_divs[-1]
-                    tags = [a.get_text(strip=True) for a in tag_container.find_all("a")[1:]]
-                    row["tags"] = "|".join(tags)
-                
-                # Body extraction for classless <p> tags
-                body_div = soup.find("div", class_="singleimg")
-                if body_div:
-                    body_parts = []
-                    current = body_div
-                    while True:
-                        current = current.next_sibling
-                        if current is None or current.name == "div":
-                            break
-                        if current.name == "p" and not current.has_attr("class"):
-                            body_parts.append(current.get_text(strip=True))
-                    row["body"] = "\n\n".join(body_parts)
-                    row["len"] = len(row["body"])
-                else:
-                    content_div = soup.find("div", class_="entry-content")
-                    if content_div:
-                        row["body"] = content_div.get_text(strip=True)
-                        row["len"] = len(row["body"])
-                    else:
-                        row["body"] = ""
-                        row["len"] = 0
+                # Date, title, author, categories, tags, body in one spec pass
+                fields = ARTICLE_SPEC.extract(parse_html(html))
+                row.update((k, v) for k, v in fields.items() if v is not None)
+                row["len"] = len(row["body"])
                 row["Source"]="Brownfield"
                 data.append(row)
                 print(f"Parsed: {row['title'][:50]}...")
@@ -207,6 +193,7 @@ with sync_playwright() as p:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"brownfield_articles_{timestamp}.csv"
             df.to_csv(filename, index=False, encoding='utf-8-sig')
+            write_articles(df, source="Brownfield")
             print(f"\nScraped {len(data)} articles successfully!")
             print(df[["scraped_at", "title", "len"]].head())
         else:
@@ -217,4 +204,9 @@ with sync_playwright() as p:
     
     finally:
         browser.close()
+        fetcher.close()
+        print(fetcher.summary())
+        print(block_stats.summary())
+        print(WAIT_STATS.summary())
+        print(METRICS.summary())
         print("Browser closed")
\ No newline at end of file
@@ -2,40 +2,233 @@
 """
 Brownfield scraper worker - outputs fragment CSV (with full body) + per-article TXT files
 Usage: python brownfield_worker.py --start-page 1 --end-page 155 --worker-id 1
+       python brownfield_worker.py --concurrency 6            # async mode, all pages
+       python brownfield_worker.py --queue --worker-id 1      # shared work queue; start as many as you like
+       python brownfield_worker.py --queue --worker-id 1 --since 2026-01-01   # only posts changed since
+
+Full crawls (--concurrency / --queue without --end-page) discover articles through
+the WordPress REST API or post sitemaps and only walk the listing pages when
+neither is available (or with --no-discover).
 """
 import argparse
+import asyncio
+import os
 import sys
 import time
 import random
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 import re
-import csv
-from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from fetcher import Fetcher
+from response_cache import ResponseCache
+from crawl_state import CrawlState
+from work_queue import WorkQueue
+from wp_discovery import WPDiscovery
+from fragment_writer import FragmentWriter
+from html_parser import parse_html
+from extraction import SITE_SPECS
+from resource_blocking import SITE_POLICIES, BlockStats, install_resource_blocking, install_resource_blocking_async
+from rate_control import RateController
+from navigation import WaitStats, goto_ready, goto_ready_async, wait_ready, wait_ready_async
+from metrics import METRICS, JSON_ENV, PORT_ENV, TRACE_ENV
+
+BASE_URL = "https://www.brownfieldagnews.com/crops-markets/"  # CRITICAL: NO TRAILING SPACES!
+SITE_ROOT = "https://www.brownfieldagnews.com"
+
+LISTING_SPEC = SITE_SPECS['brownfield']['listing']
+ARTICLE_SPEC = SITE_SPECS['brownfield']['article']
+
+# A plain-HTTP response is only trusted if one of these is present
+LISTING_SELECTORS = ["div.entry-content.cat-container"]
+ARTICLE_SELECTORS = ["p.post_title", "div.singleimg"]
+
+# Browser navigation returns as soon as one of these is in the DOM
+READY_SELECTORS = ["div.entry-content.cat-container", "p.post_title"]
+CHALLENGE_SELECTORS = ["div.cf-browser-verification", "div#challenge-running"]
+WAIT_STATS = WaitStats()
+
+QUEUE_POLL_SECONDS = 10  # queue mode: idle wait while other workers hold the remaining leases
+
+FRAGMENT_COLUMNS = [
+    'article_id', 'date', 'title', 'author', 'categories', 'tags',
+    'url', 'scraped_at', 'source', 'body_char_count', 'body'
+]
+
+BROWSER_ARGS = [
+    '--no-sandbox', '--disable-setuid-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--disable-gpu', '--disable-dev-shm-usage',
+    '--no-first-run', '--no-default-browser-check',
+    '--window-size=1920,1080',
+]
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0"
+]
+
+# Hide automation fingerprints
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+    Object.defineProperty(window, 'navigator', {
+        value: new Proxy(navigator, {
+            has: (target, key) => key !== 'webdriver' && key in target,
+            get: (target, key) => key === 'webdriver' ? undefined : target[key]
+        })
+    });
+"""
+
+def context_options(worker_id):
+    return dict(
+        user_agent=USER_AGENTS[worker_id % len(USER_AGENTS)],
+        viewport={'width': 1920, 'height': 1080},
+        locale='en-US',
+        timezone_id='America/Chicago',
+        java_script_enabled=True,
+        bypass_csp=True,
+        ignore_https_errors=True,
+        extra_http_headers={
+            "Accept-Language": "en-US,en;q=0.9",
+            "Referer": "https://www.google.com/",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "none",
+            "Sec-Fetch-User": "?1",
+            "Upgrade-Insecure-Requests": "1",
+            "DNT": "1",
+        }
+    )
 
 def sanitize_filename(name, max_len=40):
     name = re.sub(r'[<>:"/\\|?*]', '', str(name))
     return re.sub(r'\s+', '_', name.strip())[:max_len] or 'untitled'
 
-def parse_date(s):
-    month_map = {
-        "January": "01", "Jan": "01", "February": "02", "Feb": "02", "March": "03", "Mar": "03",
-        "April": "04", "Apr": "04", "May": "05", "June": "06", "Jun": "06", "July": "07", "Jul": "07",
-        "August": "08", "Aug": "08", "September": "09", "Sep": "09", "Sept": "09", "October": "10", "Oct": "10",
-        "November": "11", "Nov": "11", "December": "12", "Dec": "12"
+def listing_url(page_num):
+    return BASE_URL if page_num == 1 else f"{BASE_URL}page/{page_num}/"
+
+def discover_articles(args, get=None, cache=None, rate=None):
+    """
+    Article URLs (newest first) from the WordPress REST API / post sitemaps for a
+    full crawl, or None to walk the listing pages instead.
+    """
+    if args.no_discover or args.end_page is not None or args.start_page != 1:
+        return None
+    discovery = WPDiscovery(SITE_ROOT, get, cache=cache, rate=rate)
+    posts = discovery.posts(term='crops-markets', modified_after=args.since)
+    print(f"  🔎 {discovery.summary()}")
+    if posts is None:
+        return None
+    return [post.url for post in posts]
+
+def parse_total_pages(html):
+    """Read total page count from the "Page 1 of 620" pagination span"""
+    return LISTING_SPEC.extract(parse_html(html))['total_pages']
+
+def extract_listing_urls(html):
+    """Article URLs from one crops-markets listing page"""
+    return LISTING_SPEC.extract(parse_html(html))['urls']
+
+def parse_article(html, article_url):
+    """Metadata + body dict for one article page"""
+    meta = {
+        'url': article_url,
+        'scraped_at': datetime.now().isoformat(),
+        'article_date': None,
+        'title': 'Untitled',
+        'author': 'Unknown',
+        'categories': '',
+        'tags': '',
+        'source': 'Brownfield',
+        'body': ''
     }
-    try:
-        parts = s.replace(",", "").split()
-        if len(parts) < 3:
-            return None
-        year = parts[2]
-        month = month_map.get(parts[0], "01")
-        day = parts[1].zfill(2)
-        return datetime.strptime(f"{year}-{month}-{day}", "%Y-%m-%d").date()
-    except Exception as e:
-        print(f"  ⚠️ Date parse error for '{s}': {e}")
+    fields = ARTICLE_SPEC.extract(parse_html(html))
+    meta.update((k, v) for k, v in fields.items() if v is not None)
+    meta['body'] = meta['body'].strip()
+    return meta
+
+def make_article_id(meta, worker_id, seq):
+    date_prefix = meta['article_date'].strftime('%Y%m%d') if meta['article_date'] else 'nodate'
+    return f"{date_prefix}_{worker_id}_{seq:06d}"
+
+def save_article_txt(meta, article_id, articles_dir):
+    """Write the TXT file (metadata + body) and return its path"""
+    safe_title = sanitize_filename(meta['title'], 30)
+    txt_path = articles_dir / f"{article_id}_{safe_title}.txt"
+
+    metadata_block = f"""URL: {meta['url']}
+Date: {meta['article_date'] if meta['article_date'] else 'N/A'}
+Title: {meta['title']}
+Author: {meta['author']}
+Categories: {meta['categories']}
+Tags: {meta['tags']}
+Source: {meta['source']}
+Scraped at: {meta['scraped_at']}
+Body character count: {len(meta['body']):,}
+{'='*70}
+
+"""
+
+    with METRICS.timer('txt_write_seconds'), open(txt_path, 'w', encoding='utf-8') as f:
+        f.write(metadata_block)
+        f.write(meta['body'])
+    return txt_path
+
+def fragment_row(meta, article_id):
+    """CSV row with full body text"""
+    return {
+        'article_id': article_id,
+        'date': meta['article_date'].isoformat() if meta['article_date'] else 'N/A',
+        'title': meta['title'],
+        'author': meta['author'],
+        'categories': meta['categories'],
+        'tags': meta['tags'],
+        'url': meta['url'],
+        'scraped_at': meta['scraped_at'],
+        'source': meta['source'],
+        'body_char_count': len(meta['body']),
+        'body': meta['body']  # FULL TEXT IN CSV COLUMN
+    }
+
+def load_existing_urls(articles_dir):
+    """Already-scraped URLs from existing TXT headers (only used to seed the crawl state)"""
+    existing_urls = set()
+    for txt_file in articles_dir.glob('*.txt'):
+        try:
+            # Extract URL from first few lines of TXT file
+            with open(txt_file, 'r', encoding='utf-8') as f:
+                for i, line in enumerate(f):
+                    if line.startswith('URL: '):
+                        existing_urls.add(line[5:].strip())
+                        break
+                    if i > 10:  # Don't read entire file
+                        break
+        except:
+            pass
+    return existing_urls
+
+def open_crawl_state(output_dir, articles_dir):
+    """SQLite crawl state; seeded once from TXT headers when a pre-existing corpus has none"""
+    state = CrawlState(output_dir / 'crawl_state.sqlite')
+    if state.is_empty():
+        existing = load_existing_urls(articles_dir)
+        if existing:
+            print(f"📥 Importing {len(existing)} URLs from TXT headers into crawl state (one-off)")
+            state.import_urls(existing)
+    return state
+
+def make_cache(args):
+    if args.no_cache and not args.offline:
         return None
+    return ResponseCache(args.cache_dir, offline=True if args.offline else None)
+
+def make_rate(args):
+    """Adaptive per-host pacing starting at --rate, never above --max-rate or robots.txt"""
+    return RateController(initial_rate=args.rate, max_rate=args.max_rate,
+                          user_agent=USER_AGENTS[args.worker_id % len(USER_AGENTS)])
 
 def safe_goto(page, url, retries=5):
     """Navigate with Cloudflare challenge handling"""
@@ -44,22 +237,24 @@ def safe_goto(page, url, retries=5):
             if attempt > 0:
                 delay = 2 ** attempt + random.uniform(0, 1)
                 print(f"  ⏳ Retry {attempt+1}/{retries} after {delay:.1f}s...")
+                METRICS.inc('retries_total', reason='navigation')
+                METRICS.observe('sleep_seconds', delay, reason='retry')
                 time.sleep(delay)
             
-            page.goto(url, wait_until="networkidle", timeout=90000)
+            goto_ready(page, url, READY_SELECTORS + CHALLENGE_SELECTORS, timeout=30000,
+                       stats=WAIT_STATS, label='page', goto_timeout=90000)
             
             # Check for Cloudflare challenge
-            if page.query_selector("div.cf-browser-verification") or page.query_selector("div#challenge-running"):
-                print(f"  🛡️ Cloudflare challenge detected - waiting 15s...")
-                page.wait_for_timeout(15000)
-                if page.query_selector("div.cf-browser-verification") or page.query_selector("div#challenge-running"):
+            if page.query_selector(", ".join(CHALLENGE_SELECTORS)):
+                METRICS.inc('challenges_total')
+                print(f"  🛡️ Cloudflare challenge detected - waiting up to 15s...")
+                if not wait_ready(page, READY_SELECTORS, timeout=15000, stats=WAIT_STATS, label='challenge'):
                     print(f"  ❌ Still blocked after waiting")
                     continue
             
             # Verify content loaded
-            if page.query_selector("div.entry-content.cat-container") or page.query_selector("p.post_title"):
+            if page.query_selector(", ".join(READY_SELECTORS)):
                 print(f"  ✅ Page loaded successfully")
-                page.wait_for_timeout(2000)
                 return True
             else:
                 print(f"  ⚠️ Page loaded but no content found")
@@ -75,286 +270,490 @@ def safe_goto(page, url, retries=5):
     print(f"  ❌ All {retries} navigation attempts failed")
     return False
 
+async def async_safe_goto(page, url, limiter, retries=5):
+    """Async twin of safe_goto; every attempt pays one token from the host limiter"""
+    from playwright.async_api import TimeoutError as AsyncTimeoutError
+
+    for attempt in range(retries):
+        try:
+            if attempt > 0:
+                delay = 2 ** attempt + random.uniform(0, 1)
+                print(f"  ⏳ Retry {attempt+1}/{retries} after {delay:.1f}s: {url[:60]}")
+                METRICS.inc('retries_total', reason='navigation')
+                METRICS.observe('sleep_seconds', delay, reason='retry')
+                await asyncio.sleep(delay)
+
+            async with limiter.slot(url):
+                start = time.monotonic()
+                try:
+                    response, _ = await goto_ready_async(page, url, READY_SELECTORS + CHALLENGE_SELECTORS, timeout=30000,
+                                                         stats=WAIT_STATS, label='page', goto_timeout=90000)
+                except Exception:
+                    limiter.controller.record(url, None, time.monotonic() - start)
+                    raise
+                limiter.controller.record(url, response.status if response else None, time.monotonic() - start,
+                                          await response.all_headers() if response else None)
+
+            if await page.query_selector(", ".join(CHALLENGE_SELECTORS)):
+                METRICS.inc('challenges_total')
+                print("  🛡️ Cloudflare challenge detected - waiting up to 15s...")
+                if not await wait_ready_async(page, READY_SELECTORS, timeout=15000, stats=WAIT_STATS, label='challenge'):
+                    print("  ❌ Still blocked after waiting")
+                    continue
+
+            if await page.query_selector(", ".join(READY_SELECTORS)):
+                return True
+            print(f"  ⚠️ Page loaded but no content found: {url[:60]}")
+
+        except AsyncTimeoutError:
+            print(f"  ⏱️ Timeout on attempt {attempt+1}/{retries}: {url[:60]}")
+        except Exception as e:
+            print(f"  ❌ Navigation error (attempt {attempt+1}): {type(e).__name__}: {str(e)[:80]}")
+
+    print(f"  ❌ All {retries} navigation attempts failed: {url[:60]}")
+    return False
+
+async def async_main(args, articles_dir, state, writer):
+    """
+    Crawl listing + article pages with `--concurrency` pages in one browser.
+    All pages share one adaptive per-host politeness budget (`--rate`..`--max-rate`
+    req/s, `--host-concurrency` in flight).
+    """
+    from playwright.async_api import async_playwright
+    from async_crawl import HostLimiter, run_page_pool
+
+    rate = make_rate(args)
+    limiter = HostLimiter(max_concurrency=args.host_concurrency, controller=rate)
+    # the host slot does the waiting; the fetcher only reports HTTP outcomes
+    fetcher = Fetcher(user_agent=USER_AGENTS[args.worker_id % len(USER_AGENTS)],
+                      pool_size=args.host_concurrency, use_http=not args.browser_only,
+                      cache=make_cache(args), rate=rate, pace=False)
+    seq = writer.progress.get('next_seq', 0)
+    stats = {'scraped': 0, 'found': 0, 'pages': 0}
+    block_stats = BlockStats()
+    queue = asyncio.Queue()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        slot_ids = iter(range(args.concurrency))
+
+        async def new_context():
+            context = await browser.new_context(**context_options(args.worker_id + next(slot_ids)))
+            await context.add_init_script(STEALTH_SCRIPT)
+            await install_resource_blocking_async(context, SITE_POLICIES['brownfield'], block_stats)
+            return context
+
+        async def handle(page, job, queue):
+            with METRICS.span(job[0], url=job[1]):
+                await process(page, job, queue)
+
+        async def process(page, job, queue):
+            kind, url = job
+            selectors = LISTING_SELECTORS if kind == 'listing' else ARTICLE_SELECTORS
+            async with limiter.slot(url):
+                html = await asyncio.to_thread(fetcher.try_http, url, selectors)
+            if html is None:
+                offline = fetcher.cache is not None and fetcher.cache.offline
+                if offline or not await async_safe_goto(page, url, limiter):
+                    fetcher.stats['failed'] += 1
+                    print(f"  ❌ Skipping {kind}: {url[:60]}")
+                    if kind == 'article':
+                        state.mark_failed(url, args.worker_id)
+                    return
+                fetcher.stats['browser'] += 1
+                html = await page.content()
+                if fetcher.cache is not None:
+                    fetcher.cache.store(url, html)
+
+            if kind == 'listing':
+                stats['pages'] += 1
+                if url == listing_url(args.start_page) and args.end_page is None:
+                    total_pages = parse_total_pages(html) or args.start_page
+                    print(f"  📚 Pagination reports {total_pages} pages")
+                    for page_num in range(args.start_page + 1, total_pages + 1):
+                        queue.put_nowait(('listing', listing_url(page_num)))
+                articles_on_page = extract_listing_urls(html)
+                stats['found'] += len(articles_on_page)
+                print(f"  📄 {url} ➕ {len(articles_on_page)} articles")
+                for article_url in articles_on_page:
+                    # claim it so no other page (or worker process) picks it up
+                    if state.claim(article_url, args.worker_id):
+                        queue.put_nowait(('article', article_url))
+                return
+
+            try:
+                meta = parse_article(html, url)
+                article_id = make_article_id(meta, args.worker_id, seq + stats['scraped'])
+                stats['scraped'] += 1
+                save_article_txt(meta, article_id, articles_dir)
+            except Exception:
+                state.mark_failed(url, args.worker_id)
+                raise
+            # marked done in the crawl state once the writer fsyncs it
+            writer.add(fragment_row(meta, article_id))
+            print(f"  ✅ Saved [{stats['scraped']}] {meta['title'][:40]} ({len(meta['body']):,} chars)")
+
+        discovered = await asyncio.to_thread(discover_articles, args, fetcher.get, fetcher.cache, rate)
+        if discovered is not None:
+            stats['found'] += len(discovered)
+            for article_url in discovered:
+                if state.claim(article_url, args.worker_id):
+                    queue.put_nowait(('article', article_url))
+            print(f"  ➕ Discovered {len(discovered)} articles ({queue.qsize()} to scrape)")
+        elif args.end_page is None:
+            queue.put_nowait(('listing', listing_url(args.start_page)))
+        else:
+            for page_num in range(args.start_page, args.end_page + 1):
+                queue.put_nowait(('listing', listing_url(page_num)))
+
+        try:
+            await run_page_pool(new_context, queue, handle, args.concurrency)
+        finally:
+            await browser.close()
+            fetcher.close()
+            print(f"  🌐 {fetcher.summary()}")
+            print(f"  🚫 {block_stats.summary()}")
+            print(f"  ⏱️ {WAIT_STATS.summary()}")
+            print(f"  📈 {METRICS.summary()}")
+            writer.checkpoint(next_seq=seq + stats['scraped'])
+
+    return stats
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--start-page', type=int, required=True, help='Starting page number')
-    parser.add_argument('--end-page', type=int, required=True, help='Ending page number')
-    parser.add_argument('--worker-id', type=int, required=True, help='Worker ID (1-4)')
+    parser.add_argument('--start-page', type=int, default=None, help='Starting page number')
+    parser.add_argument('--end-page', type=int, default=None, help='Ending page number (async mode: defaults to last page)')
+    parser.add_argument('--worker-id', type=int, default=None, help='Worker ID (1-4)')
     parser.add_argument('--output-dir', type=str, default='brownfield_output', help='Output directory')
+    parser.add_argument('--concurrency', type=int, default=1, help='Pages crawled in parallel in one browser (>1 enables async mode)')
+    parser.add_argument('--rate', type=float, default=0.5, help='Starting requests/sec per host (adapts to responses)')
+    parser.add_argument('--max-rate', type=float, default=4.0, help='Ceiling for the adaptive per-host rate (robots.txt may lower it)')
+    parser.add_argument('--host-concurrency', type=int, default=4, help='Async mode: max in-flight navigations per host')
+    parser.add_argument('--browser-only', action='store_true', help='Skip the plain-HTTP fetch path and render every page in Chromium')
+    parser.add_argument('--cache-dir', type=str, default='http_cache', help='On-disk HTTP response cache')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache')
+    parser.add_argument('--offline', action='store_true', help='Replay from the response cache only (no network)')
+    parser.add_argument('--queue', action='store_true', help='Pull listing pages and articles from the shared work queue (run N workers with distinct --worker-id)')
+    parser.add_argument('--lease', type=float, default=300, help='Queue mode: seconds a work item stays leased without a heartbeat')
+    parser.add_argument('--no-discover', action='store_true', help='Always walk the listing pages instead of the WordPress REST API / sitemaps')
+    parser.add_argument('--since', type=date.fromisoformat, default=None, help='Discovery: only posts modified on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--metrics-port', type=int, default=os.environ.get(PORT_ENV), help='Serve Prometheus metrics on this port (/metrics)')
+    parser.add_argument('--metrics-json', type=str, default=os.environ.get(JSON_ENV), help='Rewrite a JSON metrics snapshot at this path every 30s')
+    parser.add_argument('--trace', type=str, default=os.environ.get(TRACE_ENV), help='Append span traces (JSON lines) to this file')
     args = parser.parse_args()
 
+    async_mode = args.concurrency > 1
+    if args.queue and async_mode:
+        parser.error('--queue runs one page per worker process; drop --concurrency')
+    if args.queue and args.worker_id is None:
+        parser.error('--queue needs a distinct --worker-id per process')
+    if not async_mode and not args.queue and None in (args.start_page, args.end_page, args.worker_id):
+        parser.error('--start-page, --end-page and --worker-id are required unless --concurrency > 1 or --queue')
+    if args.start_page is None:
+        args.start_page = 1
+    if args.worker_id is None:
+        args.worker_id = 0
+
+    METRICS.configure(source='Brownfield', worker=args.worker_id)
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port)
+    if args.metrics_json:
+        METRICS.start_snapshots(args.metrics_json)
+    if args.trace:
+        METRICS.enable_tracing(args.trace)
+
     OUTPUT_DIR = Path(args.output_dir)
     ARTICLES_DIR = OUTPUT_DIR / 'articles'
     FRAGMENTS_DIR = OUTPUT_DIR / 'csv_fragments'
     ARTICLES_DIR.mkdir(parents=True, exist_ok=True)
     FRAGMENTS_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Track already-scraped URLs from existing TXT files
-    existing_urls = set()
-    for txt_file in ARTICLES_DIR.glob('*.txt'):
-        try:
-            # Extract URL from first few lines of TXT file
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f):
-                    if line.startswith('URL: '):
-                        existing_urls.add(line[5:].strip())
-                        break
-                    if i > 10:  # Don't read entire file
-                        break
-        except:
-            pass
+    state = open_crawl_state(OUTPUT_DIR, ARTICLES_DIR)
+    released = state.release_claims(args.worker_id)
+    queue = None
+    if args.queue:
+        queue = WorkQueue(OUTPUT_DIR / 'work_queue.sqlite', lease_seconds=args.lease)
+        released += queue.release(args.worker_id)
+
+    def on_durable(rows):
+        state.mark_done_many([(r['url'], r['article_id']) for r in rows], args.worker_id)
+        if queue is not None:
+            queue.complete_urls(r['url'] for r in rows)
+
+    # ===== FRAGMENT CSV (with full body text), appended as we go =====
+    end_label = args.end_page if args.end_page is not None else 'all'
+    if args.queue:
+        fragment_csv = FRAGMENTS_DIR / f"fragment_worker_{args.worker_id}_queue.csv"
+    else:
+        fragment_csv = FRAGMENTS_DIR / f"fragment_worker_{args.worker_id}_{args.start_page}_{end_label}.csv"
+    writer = FragmentWriter(fragment_csv, FRAGMENT_COLUMNS, on_durable=on_durable)
 
     print(f"\n{'='*70}")
     print(f"[Worker {args.worker_id}] STARTING")
     print(f"{'='*70}")
-    print(f"Pages: {args.start_page}-{args.end_page} ({args.end_page - args.start_page + 1} pages)")
+    if args.queue:
+        print(f"Mode: work queue {queue.path.name}, lease {args.lease:.0f}s")
+    elif args.end_page is None:
+        print(f"Pages: {args.start_page}-last")
+    else:
+        print(f"Pages: {args.start_page}-{args.end_page} ({args.end_page - args.start_page + 1} pages)")
+    if async_mode:
+        print(f"Mode: async, {args.concurrency} pages, {args.rate}-{args.max_rate} req/s per host (max {args.host_concurrency} in flight)")
     print(f"Output: {OUTPUT_DIR.absolute()}")
-    print(f"Already scraped: {len(existing_urls)} articles")
+    print(f"Already scraped: {state.count('done')} articles")
+    if writer.resumed:
+        print(f"Resuming: {writer.rows_durable} rows durable in {fragment_csv.name}, checkpoint {writer.progress}")
+    if released:
+        print(f"Re-queued {released} items this worker left unfinished")
+    print(f"{'='*70}\n")
+
+    try:
+        if async_mode:
+            stats = asyncio.run(async_main(args, ARTICLES_DIR, state, writer))
+        elif args.queue:
+            stats = queue_main(args, ARTICLES_DIR, state, writer, queue)
+        else:
+            stats = serial_main(args, ARTICLES_DIR, state, writer)
+    finally:
+        writer.close()
+        if queue is not None:
+            print(f"  📋 {queue.summary()}")
+            queue.close()
+
+    if writer.rows_this_run:
+        print(f"\n✅ Worker {args.worker_id} fragment saved: {fragment_csv.name}")
+        print(f"   Articles scraped: {writer.rows_this_run} this run, {writer.rows_durable} in fragment")
+    
+    print(f"\n{'='*70}")
+    print(f"[Worker {args.worker_id}] FINISHED")
+    print(f"{'='*70}")
+    print(f"Pages processed : {stats['pages']}")
+    print(f"Articles found  : {stats['found']}")
+    print(f"Articles saved  : {stats['scraped']}")
+    print(f"Fragment CSV    : {fragment_csv}")
+    print(f"TXT files       : {ARTICLES_DIR.relative_to(OUTPUT_DIR)}/")
     print(f"{'='*70}\n")
 
+def serial_main(args, ARTICLES_DIR, state, writer):
+    """Original one-page-at-a-time crawl for a hand-picked page range"""
+    # A restarted worker continues after the last durably checkpointed page
+    first_page = max(args.start_page, writer.progress.get('last_page', args.start_page - 1) + 1)
+    seq = writer.progress.get('next_seq', 0)
+    stats = {'scraped': 0, 'found': 0, 'pages': 0}
+    if first_page > args.start_page:
+        print(f"[Worker {args.worker_id}] ♻️ Resuming at page {first_page}")
+
     # Stagger worker start
     stagger_delay = args.worker_id * 15
     print(f"[Worker {args.worker_id}] ⏳ Staggering start by {stagger_delay}s...")
+    METRICS.observe('sleep_seconds', stagger_delay, reason='stagger')
     time.sleep(stagger_delay)
 
     # Launch hardened browser
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox', '--disable-setuid-sandbox',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--disable-gpu', '--disable-dev-shm-usage',
-                '--no-first-run', '--no-default-browser-check',
-                '--window-size=1920,1080',
-            ]
-        )
-        
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0"
-        ]
-        
-        context = browser.new_context(
-            user_agent=user_agents[args.worker_id % len(user_agents)],
-            viewport={'width': 1920, 'height': 1080},
-            locale='en-US',
-            timezone_id='America/Chicago',
-            java_script_enabled=True,
-            bypass_csp=True,
-            ignore_https_errors=True,
-            extra_http_headers={
-                "Accept-Language": "en-US,en;q=0.9",
-                "Referer": "https://www.google.com/",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-User": "?1",
-                "Upgrade-Insecure-Requests": "1",
-                "DNT": "1",
-            }
-        )
-        
-        # Hide automation fingerprints
-        context.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-            Object.defineProperty(window, 'navigator', {
-                value: new Proxy(navigator, {
-                    has: (target, key) => key !== 'webdriver' && key in target,
-                    get: (target, key) => key === 'webdriver' ? undefined : target[key]
-                })
-            });
-        """)
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        context = browser.new_context(**context_options(args.worker_id))
+        context.add_init_script(STEALTH_SCRIPT)
+        block_stats = install_resource_blocking(context, SITE_POLICIES['brownfield'])
         
         page = context.new_page()
-        BASE_URL = "https://www.brownfieldagnews.com/crops-markets/"  # CRITICAL: NO TRAILING SPACES!
-        fragment_rows = []
-        total_scraped = 0
-        total_articles_found = 0
-
+        fetcher = Fetcher(
+            fallback=lambda u: page.content() if safe_goto(page, u) else None,
+            user_agent=USER_AGENTS[args.worker_id % len(USER_AGENTS)],
+            use_http=not args.browser_only,
+            cache=make_cache(args),
+            rate=make_rate(args),
+        )
         try:
-            for page_num in range(args.start_page, args.end_page + 1):
-                print(f"\n[Worker {args.worker_id}] 📄 Page {page_num}/{args.end_page}")
-                url = BASE_URL if page_num == 1 else f"{BASE_URL}page/{page_num}/"
-                print(f"  URL: {url}")
-                
-                if not safe_goto(page, url):
-                    print(f"  ❌ Skipping page {page_num}")
-                    time.sleep(10 + random.uniform(0, 5))
-                    continue
+            for page_num in range(first_page, args.end_page + 1):
+                with METRICS.span('listing', page=page_num):
+                    print(f"\n[Worker {args.worker_id}] 📄 Page {page_num}/{args.end_page}")
+                    url = listing_url(page_num)
+                    print(f"  URL: {url}")
                 
-                soup = BeautifulSoup(page.content(), 'html.parser')
-                articles_on_page = []
-                
-                for div in soup.find_all('div', class_='entry-content cat-container'):
-                    try:
-                        a_tag = div.find('h2').find('a') if div.find('h2') else None
-                        if a_tag and a_tag.get('href'):
-                            href = a_tag['href'].strip()
-                            if href.startswith('/'):
-                                href = 'https://www.brownfieldagnews.com' + href
-                            elif not href.startswith('http'):
-                                href = BASE_URL + href.lstrip('/')
-                            articles_on_page.append(href)
-                    except:
+                    html = fetcher.fetch(url, LISTING_SELECTORS)
+                    if html is None:
+                        print(f"  ❌ Skipping page {page_num}")
                         continue
                 
-                print(f"  ➕ Found {len(articles_on_page)} articles")
-                total_articles_found += len(articles_on_page)
+                    articles_on_page = extract_listing_urls(html)
                 
-                for article_url in articles_on_page:
-                    if article_url in existing_urls:
-                        print(f"  ➤ Skipping (already scraped): {article_url[:50]}...")
-                        continue
+                    print(f"  ➕ Found {len(articles_on_page)} articles")
+                    stats['found'] += len(articles_on_page)
+                    stats['pages'] += 1
+                
+                    for article_url in articles_on_page:
+                        if not state.claim(article_url, args.worker_id):
+                            print(f"  ➤ Skipping (already scraped): {article_url[:50]}...")
+                            continue
                     
-                    print(f"  📰 Processing: {article_url[:60]}...")
+                        with METRICS.span('article', url=article_url):
+                            print(f"  📰 Processing: {article_url[:60]}...")
                     
-                    if not safe_goto(page, article_url):
-                        print(f"  ❌ Failed to load article")
-                        continue
+                            html = fetcher.fetch(article_url, ARTICLE_SELECTORS)
+                            if html is None:
+                                print(f"  ❌ Failed to load article")
+                                state.mark_failed(article_url, args.worker_id)
+                                continue
                     
-                    try:
-                        soup = BeautifulSoup(page.content(), 'html.parser')
-                        meta = {
-                            'url': article_url,
-                            'scraped_at': datetime.now().isoformat(),
-                            'article_date': None,
-                            'title': 'Untitled',
-                            'author': 'Unknown',
-                            'categories': '',
-                            'tags': '',
-                            'source': 'Brownfield',
-                            'body': ''
-                        }
-                        
-                        # Extract metadata
-                        if time_tag := soup.find('time'):
-                            meta['article_date'] = parse_date(time_tag.get_text().strip())
-                        
-                        if title_tag := soup.find('p', class_='post_title'):
-                            meta['title'] = title_tag.get_text(strip=True)
-                        
-                        if author_tag := soup.find('span', class_='entry-author-name'):
-                            meta['author'] = author_tag.get_text(strip=True)
-                        
-                        if cat_span := soup.find('span', class_='entry-categories'):
-                            cats = [a.get_text(strip=True) for a in cat_span.find_all('a')]
-                            meta['categories'] = '|'.join(cats)
+                            try:
+                                meta = parse_article(html, article_url)
+                                article_id = make_article_id(meta, args.worker_id, seq + stats['scraped'])
+                                save_article_txt(meta, article_id, ARTICLES_DIR)
+                                # marked done in the crawl state once the writer fsyncs it
+                                writer.add(fragment_row(meta, article_id))
                         
-                        if tag_divs := soup.find_all('div', class_='pull-right'):
-                            if tag_divs:
-                                tags = [a.get_text(strip=True) for a in tag_divs[-1].find_all('a')[1:]]
-                                meta['tags'] = '|'.join(tags)
+                                stats['scraped'] += 1
                         
-                        # Extract body
-                        body_text = ""
-                        if body_div := soup.find('div', class_='singleimg'):
-                            parts = []
-                            current = body_div.next_sibling
-                            while current and current.name != 'div':
-                                if current.name == 'p' and not current.get('class'):
-                                    parts.append(current.get_text(strip=True))
-                                current = current.next_sibling
-                            body_text = '\n\n'.join(parts)
-                        elif content_div := soup.find('div', class_='entry-content'):
-                            body_text = content_div.get_text(strip=True)
+                                print(f"  ✅ Saved [{stats['scraped']}] {meta['title'][:40]} ({len(meta['body']):,} chars)")
                         
-                        meta['body'] = body_text.strip()
-                        
-                        # Generate article ID
-                        date_prefix = meta['article_date'].strftime('%Y%m%d') if meta['article_date'] else 'nodate'
-                        article_id = f"{date_prefix}_{args.worker_id}_{total_scraped:06d}"
-                        safe_title = sanitize_filename(meta['title'], 30)
-                        
-                        # ===== SAVE TXT FILE (metadata + body) =====
-                        txt_filename = f"{article_id}_{safe_title}.txt"
-                        txt_path = ARTICLES_DIR / txt_filename
-                        
-                        metadata_block = f"""URL: {meta['url']}
-Date: {meta['article_date'] if meta['article_date'] else 'N/A'}
-Title: {meta['title']}
-Author: {meta['author']}
-Categories: {meta['categories']}
-Tags: {meta['tags']}
-Source: {meta['source']}
-Scraped at: {meta['scraped_at']}
-Body character count: {len(meta['body']):,}
-{'='*70}
+                            except Exception as e:
+                                state.mark_failed(article_url, args.worker_id)
+                                print(f"  ❌ Error processing article: {type(e).__name__}: {str(e)[:100]}")
+                                import traceback
+                                traceback.print_exc()
+                                continue
+                
+                    writer.checkpoint(last_page=page_num, next_seq=seq + stats['scraped'])
+        
+        finally:
+            browser.close()
+            fetcher.close()
+            print(f"  🌐 {fetcher.summary()}")
+            print(f"  🚫 {block_stats.summary()}")
+            print(f"  ⏱️ {WAIT_STATS.summary()}")
+            print(f"  📈 {METRICS.summary()}")
+            writer.checkpoint(next_seq=seq + stats['scraped'])
 
-"""
-                        
-                        with open(txt_path, 'w', encoding='utf-8') as f:
-                            f.write(metadata_block)
-                            f.write(meta['body'])
-                        
-                        # ===== PREPARE CSV ROW (with full body text) =====
-                        fragment_rows.append({
-                            'article_id': article_id,
-                            'date': meta['article_date'].isoformat() if meta['article_date'] else 'N/A',
-                            'title': meta['title'],
-                            'author': meta['author'],
-                            'categories': meta['categories'],
-                            'tags': meta['tags'],
-                            'url': meta['url'],
-                            'scraped_at': meta['scraped_at'],
-                            'source': meta['source'],
-                            'body_char_count': len(meta['body']),
-                            'body': meta['body']  # FULL TEXT IN CSV COLUMN
-                        })
-                        
-                        total_scraped += 1
-                        existing_urls.add(article_url)
-                        
-                        print(f"  ✅ Saved [{total_scraped}] {meta['title'][:40]} ({len(meta['body']):,} chars)")
-                        
-                        # Human-like delay
-                        delay = 2.5 + random.uniform(0, 2.0) + (args.worker_id * 0.4)
-                        time.sleep(delay)
-                        
+    return stats
+
+def queue_main(args, ARTICLES_DIR, state, writer, queue):
+    """
+    Pull listing pages and articles from the shared work queue until it drains.
+    A full crawl seeds the articles straight from discover_articles(); otherwise
+    the first listing page discovers the page count and queues the rest; each
+    listing queues its unscraped articles for whichever worker is free. An
+    article's lease completes once its row is fsynced, so a dead worker's
+    articles come back to the pool when its heartbeat stops.
+    """
+    seq = writer.progress.get('next_seq', 0)
+    stats = {'scraped': 0, 'found': 0, 'pages': 0}
+    # beating from the start keeps a seed claim alive however long discovery takes
+    stop_heartbeat = queue.keep_alive(args.worker_id)
+    try:
+        seed_queue(args, state, queue, stats)
+        return drain_queue(args, ARTICLES_DIR, state, writer, queue, seq, stats)
+    finally:
+        stop_heartbeat()
+
+def seed_queue(args, state, queue, stats):
+    """One worker seeds a drained queue (reopening finished listings); the rest poll until it has"""
+    if queue.claim_seeding(args.worker_id):
+        try:
+            if args.end_page is not None:
+                added = queue.seed(args.worker_id, 'listing', [listing_url(n) for n in range(args.start_page, args.end_page + 1)])
+                print(f"  🌱 Seeded pages {args.start_page}-{args.end_page} ({added} queued)")
+            else:
+                discovered = discover_articles(args, cache=make_cache(args), rate=make_rate(args))
+                if discovered is None:
+                    added = queue.seed(args.worker_id, 'listing', [listing_url(args.start_page)])
+                    print(f"  🌱 Seeded page {args.start_page} ({added} queued)")
+                else:
+                    stats['found'] += len(discovered)
+                    added = queue.seed(args.worker_id, 'article', [u for u in discovered if not state.is_done(u)])
+                    print(f"  ➕ Discovered {len(discovered)} articles ({added} queued)")
+        except BaseException:
+            queue.release(args.worker_id)
+            raise
+    elif args.end_page is not None:
+        # a crawl is already running: just add any pages of this range it lacks
+        queue.enqueue_many('listing', [listing_url(n) for n in range(args.start_page, args.end_page + 1)])
+
+def drain_queue(args, ARTICLES_DIR, state, writer, queue, seq, stats):
+    """Lease and crawl items until the queue drains"""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=BROWSER_ARGS)
+        context = browser.new_context(**context_options(args.worker_id))
+        context.add_init_script(STEALTH_SCRIPT)
+        block_stats = install_resource_blocking(context, SITE_POLICIES['brownfield'])
+
+        page = context.new_page()
+        fetcher = Fetcher(
+            fallback=lambda u: page.content() if safe_goto(page, u) else None,
+            user_agent=USER_AGENTS[args.worker_id % len(USER_AGENTS)],
+            use_http=not args.browser_only,
+            cache=make_cache(args),
+            rate=make_rate(args),
+        )
+        try:
+            while True:
+                item = queue.lease(args.worker_id)
+                if item is None:
+                    # our own buffered articles still count as leased: make them durable first
+                    writer.checkpoint(next_seq=seq + stats['scraped'])
+                    if queue.drained():
+                        break
+                    print(f"[Worker {args.worker_id}] 💤 Nothing to lease, other workers still busy...")
+                    METRICS.observe('sleep_seconds', QUEUE_POLL_SECONDS, reason='queue_idle')
+                    time.sleep(QUEUE_POLL_SECONDS)
+                    continue
+
+                with METRICS.span(item.kind, url=item.url):
+                    if item.kind == 'listing':
+                        print(f"\n[Worker {args.worker_id}] 📄 {item.url}")
+                        html = fetcher.fetch(item.url, LISTING_SELECTORS)
+                        if html is None:
+                            print(f"  ❌ Listing failed (attempt {item.attempts})")
+                            queue.fail(item.id)
+                            continue
+                        if item.url == listing_url(args.start_page) and args.end_page is None:
+                            total_pages = parse_total_pages(html) or args.start_page
+                            # reopen pages a previous run finished: new posts push older ones down the listing
+                            added = queue.enqueue_many('listing', [listing_url(n) for n in range(args.start_page + 1, total_pages + 1)], reopen=True)
+                            print(f"  📚 Pagination reports {total_pages} pages ({added} queued)")
+                        articles_on_page = extract_listing_urls(html)
+                        stats['found'] += len(articles_on_page)
+                        stats['pages'] += 1
+                        added = queue.enqueue_many('article', [u for u in articles_on_page if not state.is_done(u)])
+                        print(f"  ➕ Found {len(articles_on_page)} articles ({added} queued)")
+                        queue.complete(item.id)
+                        writer.checkpoint(next_seq=seq + stats['scraped'])
+                        continue
+
+                    article_url = item.url
+                    if state.is_done(article_url):
+                        queue.complete(item.id)
+                        continue
+                    print(f"  📰 Processing: {article_url[:60]}...")
+                    html = fetcher.fetch(article_url, ARTICLE_SELECTORS)
+                    if html is None:
+                        print(f"  ❌ Failed to load article (attempt {item.attempts})")
+                        state.mark_failed(article_url, args.worker_id)
+                        queue.fail(item.id)
+                        continue
+                    try:
+                        meta = parse_article(html, article_url)
+                        article_id = make_article_id(meta, args.worker_id, seq + stats['scraped'])
+                        save_article_txt(meta, article_id, ARTICLES_DIR)
+                        # crawl state + queue item are marked done once the writer fsyncs it
+                        writer.add(fragment_row(meta, article_id))
+                        stats['scraped'] += 1
+                        print(f"  ✅ Saved [{stats['scraped']}] {meta['title'][:40]} ({len(meta['body']):,} chars)")
                     except Exception as e:
+                        state.mark_failed(article_url, args.worker_id)
+                        queue.fail(item.id)
                         print(f"  ❌ Error processing article: {type(e).__name__}: {str(e)[:100]}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-                
-                # Delay between pages
-                page_delay = 4.0 + random.uniform(0, 3.0) + (args.worker_id * 0.6)
-                print(f"  ⏳ Waiting {page_delay:.1f}s before next page...")
-                time.sleep(page_delay)
-        
+
         finally:
             browser.close()
-    
-    # ===== WRITE FRAGMENT CSV (with full body text) =====
-    if fragment_rows:
-        fragment_csv = FRAGMENTS_DIR / f"fragment_worker_{args.worker_id}_{args.start_page}_{args.end_page}.csv"
-        
-        # Define column order (body LAST to avoid truncation issues in Excel previews)
-        columns = [
-            'article_id', 'date', 'title', 'author', 'categories', 'tags', 
-            'url', 'scraped_at', 'source', 'body_char_count', 'body'
-        ]
-        
-        with open(fragment_csv, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            writer.writerows(fragment_rows)
-        
-        print(f"\n✅ Worker {args.worker_id} fragment saved: {fragment_csv.name}")
-        print(f"   Articles scraped: {len(fragment_rows)}")
-    
-    print(f"\n{'='*70}")
-    print(f"[Worker {args.worker_id}] FINISHED")
-    print(f"{'='*70}")
-    print(f"Pages processed : {args.end_page - args.start_page + 1}")
-    print(f"Articles found  : {total_articles_found}")
-    print(f"Articles saved  : {total_scraped}")
-    print(f"Fragment CSV    : {fragment_csv if fragment_rows else 'None'}")
-    print(f"TXT files       : {ARTICLES_DIR.relative_to(OUTPUT_DIR)}/")
-    print(f"{'='*70}\n")
+            fetcher.close()
+            print(f"  🌐 {fetcher.summary()}")
+            print(f"  🚫 {block_stats.summary()}")
+            print(f"  ⏱️ {WAIT_STATS.summary()}")
+            print(f"  📈 {METRICS.summary()}")
+            writer.checkpoint(next_seq=seq + stats['scraped'])
+
+    return stats
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+One Chromium per run: a sync Playwright browser/context/page pool.
+
+Usage:
+    pool = BrowserPool(p, launch_options, context_options,
+                       setup_context=lambda ctx: install_resource_blocking(ctx, policy),
+                       setup_page=lambda page: stealth(page))
+    page = pool.page()          # call once per navigation
+    ...
+    pool.close()
+    print(pool.summary())
+
+The browser is launched lazily and kept for the whole run, so clearance cookies
+set by a Cloudflare challenge carry over from one listing to the next. Pages
+are reused until `max_navigations`, then closed and replaced in the same
+context; after `max_pages_per_context` replacements the context itself is
+recycled, carrying its cookies/localStorage over via storage_state(). Every
+page() call health-checks the browser and page and relaunches/reopens on
+failure instead of letting the caller crash mid-run.
+"""
+
+
+class BrowserPool:
+    def __init__(self, playwright, launch_options=None, context_options=None, setup_context=None,
+                 setup_page=None, max_navigations=40, max_pages_per_context=5):
+        self.playwright = playwright
+        self.launch_options = dict(launch_options or {})
+        self.context_options = dict(context_options or {})
+        self.setup_context = setup_context
+        self.setup_page = setup_page
+        self.max_navigations = max_navigations
+        self.max_pages_per_context = max_pages_per_context
+        self.browser = None
+        self.context = None
+        self._page = None
+        self._navigations = 0
+        self._context_pages = 0
+        self._storage_state = None
+        self.stats = {'launches': 0, 'contexts': 0, 'pages': 0, 'navigations': 0, 'unhealthy': 0}
+
+    # ---- health ----
+
+    def _browser_ok(self):
+        return self.browser is not None and self.browser.is_connected()
+
+    def _page_ok(self):
+        if self._page is None or self._page.is_closed():
+            return False
+        try:
+            return self._page.evaluate("1") == 1
+        except Exception:
+            return False
+
+    # ---- lifecycle ----
+
+    def _launch(self):
+        self._drop_browser()
+        self.browser = self.playwright.chromium.launch(**self.launch_options)
+        self.stats['launches'] += 1
+
+    def _new_context(self):
+        if self.context is not None:
+            try:
+                self._storage_state = self.context.storage_state()
+            except Exception:
+                pass  # keep the last good snapshot
+            self._close_quietly(self.context)
+        options = dict(self.context_options)
+        if self._storage_state is not None:
+            options['storage_state'] = self._storage_state
+        self.context = self.browser.new_context(**options)
+        if self.setup_context is not None:
+            self.setup_context(self.context)
+        self._context_pages = 0
+        self.stats['contexts'] += 1
+
+    def _new_page(self):
+        if self._page is not None:
+            self._close_quietly(self._page)
+        if self.context is None or self._context_pages >= self.max_pages_per_context:
+            self._new_context()
+        self._page = self.context.new_page()
+        if self.setup_page is not None:
+            self.setup_page(self._page)
+        self._navigations = 0
+        self._context_pages += 1
+        self.stats['pages'] += 1
+
+    def page(self):
+        """Healthy page for the next navigation; recycles/relaunches as needed"""
+        if not self._browser_ok():
+            if self.browser is not None:
+                self.stats['unhealthy'] += 1
+            self._launch()
+        if self._page is not None and not self._page_ok():
+            self.stats['unhealthy'] += 1
+            self._page = None
+        if self._page is None or self._navigations >= self.max_navigations:
+            self._new_page()
+        self._navigations += 1
+        self.stats['navigations'] += 1
+        return self._page
+
+    @staticmethod
+    def _close_quietly(target):
+        try:
+            target.close()
+        except Exception:
+            pass
+
+    def _drop_browser(self):
+        if self.browser is not None:
+            self._close_quietly(self.browser)
+        self.browser = None
+        self.context = None
+        self._page = None
+
+    def close(self):
+        self._drop_browser()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self):
+        s = self.stats
+        return (f"Browser pool: {s['launches']} launch(es), {s['contexts']} context(s), "
+                f"{s['pages']} page(s) for {s['navigations']} navigations ({s['unhealthy']} unhealthy)")
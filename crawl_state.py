@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Incremental crawl state shared by concurrent workers (SQLite, WAL mode).
+
+One row per canonical URL: url, url_hash, status, last_fetched, article_id.
+Keys are url_frontier.canonical_url(), so http/https and trailing-slash
+spellings that the frontier treats as one URL are one row here too (files
+keyed by the older normalize_url() are re-keyed once on open).
+Lookups are primary-key hits, so startup no longer scans the articles/ folder;
+workers on the same machine share the file safely (WAL + busy timeout).
+
+Statuses: 'claimed' (a worker is on it), 'done', 'failed'.
+"""
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+from url_frontier import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_state (
+    url          TEXT PRIMARY KEY,
+    url_hash     TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    last_fetched REAL,
+    article_id   TEXT,
+    worker       TEXT,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_state_status ON crawl_state(status);
+"""
+SCHEMA_VERSION = 1  # 1: keys are canonical_url()
+
+
+def url_hash(url):
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path, claim_timeout=30 * 60):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.claim_timeout = claim_timeout
+        self.conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._rekey()
+
+    def _rekey(self):
+        """Move rows keyed by normalize_url() to canonical_url(); a 'done' spelling wins a collision"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                rows = self.conn.execute("SELECT url, status, article_id FROM crawl_state").fetchall()
+                for old, status, article_id in rows:
+                    new = canonical_url(old)
+                    if new == old:
+                        continue
+                    cur = self.conn.execute("UPDATE OR IGNORE crawl_state SET url = ?, url_hash = ? WHERE url = ?",
+                                            (new, url_hash(new), old))
+                    if cur.rowcount == 0:  # both spellings were stored
+                        if status == 'done':
+                            self.conn.execute(
+                                "UPDATE crawl_state SET status = 'done', article_id = COALESCE(article_id, ?) "
+                                "WHERE url = ?", (article_id, new))
+                        self.conn.execute("DELETE FROM crawl_state WHERE url = ?", (old,))
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def status(self, url):
+        row = self.conn.execute(
+            "SELECT status FROM crawl_state WHERE url = ?", (canonical_url(url),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url):
+        return self.status(url) == 'done'
+
+    def claim(self, url, worker=None):
+        """
+        Atomically take `url` for this worker. Succeeds for new URLs, failed ones,
+        and claims older than claim_timeout (dead worker); False otherwise.
+        """
+        now = time.time()
+        cur = self.conn.execute(
+            """
+            INSERT INTO crawl_state (url, url_hash, status, worker, updated_at)
+            VALUES (?, ?, 'claimed', ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                status = 'claimed', worker = excluded.worker, updated_at = excluded.updated_at
+            WHERE crawl_state.status = 'failed'
+               OR (crawl_state.status = 'claimed' AND crawl_state.updated_at < ?)
+            """,
+            (canonical_url(url), url_hash(url), str(worker), now, now - self.claim_timeout),
+        )
+        return cur.rowcount == 1
+
+    def mark(self, url, status, article_id=None, worker=None):
+        now = time.time()
+        self.conn.execute(
+            """
+            INSERT INTO crawl_state (url, url_hash, status, last_fetched, article_id, worker, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                status = excluded.status,
+                last_fetched = excluded.last_fetched,
+                article_id = COALESCE(excluded.article_id, crawl_state.article_id),
+                worker = excluded.worker,
+                updated_at = excluded.updated_at
+            """,
+            (canonical_url(url), url_hash(url), status, now, article_id, str(worker), now),
+        )
+
+    def mark_done(self, url, article_id, worker=None):
+        self.mark(url, 'done', article_id, worker)
+
+    def mark_failed(self, url, worker=None):
+        self.mark(url, 'failed', worker=worker)
+
+    def mark_done_many(self, items, worker=None):
+        """Mark [(url, article_id), ...] done in one transaction"""
+        self.conn.execute("BEGIN")
+        try:
+            for url, article_id in items:
+                self.mark_done(url, article_id, worker)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def release_claims(self, worker):
+        """Turn a restarted worker's leftover claims back into retryable 'failed' rows"""
+        cur = self.conn.execute(
+            "UPDATE crawl_state SET status = 'failed', updated_at = ? WHERE status = 'claimed' AND worker = ?",
+            (time.time(), str(worker)),
+        )
+        return cur.rowcount
+
+    def count(self, status='done'):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM crawl_state WHERE status = ?", (status,)
+        ).fetchone()[0]
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM crawl_state LIMIT 1").fetchone() is None
+
+    def import_urls(self, urls, status='done'):
+        """Bulk-load already-scraped URLs (one-off migration from the TXT corpus)"""
+        now = time.time()
+        rows = [(canonical_url(u), url_hash(u), status, now, now) for u in urls]
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO crawl_state (url, url_hash, status, last_fetched, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+One date parser for every scraper.
+
+Handles the formats the sites actually print, anywhere inside the text:
+    "January 15, 2024"  "Jan 15 2024"  "Sept. 3, 2025"  "15 January 2024"
+    "2024-01-15"        "01/15/2024"
+    "Published: 5 days ago"  "an hour ago"  "yesterday"  "today"
+
+Patterns and month tables are compiled once at import. Parsed strings are
+memoised (LRU); relative phrases are cached as an offset and resolved against
+the row's scraped_at, so "5 days ago" is only parsed once per run.
+
+    parse_date("February 11, 2026")                  -> date(2026, 2, 11)
+    parse_date("3 days ago", "2026-02-12T15:16:47")  -> date(2026, 2, 9)
+    parse_date("n/a", default=None)                  -> None
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+_MONTH = (r'(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|'
+          r'aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?')
+_DAY = r'(?P<day>\d{1,2})(?:st|nd|rd|th)?'
+_YEAR = r'(?P<year>\d{4})'
+
+# Absolute formats, tried in order; the first hit that is a real calendar date wins
+ABSOLUTE_PATTERNS = [
+    re.compile(rf'\b{_MONTH}\s+{_DAY},?\s+{_YEAR}\b', re.IGNORECASE),    # January 15, 2024
+    re.compile(rf'\b{_DAY}\s+{_MONTH},?\s+{_YEAR}\b', re.IGNORECASE),    # 15 January 2024
+    re.compile(r'\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})'),  # 2024-01-15[T...]
+    re.compile(r'\b(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})\b'),  # 01/15/2024
+]
+RELATIVE_PATTERN = re.compile(
+    r'\b(?P<count>\d+|an?|one)\s+(?P<unit>min(?:ute)?|h(?:ou)?r|day|week|month|year)s?\s+ago\b',
+    re.IGNORECASE,
+)
+RELATIVE_WORDS = re.compile(r'\b(?P<word>just now|today|yesterday)\b', re.IGNORECASE)
+
+UNIT_DAYS = {'min': 0, 'minute': 0, 'hr': 0, 'hour': 0,
+             'day': 1, 'week': 7, 'month': 30, 'year': 365}
+UNIT_HOURS = {'min': 1 / 60, 'minute': 1 / 60, 'hr': 1, 'hour': 1}
+WORD_DAYS = {'just now': 0, 'today': 0, 'yesterday': 1}
+
+_RAISE = object()
+
+
+def _month_number(token):
+    return int(token) if token.isdigit() else MONTHS[token[:3].lower()]
+
+
+@lru_cache(maxsize=4096)
+def _parse(text):
+    """text -> date (absolute), timedelta (relative, before scraped_at) or None"""
+    for pattern in ABSOLUTE_PATTERNS:
+        for m in pattern.finditer(text):
+            try:
+                return date(int(m['year']), _month_number(m['month']), int(m['day']))
+            except ValueError:
+                continue
+    if m := RELATIVE_PATTERN.search(text):
+        count = m['count'].lower()
+        count = int(count) if count.isdigit() else 1
+        unit = m['unit'].lower()
+        if unit in UNIT_HOURS:
+            return timedelta(hours=count * UNIT_HOURS[unit])
+        return timedelta(days=count * UNIT_DAYS[unit])
+    if m := RELATIVE_WORDS.search(text):
+        return timedelta(days=WORD_DAYS[m['word'].lower()])
+    return None
+
+
+def _reference(scraped_at):
+    if scraped_at is None:
+        return datetime.now()
+    if isinstance(scraped_at, datetime):
+        return scraped_at
+    if isinstance(scraped_at, date):
+        return datetime.combine(scraped_at, datetime.min.time())
+    return datetime.fromisoformat(str(scraped_at))
+
+
+def parse_date(text, scraped_at=None, default=_RAISE):
+    """
+    Parse a visible date string to a datetime.date. Relative phrases are resolved
+    against scraped_at (datetime, date or ISO string; now if omitted).
+    Raises ValueError if nothing matches, unless a default is given.
+    """
+    parsed = _parse(str(text).strip()) if text is not None else None
+    if isinstance(parsed, timedelta):
+        return (_reference(scraped_at) - parsed).date()
+    if parsed is not None:
+        return parsed
+    if default is _RAISE:
+        raise ValueError(f"Unrecognised date: {text!r}")
+    return default
+
+
+def parse_datetime(text, scraped_at=None, default=_RAISE):
+    """parse_date() as a midnight datetime, for callers comparing against datetimes"""
+    parsed = parse_date(text, scraped_at, default=None)
+    if parsed is None:
+        if default is _RAISE:
+            raise ValueError(f"Unrecognised date: {text!r}")
+        return default
+    return datetime.combine(parsed, datetime.min.time())
+
+
+def cache_info():
+    return _parse.cache_info()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Declarative per-site extraction specs, compiled once.
+
+A spec is a list of Fields: output name, CSS selector, what to take from the
+match and a chain of post-processing steps. Adding a source means adding a
+spec here; the scrapers just call extract():
+
+    SITE_SPECS['producer']['article'].extract(parse_html(html))
+    -> {'Title': ..., 'author': ..., 'date': ..., 'body': ..., ...}
+
+Each spec plans its queries once at import: which selectors (fallbacks
+included, duplicates merged) only ever need their first match, so extract()
+runs select_one() for those and select() for the rest, each selector at most
+once per document. Nested specs (take=<ExtractionSpec>, e.g. one {href, date}
+record per listing <article>) run the same plan inside each container.
+"""
+from urllib.parse import urljoin
+
+from date_parser import parse_date
+
+FIRST, LAST, ALL = 'first', 'last', 'all'
+
+
+class Field:
+    def __init__(self, name, css, take='text', pick=FIRST, sub=None, attr=None,
+                 post=(), default=None, fallback=None):
+        """
+        take: 'text' (stripped strings joined), 'raw' (text() then strip),
+              'spaced' (strings joined by a space), 'attr', 'exists',
+              'siblings' (classless <p> siblings up to the next <div>),
+              or a nested ExtractionSpec applied to each match.
+        pick: which matches to use (first/last/all); first/last yield a scalar.
+        sub:  selector run inside the picked node(s), always yielding a list.
+        post: callables applied in order to a found value (never to default).
+        fallback: another Field tried when this one finds nothing.
+        """
+        self.name = name
+        self.css = css
+        self.take = take
+        self.pick = pick
+        self.sub = sub
+        self.attr = attr
+        self.post = tuple(post)
+        self.default = default
+        self.fallback = fallback
+
+    @property
+    def nested(self):
+        return self.take if isinstance(self.take, ExtractionSpec) else None
+
+    def chain(self):
+        """This field and its fallbacks"""
+        field = self
+        while field is not None:
+            yield field
+            field = field.fallback
+
+    @property
+    def single(self):
+        """Only the first match is ever used"""
+        return self.pick == FIRST
+
+    def value(self, node):
+        take = self.take
+        if take == 'text':
+            return node.text(strip=True)
+        if take == 'raw':
+            return node.text().strip()
+        if take == 'spaced':
+            return node.text(' ', strip=True)
+        if take == 'attr':
+            return node.attr(self.attr)
+        if take == 'exists':
+            return True
+        if take == 'siblings':
+            parts = []
+            for sibling in node.next_siblings():
+                if sibling.tag == 'div':
+                    break
+                if sibling.tag == 'p' and not sibling.attr('class'):
+                    parts.append(sibling.text(strip=True))
+            return '\n\n'.join(parts)
+        return take.extract(node)  # nested ExtractionSpec
+
+    def resolve(self, found):
+        matches = found[self.css]
+        if not matches:
+            if self.fallback is not None:
+                return self.fallback.resolve(found)
+            if self.default is None and (self.pick == ALL or self.sub):
+                return []
+            return self.default
+        if self.pick == FIRST:
+            matches = matches[:1]
+        elif self.pick == LAST:
+            matches = matches[-1:]
+        if self.sub:
+            matches = [n for m in matches for n in m.select(self.sub)]
+        if self.pick == ALL or self.sub:
+            value = [self.value(n) for n in matches]
+        else:
+            value = self.value(matches[0])
+        for step in self.post:
+            value = step(value)
+        return value
+
+
+class Matches(dict):
+    """{css: [nodes]} under one node, each selector queried on first use"""
+    def __init__(self, node, single):
+        super().__init__()
+        self.node = node
+        self.single = single
+
+    def __missing__(self, css):
+        if css in self.single:
+            hit = self.node.select_one(css)
+            matches = [hit] if hit is not None else []
+        else:
+            matches = self.node.select(css)
+        self[css] = matches
+        return matches
+
+
+class ExtractionSpec:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = list(fields)
+        # Compiled once: selectors no field (or fallback) reads past the first match of -> select_one()
+        chained = [f for field in self.fields for f in field.chain()]
+        self.selectors = tuple(dict.fromkeys(f.css for f in chained))
+        self.single = frozenset(self.selectors) - {f.css for f in chained if not f.single}
+
+    def extract(self, doc):
+        return self.resolve(Matches(doc, self.single))
+
+    def resolve(self, found):
+        return {f.name: f.resolve(found) for f in self.fields}
+
+
+# ---- post-processing steps ----
+
+def pluck(key):
+    """[{key: value, ...}, ...] -> [value, ...]"""
+    return lambda records: [record[key] for record in records]
+
+
+def join(separator='|'):
+    return lambda values: separator.join(values)
+
+
+def skip(n):
+    return lambda values: values[n:]
+
+
+def split_part(marker, index, default=''):
+    """Piece `index` of value.split(marker), e.g. the text after 'What does it mean?'"""
+    def step(value):
+        parts = value.split(marker)
+        return parts[index] if len(parts) > abs(index) else default
+    return step
+
+
+def truncate_at(marker):
+    def step(value):
+        pos = value.find(marker)
+        return value[:pos] if pos != -1 else value
+    return step
+
+
+def after(marker):
+    return lambda value: value.split(marker)[-1].strip()
+
+
+def absolute(base):
+    return lambda urls: [urljoin(base, u.strip()) for u in urls if u and u.strip()]
+
+
+def to_date(value):
+    return parse_date(value, default=None)
+
+
+def to_dates(values):
+    return [d for d in map(to_date, values) if d is not None]
+
+
+def page_count(value):
+    """"Page 1 of 620" -> 620"""
+    try:
+        return int(value.split('of')[-1].strip().replace(',', ''))
+    except ValueError:
+        return None
+
+
+# ---- site specs ----
+
+BROWNFIELD_BASE = "https://www.brownfieldagnews.com/crops-markets/"
+
+PRODUCER_ARTICLE = ExtractionSpec('producer_article', [
+    Field('Title', 'h1.entry-title', default='N/A'),
+    Field('author', 'a.tw\\:align-top.tw\\:text-lg', default='N/A'),
+    Field('date_text', 'p.entry-details-date', take='raw', default=None),
+    Field('body', 'div.body-text', take='spaced', post=[truncate_at('Newsletter Sign Up')], default='N/A'),
+    Field('summary', 'h2.deck', default='N/A'),
+    Field('tag', 'p.entry-details-categories.tw\\:text-sm', default='N/A'),
+])
+
+SITE_SPECS = {
+    'brownfield': {
+        'listing': ExtractionSpec('brownfield_listing', [
+            Field('total_pages', 'span.pages', take='raw', post=[page_count]),
+            # one link per post: the first h2 anchor of each container
+            Field('urls', 'div.entry-content.cat-container', pick=ALL, take=ExtractionSpec('brownfield_item', [
+                Field('href', 'h2 a', take='attr', attr='href'),
+            ]), post=[pluck('href'), absolute(BROWNFIELD_BASE)]),
+            Field('dates', 'div.entry-content.cat-container time', take='raw', pick=ALL, post=[to_dates]),
+        ]),
+        'article': ExtractionSpec('brownfield_article', [
+            Field('article_date', 'time', take='raw', post=[to_date]),
+            Field('title', 'p.post_title'),
+            Field('author', 'span.entry-author-name'),
+            Field('categories', 'span.entry-categories', sub='a', post=[join('|')], default=''),
+            Field('tags', 'div.pull-right', pick=LAST, sub='a', post=[skip(1), join('|')], default=''),
+            Field('body', 'div.singleimg', take='siblings', default='',
+                  fallback=Field('body', 'div.entry-content', default='')),
+        ]),
+    },
+    'producer': {
+        'listing': ExtractionSpec('producer_listing', [
+            Field('container', 'div.archive-articles-list', take='exists', default=False),
+            Field('articles', 'div.archive-articles-list article', pick=ALL, take=ExtractionSpec('producer_item', [
+                Field('datetime', 'time.updated.dtstamp', take='attr', attr='datetime'),
+                Field('href', 'h2.entry-title a', take='attr', attr='href'),
+            ])),
+            Field('next', 'a.next', take='exists', default=False),
+        ]),
+        'article': PRODUCER_ARTICLE,
+    },
+    'mecardo': {
+        'listing': ExtractionSpec('mecardo_listing', [
+            Field('articles', 'article', pick=ALL, take=ExtractionSpec('mecardo_item', [
+                Field('href', 'a[href]', take='attr', attr='href'),
+                Field('date_text', 'span.elementor-post-date'),
+            ])),
+        ]),
+        'article': ExtractionSpec('mecardo_article', [
+            Field('date_text', 'span.elementor-post-info__item--type-date', take='raw'),
+            Field('title', 'h1.elementor-heading-title.elementor-size-default', take='raw'),
+            Field('author', 'span.elementor-post-info__item--type-author', take='raw', post=[after('By')],
+                  default='Unknown'),
+            Field('terms', 'a.elementor-post-info__terms-list-item', take='raw', pick=ALL),
+            Field('body', 'div.elementor-column.elementor-col-66.elementor-element-6aa3776', take='raw',
+                  post=[split_part('What does it mean?', 0)]),
+            Field('explanation', 'div.elementor-column.elementor-col-66.elementor-element-6aa3776', take='raw',
+                  post=[split_part('What does it mean?', 1)]),
+            Field('key points', 'div.elementor-element-8714261.elementor-widget-text-editor', take='raw',
+                  default=''),
+        ]),
+    },
+    'admisi': {
+        'listing': ExtractionSpec('admisi_listing', [
+            Field('links', 'div.col-sm-6', pick=ALL, take=ExtractionSpec('admisi_item', [
+                Field('href', 'a[href]', take='attr', attr='href'),
+            ])),
+        ]),
+        # admisi.py validates articles in the browser; same checks for offline use (bench_sources.py)
+        'article': ExtractionSpec('admisi_article', [
+            Field('date_text', "time, span.date, .article-date, div.meta time, [itemprop='datePublished']", take='raw'),
+            Field('body', ".article-content, .content, div[itemprop='articleBody']", take='raw', default=''),
+            Field('has_video', "video, iframe[src*='youtube'], iframe[src*='vimeo'], .video-player", take='exists',
+                  default=False),
+        ]),
+    },
+}
+# testrss scrapes the same Western Producer article template
+SITE_SPECS['producer_rss'] = {'article': PRODUCER_ARTICLE}
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Async RSS poller: every feed fetched concurrently with conditional GET.
+
+Usage:
+    poller = FeedPoller(RSS_FEEDS, state_path="feed_state.json")
+    results = asyncio.run(poller.poll_once())          # {name: [new entries]}
+    ...                                                # store them, then:
+    poller.commit(name)                                # acknowledge what was stored
+    asyncio.run(poller.run_forever(on_entries, interval=600, intervals={'Canola': 300}))
+
+Each feed remembers its ETag / Last-Modified and the ids of entries already
+handled (feed_state.json, written atomically). Unchanged feeds answer 304 and
+cost one small request; changed feeds only yield entries not seen before, so
+run_forever() turns the feeds into a stream of new articles with per-feed
+polling intervals instead of a batch re-download.
+
+Nothing is marked seen until the caller commit()s it: a poll only holds the
+new ids and validators as pending. Entries that were never committed (the
+store failed, the caller stopped early) come back on the next poll, because
+the feed's validators only advance once all of its new entries are committed.
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+import feedparser
+
+try:
+    import httpx
+    USE_HTTPX = True
+except ImportError:
+    import requests
+    USE_HTTPX = False
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+SEEN_PER_FEED = 500  # entry ids remembered per feed (feeds carry ~10-50 items)
+
+
+def entry_id(entry):
+    return entry.get('id') or entry.get('link')
+
+
+class FeedPoller:
+    def __init__(self, feeds, state_path="feed_state.json", user_agent=DEFAULT_USER_AGENT, timeout=30):
+        """feeds: {name: url}; state_path=None polls without remembering anything"""
+        self.feeds = dict(feeds)
+        self.state_path = Path(state_path) if state_path is not None else None
+        self.headers = {"User-Agent": user_agent,
+                        "Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8"}
+        self.timeout = timeout
+        self.state = self._load()
+        self.pending = {}  # name -> {'ids': [...], 'etag': ..., 'last_modified': ...} awaiting commit()
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'new_entries': 0}
+
+    # ---- persisted per-feed state ----
+
+    def _load(self):
+        if self.state_path is None:
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if self.state_path is None:
+            return
+        tmp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+    # ---- fetching ----
+
+    async def _get(self, client, url, headers):
+        if USE_HTTPX:
+            resp = await client.get(url, headers=headers)
+        else:
+            resp = await asyncio.to_thread(requests.get, url, headers=headers, timeout=self.timeout)
+        return resp.status_code, resp.text, resp.headers
+
+    async def poll_feed(self, client, name):
+        """New entries of one feed ([] when unchanged or on error)"""
+        url = self.feeds[name]
+        feed_state = self.state.setdefault(name, {})
+        headers = dict(self.headers)
+        if feed_state.get('etag'):
+            headers["If-None-Match"] = feed_state['etag']
+        if feed_state.get('last_modified'):
+            headers["If-Modified-Since"] = feed_state['last_modified']
+        try:
+            status, text, response_headers = await self._get(client, url, headers)
+        except Exception as e:
+            print(f"  ⚠️ {name}: feed fetch failed ({type(e).__name__})")
+            self.stats['failed'] += 1
+            return []
+        feed_state['checked_at'] = time.time()
+        if status == 304:
+            self.stats['not_modified'] += 1
+            return []
+        if status != 200:
+            print(f"  ⚠️ {name}: HTTP {status}")
+            self.stats['failed'] += 1
+            return []
+
+        self.stats['fetched'] += 1
+        parsed = feedparser.parse(text)
+        seen_set = set(feed_state.get('seen', []))
+        new = [e for e in parsed.entries if entry_id(e) and entry_id(e) not in seen_set]
+        self.pending[name] = {'ids': [entry_id(e) for e in new],
+                              'etag': response_headers.get('etag'),
+                              'last_modified': response_headers.get('last-modified')}
+        if not new:
+            self.commit(name, save=False)  # nothing to hand over: the validators can advance now
+        self.stats['new_entries'] += len(new)
+        return new
+
+    def commit(self, name, ids=None, save=True):
+        """
+        Mark entry ids of `name` (default: all from its last poll) as handled.
+        Once every pending id is committed, the feed's ETag / Last-Modified advance too.
+        """
+        pending = self.pending.get(name)
+        if pending is None:
+            return
+        ids = pending['ids'] if ids is None else [i for i in ids if i in pending['ids']]
+        feed_state = self.state.setdefault(name, {})
+        seen = feed_state.get('seen', [])
+        seen_set = set(seen)
+        feed_state['seen'] = (seen + [i for i in ids if i not in seen_set])[-SEEN_PER_FEED:]
+        pending['ids'] = [i for i in pending['ids'] if i not in set(ids)]
+        if not pending['ids']:
+            feed_state['etag'] = pending['etag']
+            feed_state['last_modified'] = pending['last_modified']
+            del self.pending[name]
+        if save:
+            self.save()
+
+    def _client(self):
+        if USE_HTTPX:
+            return httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        return None
+
+    async def poll_once(self, names=None):
+        """Poll `names` (default: all feeds) concurrently -> {name: [new entries]}; commit() what you keep"""
+        names = list(names or self.feeds)
+        client = self._client()
+        try:
+            results = await asyncio.gather(*(self.poll_feed(client, name) for name in names))
+        finally:
+            if client is not None:
+                await client.aclose()
+        self.save()
+        return dict(zip(names, results))
+
+    async def run_forever(self, on_entries, interval=600, intervals=None, max_rounds=None):
+        """
+        Poll each feed every `intervals.get(name, interval)` seconds, forever (or
+        `max_rounds` polling rounds). on_entries(name, entries) gets only new entries;
+        they are committed once it returns, and offered again if it raises.
+        """
+        intervals = intervals or {}
+        next_due = {name: 0.0 for name in self.feeds}
+        rounds = 0
+        while max_rounds is None or rounds < max_rounds:
+            now = time.monotonic()
+            due = [name for name, at in next_due.items() if at <= now]
+            if due:
+                for name, entries in (await self.poll_once(due)).items():
+                    if not entries:
+                        continue
+                    try:
+                        on_entries(name, entries)
+                    except Exception as e:
+                        print(f"  ⚠️ {name}: storing {len(entries)} entries failed ({type(e).__name__}: {e}), retrying next poll")
+                        continue
+                    self.commit(name)
+                for name in due:
+                    next_due[name] = time.monotonic() + intervals.get(name, interval)
+                rounds += 1
+                if max_rounds is not None and rounds >= max_rounds:
+                    break
+            await asyncio.sleep(max(0.0, min(next_due.values()) - time.monotonic()))
+
+    def summary(self):
+        s = self.stats
+        return (f"Feeds: {s['fetched']} fetched, {s['not_modified']} unchanged (304), "
+                f"{s['failed']} failed, {s['new_entries']} new entries")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+HTTP-first page fetcher with Playwright fallback.
+
+Article pages are static WordPress HTML, so a pooled keep-alive HTTP client
+(HTTP/2 when `h2` is installed, gzip/brotli) gets the same markup the parser
+needs without a Chromium render. The browser is only used when the response is
+a challenge page, an error, or lacks the selectors the caller expects.
+
+With a ResponseCache attached, both paths read/write the on-disk cache; in
+offline mode nothing leaves the machine and the browser is never used.
+
+With a RateController attached, every network request (HTTP or browser
+fallback) waits for its host's slot and reports status/latency back, so the
+pace follows what the site tolerates instead of fixed sleeps.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from html_parser import parse_html
+from metrics import METRICS
+
+try:
+    import httpx
+    USE_HTTPX = True
+except ImportError:
+    import requests
+    from requests.adapters import HTTPAdapter
+    USE_HTTPX = False
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+try:
+    import brotli  # noqa: F401  (lets httpx/urllib3 decode Content-Encoding: br)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+CHALLENGE_MARKERS = [
+    "<title>Just a moment...</title>",
+    "cf-browser-verification",
+    "challenge-running",
+    "challenges.cloudflare.com",
+    "cf-turnstile",
+]
+
+
+def is_challenge_page(html):
+    """True for Cloudflare interstitials ("Just a moment...", turnstile, etc.)"""
+    head = html[:20000]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def has_selectors(html, selectors):
+    """True if ANY of `selectors` (CSS) matches; empty list always passes"""
+    if not selectors:
+        return True
+    # Memoised: the caller's extraction reuses this parse
+    doc = parse_html(html)
+    return any(doc.select_one(sel) is not None for sel in selectors)
+
+
+class Fetcher:
+    """
+    fetch(url, selectors) -> html or None
+
+    `fallback(url)` is called when the HTTP path is unusable and must return the
+    rendered HTML (e.g. `page.content()` after safe_goto) or None on failure.
+
+    `rate` (RateController) paces requests; with pace=False the caller does the
+    waiting (e.g. an async host slot) and the fetcher only reports outcomes.
+    """
+
+    def __init__(self, fallback=None, user_agent=DEFAULT_USER_AGENT, timeout=30, pool_size=10, use_http=True, cache=None,
+                 rate=None, pace=True):
+        self.fallback = fallback
+        self.timeout = timeout
+        self.use_http = use_http
+        self.cache = cache
+        self.rate = rate
+        self.pace = pace
+        self.stats = {'http': 0, 'browser': 0, 'failed': 0, 'challenge': 0, 'missing_selectors': 0}
+        headers = {
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+        if USE_HTTPX:
+            self.client = httpx.Client(
+                http2=HAS_HTTP2,
+                headers=headers,
+                timeout=timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        else:
+            self.client = requests.Session()
+            self.client.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.client.mount("https://", adapter)
+            self.client.mount("http://", adapter)
+        if rate is not None and rate.robots_fetch is None and not (cache is not None and cache.offline):
+            rate.robots_fetch = self._request
+
+    def _request(self, url, headers=None):
+        if USE_HTTPX:
+            resp = self.client.get(url, headers=headers)
+        else:
+            resp = self.client.get(url, headers=headers, timeout=self.timeout)
+        return resp.status_code, resp.text, dict(resp.headers)
+
+    def get(self, url, headers=None):
+        """GET through the pooled client -> (status_code, text, response_headers)"""
+        if self.rate is not None and self.pace:
+            self.rate.wait(url)
+        start = time.monotonic()
+        try:
+            status, text, response_headers = self._request(url, headers)
+        except Exception as e:
+            METRICS.inc("fetch_errors_total", kind="http", error=type(e).__name__)
+            if self.rate is not None:
+                self.rate.record(url, None, time.monotonic() - start)
+            raise
+        elapsed = time.monotonic() - start
+        METRICS.observe("fetch_seconds", elapsed, kind="http")
+        METRICS.observe("response_bytes", len(text), kind="http")
+        METRICS.inc("responses_total", status=status)
+        if self.rate is not None:
+            self.rate.record(url, status, elapsed, response_headers)
+        return status, text, response_headers
+
+    def render(self, url):
+        """Browser fallback, paced and reported like an HTTP request"""
+        if self.rate is not None and self.pace:
+            self.rate.wait(url)
+        start = time.monotonic()
+        html = self.fallback(url)
+        elapsed = time.monotonic() - start
+        METRICS.observe("fetch_seconds", elapsed, kind="browser")
+        if html is not None:
+            METRICS.observe("response_bytes", len(html), kind="browser")
+        if self.rate is not None:
+            self.rate.record(url, 200 if html is not None else None, elapsed)
+        return html
+
+    def try_http(self, url, selectors=()):
+        """Plain HTTP attempt (or cache hit); returns html only if it is usable as-is"""
+        offline = self.cache is not None and self.cache.offline
+        if not self.use_http and not offline:
+            if self.cache is not None:
+                return self.cache.lookup(url)
+            return None
+        try:
+            if self.cache is not None:
+                usable = lambda text: not is_challenge_page(text) and has_selectors(text, selectors)
+                status, html = self.cache.fetch(url, self.get, accept=usable)
+            else:
+                status, html, _ = self.get(url)
+        except Exception as e:
+            print(f"  ⚠️ HTTP fetch failed ({type(e).__name__}), falling back to browser")
+            return None
+        if status != 200:
+            return None
+        if is_challenge_page(html):
+            self.stats['challenge'] += 1
+            METRICS.inc("http_rejected_total", reason="challenge")
+            return None
+        if not has_selectors(html, selectors):
+            self.stats['missing_selectors'] += 1
+            METRICS.inc("http_rejected_total", reason="missing_selectors")
+            return None
+        self.stats['http'] += 1
+        METRICS.inc("pages_total", via="http")
+        return html
+
+    def fetch(self, url, selectors=()):
+        with METRICS.span("fetch", url=url):
+            html = self.try_http(url, selectors)
+            if html is not None:
+                return html
+            return self.fetch_fallback(url)
+
+    def fetch_fallback(self, url):
+        """Browser render (stored in the cache) once the HTTP path failed; None if that fails too"""
+        if self.fallback is not None and not (self.cache is not None and self.cache.offline):
+            html = self.render(url)
+            if html is not None:
+                self.stats['browser'] += 1
+                METRICS.inc("pages_total", via="browser")
+                if self.cache is not None:
+                    self.cache.store(url, html)
+                return html
+        self.stats['failed'] += 1
+        METRICS.inc("pages_total", via="failed")
+        return None
+
+    def fetch_many(self, urls, selectors=(), workers=4):
+        """
+        fetch() for a batch: HTTP attempts run on `workers` threads (the rate
+        controller still paces each host), browser fallbacks one at a time on
+        the calling thread. Returns html or None per URL, in order.
+        """
+        urls = list(urls)
+
+        def attempt(url):
+            with METRICS.span("fetch", url=url):
+                return self.try_http(url, selectors)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages = list(pool.map(attempt, urls))
+        return [html if html is not None else self.fetch_fallback(url) for url, html in zip(urls, pages)]
+
+    def summary(self):
+        s = self.stats
+        text = (f"HTTP: {s['http']} | browser fallback: {s['browser']} | failed: {s['failed']} "
+                f"(challenges: {s['challenge']}, missing selectors: {s['missing_selectors']})")
+        if self.cache is not None:
+            text += f" | {self.cache.summary()}"
+        if self.rate is not None:
+            text += f" | {self.rate.summary()}"
+        return text
+
+    def close(self):
+        self.client.close()
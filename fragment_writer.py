@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Append-mode fragment CSV writer with durable checkpoints.
+
+Rows are buffered in small batches and appended as they arrive, so memory stays
+flat however long the worker runs. checkpoint() fsyncs the CSV and atomically
+records its byte size plus caller progress (last page, next article seq) in
+<fragment>.checkpoint.json. On restart the CSV is truncated back to the last
+checkpoint (dropping any torn tail) and the progress dict is handed back.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+
+from metrics import METRICS
+
+
+class FragmentWriter:
+    def __init__(self, path, columns, batch_size=25, checkpoint_every=200, on_durable=None):
+        """
+        on_durable(rows) is called after each fsync with the rows that just became
+        durable, e.g. to mark their URLs done in the crawl state.
+        """
+        self.path = Path(path)
+        self.checkpoint_path = self.path.with_suffix('.checkpoint.json')
+        self.columns = columns
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.on_durable = on_durable
+        self.pending = []    # not yet written
+        self.unsynced = []   # written, not yet fsynced
+        self.rows_this_run = 0
+        self.progress = {}
+        self.rows_durable = 0
+
+        if self.checkpoint_path.exists():
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self.progress = saved.get('progress', {})
+            self.rows_durable = saved.get('rows', 0)
+            if self.path.exists() and self.path.stat().st_size > saved['size']:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(saved['size'])
+
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+        self.file = open(self.path, 'a', newline='', encoding='utf-8-sig')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        if is_new:
+            self.writer.writeheader()
+
+    @property
+    def resumed(self):
+        return bool(self.progress)
+
+    def add(self, row):
+        self.pending.append(row)
+        self.rows_this_run += 1
+        METRICS.inc('rows_written_total')
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        if len(self.unsynced) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def flush(self):
+        """Append buffered rows to the OS (no fsync)"""
+        if self.pending:
+            self.writer.writerows(self.pending)
+            self.file.flush()
+            self.unsynced.extend(self.pending)
+            self.pending = []
+
+    def checkpoint(self, **progress):
+        """Make everything so far durable and record `progress` alongside it"""
+        self.flush()
+        with METRICS.timer('fsync_seconds'):
+            os.fsync(self.file.fileno())
+        self.progress.update(progress)
+        self.rows_durable += len(self.unsynced)
+        saved = {
+            'size': os.fstat(self.file.fileno()).st_size,
+            'rows': self.rows_durable,
+            'progress': self.progress,
+        }
+        tmp = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+        rows, self.unsynced = self.unsynced, []
+        if self.on_durable and rows:
+            self.on_durable(rows)
+
+    def close(self, **progress):
+        self.checkpoint(**progress)
+        self.file.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Pluggable HTML parsing: one parse per document, CSS selectors for extraction.
+
+Backends, fastest installed first (SCRAPER_HTML_PARSER=<name> forces one):
+    selectolax   lexbor, C              pip install selectolax
+    lxml         libxml2 tree via bs4   pip install lxml
+    html.parser  pure Python, always available
+
+Every backend returns the same small Node API, so extractors never touch
+BeautifulSoup or selectolax directly:
+
+    doc = parse_html(html)
+    doc.select_one("p.post_title").text(strip=True)
+    [a.attr("href") for a in doc.select("div.entry-content.cat-container h2 a")]
+
+parse_html() memoises the last few documents, so the fetcher's selector check
+and the caller's extraction share a single parse of the same HTML string.
+"""
+import os
+import time
+from functools import lru_cache
+
+from bs4 import BeautifulSoup, Tag
+
+from metrics import METRICS
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    import lxml  # noqa: F401  (bs4 builder)
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+PARSER_ENV = "SCRAPER_HTML_PARSER"
+BACKENDS = [name for name, ok in (('selectolax', HAS_SELECTOLAX), ('lxml', HAS_LXML), ('html.parser', True)) if ok]
+DEFAULT_BACKEND = os.environ.get(PARSER_ENV) or BACKENDS[0]
+MEMO_SIZE = 8
+
+
+class SoupNode:
+    """BeautifulSoup element (lxml or html.parser tree)"""
+    __slots__ = ('_tag',)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def tag(self):
+        return self._tag.name
+
+    def select(self, css):
+        return [SoupNode(t) for t in self._tag.select(css)]
+
+    def select_one(self, css):
+        found = self._tag.select_one(css)
+        return SoupNode(found) if found is not None else None
+
+    def text(self, separator='', strip=False):
+        return self._tag.get_text(separator=separator, strip=strip)
+
+    def attr(self, name, default=None):
+        value = self._tag.get(name, default)
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def has_attr(self, name):
+        return self._tag.has_attr(name)
+
+    def next_siblings(self):
+        """Following sibling elements (text nodes skipped)"""
+        for sibling in self._tag.next_siblings:
+            if isinstance(sibling, Tag):
+                yield SoupNode(sibling)
+
+    def remove(self, css):
+        for t in self._tag.select(css):
+            t.decompose()
+
+    @property
+    def html(self):
+        return str(self._tag)
+
+
+class LexborNode:
+    """selectolax (lexbor) node"""
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def tag(self):
+        return self._node.tag
+
+    def select(self, css):
+        return [LexborNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css):
+        found = self._node.css_first(css)
+        return LexborNode(found) if found is not None else None
+
+    def text(self, separator='', strip=False):
+        if not separator and not strip:
+            return self._node.text()
+        # Match bs4: strip each string and drop the empty ones before joining
+        strings = (n.text_content for n in self._node.traverse(include_text=True) if n.tag == '-text')
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+    def attr(self, name, default=None):
+        return self._node.attributes.get(name, default)
+
+    def has_attr(self, name):
+        return name in self._node.attributes
+
+    def next_siblings(self):
+        """Following sibling elements (text and comment nodes skipped)"""
+        node = self._node.next
+        while node is not None:
+            if not node.tag.startswith('-'):
+                yield LexborNode(node)
+            node = node.next
+
+    def remove(self, css):
+        for n in self._node.css(css):
+            n.decompose()
+
+    @property
+    def html(self):
+        return self._node.html
+
+
+def _parse(html, backend):
+    start = time.perf_counter()
+    if backend == 'selectolax':
+        doc = LexborNode(LexborHTMLParser(html).root)
+    else:
+        doc = SoupNode(BeautifulSoup(html, backend))
+    METRICS.observe('parse_seconds', time.perf_counter() - start, backend=backend)
+    return doc
+
+
+_parse_memo = lru_cache(maxsize=MEMO_SIZE)(_parse)
+
+
+def parse_html(html, backend=None, memo=True):
+    """
+    Parse once and return the root Node. Memoised documents are shared, so
+    pass memo=False before mutating the tree (remove()).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"HTML backend {backend!r} unavailable (have: {', '.join(BACKENDS)})")
+    return _parse_memo(html or '', backend) if memo else _parse(html or '', backend)
+
+
+def select_text(doc, css, default=None, separator='', strip=True):
+    """Text of the first match, or default"""
+    node = doc.select_one(css)
+    return node.text(separator, strip) if node is not None else default
+
+
+def select_attr(doc, css, name, default=None):
+    """Attribute of the first match, or default"""
+    node = doc.select_one(css)
+    return node.attr(name, default) if node is not None else default
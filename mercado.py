@@ -1,188 +1,178 @@
 import pandas as pd  # Added missing import
-from bs4 import BeautifulSoup
 from datetime import datetime
 from playwright.sync_api import sync_playwright
-import time
-
-def parse_date(s):
-    month = {
-        "January": "01", "Jan": "01",
-        "February": "02", "Feb": "02", 
-        "March": "03", "Mar": "03",
-        "April": "04", "Apr": "04",
-        "May": "05",
-        "June": "06", "Jun": "06",
-        "July": "07", "Jul": "07",
-        "August": "08", "Aug": "08",
-        "September": "09", "Sep": "09", "Sept": "09",
-        "October": "10", "Oct": "10",
-        "November": "11", "Nov": "11",
-        "December": "12", "Dec": "12"
-    }
-    l = s.split()  
-    year = l[2]                   
-    m = month[l[0]]               
-    day = l[1].rstrip(',')     
-    
-    if int(day) < 10:
-        day = '0' + day
-    
-    date_str = f"{year}-{m}-{day}"
-    return datetime.strptime(date_str, "%Y-%m-%d").date()
+from fetcher import Fetcher
+from response_cache import ResponseCache
+from resource_blocking import SITE_POLICIES, install_resource_blocking
+from article_store import write_articles
+from date_parser import parse_date
+from html_parser import parse_html
+from extraction import SITE_SPECS
+from rate_control import RateController, urllib_fetch
+from navigation import WaitStats, goto_ready
+from url_frontier import URLFrontier
+from wp_discovery import WPDiscovery
+from page_planner import PagePlanner
+from metrics import METRICS
 
 # Configuration
 BASE_URL = "https://mecardo.com.au/category/grains-oilseeds".strip()  # Fixed trailing spaces
+SITE_ROOT = "https://mecardo.com.au"
 CUT_OFF = datetime(2016, 1, 1).date()
+END_DATE = None  # newest article date to keep (None: up to today); CUT_OFF..END_DATE is the window
 MAX_PAGES = 40  # Safety limit
 TIMEOUT = 10000  # 10 seconds
+USE_HTTP_FETCH = True  # Try plain HTTP first, render in Chromium only when needed
+ARTICLE_SELECTORS = ["h1.elementor-heading-title", "span.elementor-post-info__item--type-date"]
+LISTING_SELECTORS = ["article"]
+LISTING_WORKERS = 4  # listing pages fetched in parallel over HTTP
+LISTING_SPEC = SITE_SPECS["mecardo"]["listing"]
+ARTICLE_SPEC = SITE_SPECS["mecardo"]["article"]
+CACHE_DIR = "http_cache"  # SCRAPER_OFFLINE=1 replays everything from here
+WAIT_STATS = WaitStats()
+RATE = RateController(initial_rate=0.5, robots_fetch=urllib_fetch)  # adaptive per-host pacing
+
+def browser_fetch(page, url):
+    """Fallback for the HTTP fetcher: full render in the existing tab"""
+    selectors = LISTING_SELECTORS if url.startswith(BASE_URL) else ARTICLE_SELECTORS
+    try:
+        goto_ready(page, url, selectors, timeout=TIMEOUT, stats=WAIT_STATS)
+        return page.content()
+    except Exception as e:
+        print(f"{url} page load failed: {e}")
+        return None
 
-def find_next_button(page):
-    """Robust next-button detection with multiple fallback selectors"""
-    selectors = [
-        'a.next.page-numbers',          # WordPress standard
-        'a.pagination-next',            # Common class
-        '.elementor-pagination-next a', # Elementor-specific
-        'li.next a',                    # List-based pagination
-        'a:has-text("Next")',           # Text-based fallback
-        'a:has-text("›")'               # Arrow symbol fallback
-    ]
+def listing_url(page_num):
+    return BASE_URL if page_num == 1 else f"{BASE_URL}/page/{page_num}/"
+
+def listing_dates(fetcher, page_num):
+    """Article dates on one listing page, for the planner (None if it won't load)"""
+    html = fetcher.fetch(listing_url(page_num), LISTING_SELECTORS)
+    if html is None:
+        return None
+    return [parse_date(a["date_text"], default=None) for a in LISTING_SPEC.extract(parse_html(html))["articles"]]
+
+def crawl_listing_pages(fetcher):
+    """Fallback discovery: fetch the listing pages covering CUT_OFF..END_DATE by URL; None if none loads"""
+    # Probe a few pages to find the window's first and last page instead of walking from page 1
+    planner = PagePlanner(lambda n: listing_dates(fetcher, n), max_page=MAX_PAGES)
+    planned = planner.plan(CUT_OFF, END_DATE)
+    print(planner.summary())
+    if planned is None:
+        return URLFrontier()
+    first_page, last_page = planned
+    
+    # /page/N/ URLs need no click-through state: fetch them concurrently (probed ones come from the cache)
+    page_nums = range(first_page, last_page + 1)
+    print(f"Fetching listing pages {first_page}-{last_page}")
+    pages = fetcher.fetch_many([listing_url(n) for n in page_nums], LISTING_SELECTORS, LISTING_WORKERS)
     
-    for selector in selectors:
+    article_links = URLFrontier()
+    loaded = 0
+    for page_num, html in zip(page_nums, pages):
+        if html is None:
+            # one bad page only costs its own articles
+            print(f"Failed to load page {page_num}, skipping")
+            continue
+        loaded += 1
+        print(f"Processing page {page_num}...")
+        
         try:
-            btn = page.locator(selector).first
-            if btn.is_visible() and btn.is_enabled():
-                return btn
-        except:
+            articles = LISTING_SPEC.extract(parse_html(html))["articles"]
+        except Exception as e:
+            print(f"Error on page {page_num}: {e}")
+            continue
+        if not articles:
+            print(f"No articles found on page {page_num}")
             continue
-    return None
+        
+        for article in articles:
+            try:
+                # Extract link
+                href = article["href"]
+                if not href:
+                    continue
+                
+                # Extract and parse date
+                date_str = article["date_text"]
+                if not date_str:
+                    continue
+                article_date = parse_date(date_str)
+                
+                # Outside CUT_OFF..END_DATE (the edge pages straddle it)
+                if article_date < CUT_OFF or (END_DATE is not None and article_date > END_DATE):
+                    continue
+                
+                if article_links.add(href, date=article_date):
+                    print(f"  Added: {href} (Date: {article_date})")
+                
+            except Exception as e:
+                # Skip problematic articles but continue processing
+                continue
+    
+    if loaded == 0:
+        print("No listing page could be loaded")
+        return None
+    return article_links
+
+METRICS.configure_from_env(source="Mecardo")
 
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+    context = browser.new_context()
+    block_stats = install_resource_blocking(context, SITE_POLICIES["mecardo"])
+    page = context.new_page()
     
-    try:
-        page.goto(BASE_URL, wait_until="domcontentloaded")
-        page.wait_for_selector("article", timeout=TIMEOUT)
-    except Exception as e:
-        print(f"Initial page load failed: {e}")
-        browser.close()
-        exit(1)
+    fetcher = Fetcher(fallback=lambda u: browser_fetch(page, u), use_http=USE_HTTP_FETCH,
+                      cache=ResponseCache(CACHE_DIR), rate=RATE)
     
-    article_links = []
-    current_page = 1
-    stop_scraping = False
-    
-    while current_page <= MAX_PAGES and not stop_scraping:
-        print(f"Processing page {current_page}...")
-        
-        try:
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-            articles = soup.find_all("article")
-            
-            if not articles:
-                print("No articles found on page - stopping")
-                break
-            
-            # Process articles on current page
-            for article in articles:
-                try:
-                    # Extract link
-                    a_tag = article.find("a", href=True)
-                    if not a_tag:
-                        continue
-                    href = a_tag["href"]
-                    
-                    # Extract and parse date
-                    date_span = article.find("span", class_="elementor-post-date")
-                    if not date_span:
-                        continue
-                    date_str = date_span.get_text(strip=True)
-                    article_date = parse_date(date_str)
-                    
-                    # Check cutoff
-                    if article_date < CUT_OFF:
-                        print(f"Reached cutoff date ({article_date}) - stopping pagination")
-                        stop_scraping = True
-                        break
-                    
-                    article_links.append(href)
-                    print(f"  Added: {href} (Date: {article_date})")
-                    
-                except Exception as e:
-                    # Skip problematic articles but continue processing
-                    continue
-            
-            if stop_scraping:
-                break
-            
-            # Find and click next button
-            next_btn = find_next_button(page)
-            if not next_btn:
-                print("No next page button found - stopping")
-                break
-            
-            # Click with safety checks
-            next_btn.scroll_into_view_if_needed()
-            next_btn.click(timeout=5000)
-            
-            # Wait for navigation and new content
-            page.wait_for_load_state("networkidle", timeout=TIMEOUT)
-            page.wait_for_selector("article", timeout=TIMEOUT)
-            
-            # Small buffer to avoid rate limiting
-            time.sleep(1.5)
-            current_page += 1
-            
-        except Exception as e:
-            print(f"Error on page {current_page}: {e}")
-            break
+    discovery = WPDiscovery(SITE_ROOT, fetcher.get, cache=fetcher.cache)
+    posts = discovery.posts(term="grains-oilseeds", after=CUT_OFF, before=END_DATE)
+    print(discovery.summary())
+    if posts is not None:
+        article_links = URLFrontier()
+        for post in posts:
+            article_links.add(post.url, date=post.date)
+    else:
+        article_links = crawl_listing_pages(fetcher)
+        if article_links is None:
+            fetcher.close()
+            browser.close()
+            exit(1)
     
     data=[]
-    for i, url in enumerate(article_links):
+    i = 0
+    while (url := article_links.pop()) is not None:  # newest first
+        i += 1
         try:
-            page.goto(url, wait_until="domcontentloaded")
-            page.wait_for_timeout(2000)
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
+            html = fetcher.fetch(url, ARTICLE_SELECTORS)
+            if html is None:
+                print(f"{url} skipped: could not fetch page")
+                continue
+            fields = ARTICLE_SPEC.extract(parse_html(html))
             row={}
             row["scraped_at"]=datetime.now().isoformat()
             
             # DEFENSIVE CHECKS ADDED BELOW (only changes)
-            date_elem = soup.find("span",class_="elementor-icon-list-text elementor-post-info__item elementor-post-info__item--type-date")
-            if not date_elem:
+            if not fields["date_text"]:
                 print(f"{url} skipped: date element not found")
                 continue
-            date_str = date_elem.get_text().strip()
-            row["date"]=parse_date(date_str)
+            row["date"]=parse_date(fields["date_text"], row["scraped_at"])
             
-            title_elem = soup.find("h1",class_="elementor-heading-title elementor-size-default")
-            if not title_elem:
+            if fields["title"] is None:
                 print(f"{url} skipped: title element not found")
                 continue
-            title = title_elem.get_text().strip()
-            row["title"]=title
-            
-            author_elem = soup.find("span",class_="elementor-icon-list-text elementor-post-info__item elementor-post-info__item--type-author")
-            row["author"] = author_elem.get_text().split(sep="By")[-1].strip() if author_elem else "Unknown"
-            
-            sector = soup.find_all("a",class_="elementor-post-info__terms-list-item")[0]
-            row["sector"] = sector.get_text().strip() if sector else "Unknown"
-            tag_elem = soup.find_all("a",class_="elementor-post-info__terms-list-item")[1]
-            row["tag"] = tag_elem.get_text().strip() if tag_elem else "Unknown"
+            row["title"]=fields["title"]
+            row["author"] = fields["author"]
+            row["sector"] = fields["terms"][0]
+            row["tag"] = fields["terms"][1]
             
-    
-            body_elem = soup.find("div",class_="elementor-column elementor-col-66 elementor-inner-column elementor-element elementor-element-6aa3776")
-            if not body_elem:
+            if fields["body"] is None:
                 print(f"{url} skipped: body element not found")
                 continue
-            body = body_elem.get_text().strip()
-            l = body.split(sep="What does it mean?")
-            row["body"] = l[0]
-            row["explanation"] = l[1] if len(l) > 1 else ""
-            
-            kpoints_elem = soup.find("div",class_="elementor-element elementor-element-8714261 elementor-widget elementor-widget-text-editor")
-            row["key points"] = kpoints_elem.get_text().strip() if kpoints_elem else ""
+            row["body"] = fields["body"]
+            row["explanation"] = fields["explanation"]
+            row["key points"] = fields["key points"]
             
             row["URL"] = url
             data.append(row)
@@ -191,16 +181,22 @@ with sync_playwright() as p:
             print(f"{url} page load failed: {e}")
             continue  # Continue to next article instead of exiting
     
+    fetcher.close()
+    print(fetcher.summary())
+    print(block_stats.summary())
+    print(WAIT_STATS.summary())
+    print(METRICS.summary())
     browser.close()
 
 # Results
 print(f"\n✅ Collected {len(article_links)} article links newer than {CUT_OFF}")
 print(f"✅ Successfully scraped {len(data)} articles")
 print("\nSample links:")
-for link in article_links[:5]:
+for link in list(article_links)[:5]:
     print(f"  - {link}")
 if len(article_links) > 5:
     print(f"  ... and {len(article_links) - 5} more")
 df=pd.DataFrame(data)
 filename = f"mercadoF1.csv"
-df.to_csv(filename, index=False, encoding='utf-8-sig')
\ No newline at end of file
+df.to_csv(filename, index=False, encoding='utf-8-sig')
+write_articles(df, source="Mecardo")
\ No newline at end of file
@@ -1,70 +1,276 @@
 #!/usr/bin/env python3
 """
 Merge fragment CSVs into one unified CSV with all articles + full bodies
+
+Usage: python merge_brownfield_output.py                # load everything into pandas
+       python merge_brownfield_output.py --streaming    # k-way merge, one row per run in memory
+       python merge_brownfield_output.py --check-order  # both modes agree on fixtures/brownfield_fragments/
+
+Streaming mode sorts each fragment once into small sorted runs (cached under
+csv_fragments/sorted_runs/ and reused while the fragment is unchanged), then
+heap-merges all runs straight into the unified CSV, dropping duplicate URLs.
+Rows are held one per run; only the seen-URL set grows, by an 8-byte digest
+per unique URL. Both modes order rows newest first, with missing or
+unparseable dates (and scrape times) last.
 """
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
 import pandas as pd
 from pathlib import Path
 import glob
+from article_store import write_articles
 
 OUTPUT_DIR = Path('brownfield_output')
 FRAGMENTS_DIR = OUTPUT_DIR / 'csv_fragments'
+RUNS_DIR = FRAGMENTS_DIR / 'sorted_runs'
 UNIFIED_CSV = OUTPUT_DIR / 'brownfield_complete_with_bodies.csv'
+PARQUET_DIR = OUTPUT_DIR / 'articles_parquet'
+ORDER_FIXTURES = Path(__file__).parent / 'fixtures' / 'brownfield_fragments'
 
-print(f"📁 Merging fragments from: {FRAGMENTS_DIR.absolute()}")
-print(f"💾 Output: {UNIFIED_CSV.absolute()}\n")
+# Ensure consistent column order
+COLUMNS = [
+    'article_id', 'date', 'title', 'author', 'categories', 'tags',
+    'url', 'scraped_at', 'source', 'body_char_count', 'body'
+]
+RUN_ROWS = 2000        # rows held in memory while sorting one run
+PARQUET_BATCH = 5000   # rows per Parquet append in streaming mode
 
-# Find all fragment CSVs
-fragment_files = sorted(glob.glob(str(FRAGMENTS_DIR / 'fragment_worker_*.csv')))
+csv.field_size_limit(sys.maxsize)  # article bodies can exceed the 128 KiB default
 
-if not fragment_files:
-    print("❌ No fragment files found!")
-    print("👉 Run workers first:")
-    print("   python brownfield_worker.py --start-page 1 --end-page 155 --worker-id 1")
-    print("   python brownfield_worker.py --start-page 156 --end-page 310 --worker-id 2")
-    print("   ...etc")
-    exit(1)
+def _iso_key(value):
+    """(True, value) for an ISO 8601 timestamp, (False, '') otherwise: sorts last in a descending sort"""
+    try:
+        datetime.fromisoformat(value)
+        return True, value
+    except (TypeError, ValueError):
+        return False, ''
 
-print(f"Found {len(fragment_files)} fragment files:")
-for f in fragment_files:
-    print(f"  • {Path(f).name}")
+def sort_key(row):
+    # Newest first by date, then scraped time (same order as sort_frame())
+    return _iso_key(row.get('date')) + _iso_key(row.get('scraped_at'))
 
-# Load and concatenate all fragments
-dfs = []
-for file in fragment_files:
-    try:
-        df = pd.read_csv(file, encoding='utf-8-sig')
-        dfs.append(df)
-        print(f"✅ Loaded {len(df):,} articles from {Path(file).name}")
-    except Exception as e:
-        print(f"❌ Error loading {file}: {e}")
+def sort_frame(df):
+    """Newest first by date, then scraped time; missing/unparseable values last (as sort_key)"""
+    keys = {col: pd.to_datetime(df[col], errors='coerce', format='ISO8601', utc=True) for col in ('date', 'scraped_at')}
+    return (df.assign(_date=keys['date'], _scraped=keys['scraped_at'])
+              .sort_values(['_date', '_scraped'], ascending=[False, False], na_position='last')
+              .drop(columns=['_date', '_scraped'])
+              .reset_index(drop=True))
 
-if not dfs:
-    print("❌ No valid fragments to merge")
-    exit(1)
+def find_fragments():
+    fragment_files = sorted(glob.glob(str(FRAGMENTS_DIR / 'fragment_worker_*.csv')))
 
-# Concatenate and sort by date/scraped time
-unified_df = pd.concat(dfs, ignore_index=True)
-unified_df = unified_df.sort_values(['date', 'scraped_at'], ascending=[False, False]).reset_index(drop=True)
+    if not fragment_files:
+        print("❌ No fragment files found!")
+        print("👉 Run workers first:")
+        print("   python brownfield_worker.py --start-page 1 --end-page 155 --worker-id 1")
+        print("   python brownfield_worker.py --start-page 156 --end-page 310 --worker-id 2")
+        print("   ...etc")
+        exit(1)
 
-# Ensure consistent column order
-columns = [
-    'article_id', 'date', 'title', 'author', 'categories', 'tags',
-    'url', 'scraped_at', 'source', 'body_char_count', 'body'
-]
-unified_df = unified_df[[col for col in columns if col in unified_df.columns]]
-
-# Save unified CSV
-unified_df.to_csv(UNIFIED_CSV, index=False, encoding='utf-8-sig')
-
-print(f"\n{'='*70}")
-print("✅ MERGE COMPLETE")
-print(f"{'='*70}")
-print(f"Total articles: {len(unified_df):,}")
-print(f"Total characters in all bodies: {unified_df['body_char_count'].sum():,}")
-print(f"Output file: {UNIFIED_CSV.name}")
-print(f"\nSample columns:")
-print(unified_df[['article_id', 'date', 'title', 'body_char_count']].head(5).to_string(index=False))
-print(f"\n💡 Usage:")
-print(f'   df = pd.read_csv("{UNIFIED_CSV.name}", encoding="utf-8-sig")')
-print(f'   print(df["body"].iloc[0][:200])  # First 200 chars of first article body')
-print(f"{'='*70}")
\ No newline at end of file
+    print(f"Found {len(fragment_files)} fragment files:")
+    for f in fragment_files:
+        print(f"  • {Path(f).name}")
+    return fragment_files
+
+def load_fragments(fragment_files):
+    dfs = []
+    for file in fragment_files:
+        try:
+            df = pd.read_csv(file, encoding='utf-8-sig')
+            dfs.append(df)
+            print(f"✅ Loaded {len(df):,} articles from {Path(file).name}")
+        except Exception as e:
+            print(f"❌ Error loading {file}: {e}")
+
+    if not dfs:
+        print("❌ No valid fragments to merge")
+        exit(1)
+    return pd.concat(dfs, ignore_index=True)
+
+def merge_in_memory(fragment_files):
+    # Load, concatenate and sort by date/scraped time
+    unified_df = sort_frame(load_fragments(fragment_files))
+    unified_df = unified_df[[col for col in COLUMNS if col in unified_df.columns]]
+
+    # Save unified CSV
+    unified_df.to_csv(UNIFIED_CSV, index=False, encoding='utf-8-sig')
+
+    # Columnar copy: metadata-only reads skip body bytes entirely
+    write_articles(unified_df, PARQUET_DIR, source='Brownfield', replace=True)
+
+    return {
+        'articles': len(unified_df),
+        'body_chars': int(unified_df['body_char_count'].sum()),
+        'sample': unified_df[['article_id', 'date', 'title', 'body_char_count']].head(5),
+    }
+
+def _write_run(rows, path):
+    rows.sort(key=sort_key, reverse=True)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def sorted_runs(fragment, runs_dir=RUNS_DIR):
+    """Sorted run files for one fragment, rebuilt only when the fragment changed"""
+    fragment = Path(fragment)
+    stat = fragment.stat()
+    run_dir = Path(runs_dir) / fragment.stem
+    manifest_path = run_dir / 'manifest.json'
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['signature'] == signature:
+            return [run_dir / name for name in manifest['runs']]
+
+    shutil.rmtree(run_dir, ignore_errors=True)
+    run_dir.mkdir(parents=True)
+    runs, rows = [], []
+    with open(fragment, 'r', newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            rows.append(row)
+            if len(rows) >= RUN_ROWS:
+                runs.append(f"run_{len(runs):04d}.csv")
+                _write_run(rows, run_dir / runs[-1])
+                rows = []
+    if rows:
+        runs.append(f"run_{len(runs):04d}.csv")
+        _write_run(rows, run_dir / runs[-1])
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'signature': signature, 'runs': runs}, f)
+    print(f"🔃 Sorted {fragment.name} into {len(runs)} run(s)")
+    return [run_dir / name for name in runs]
+
+def _typed(row):
+    """Cast a CSV row's numeric columns the way pd.read_csv infers them, so Parquet types match"""
+    count = row.get('body_char_count')
+    row['body_char_count'] = int(float(count)) if count not in (None, '') else None
+    article_id = row.get('article_id')
+    if article_id and article_id.isdigit():
+        row['article_id'] = int(article_id)
+    return row
+
+def _read_run(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def all_runs(fragment_files, runs_dir=RUNS_DIR):
+    run_paths = []
+    for file in fragment_files:
+        try:
+            run_paths.extend(sorted_runs(file, runs_dir))
+        except Exception as e:
+            print(f"❌ Error sorting {file}: {e}")
+    if not run_paths:
+        print("❌ No valid fragments to merge")
+        exit(1)
+    return run_paths
+
+def merged_rows(run_paths, stats):
+    """Rows of all runs in sort_key order, first occurrence of each URL only"""
+    seen = set()  # 8-byte digest per unique URL: the one part that grows with the corpus
+    for row in heapq.merge(*(_read_run(p) for p in run_paths), key=sort_key, reverse=True):
+        digest = hashlib.blake2b(row['url'].encode('utf-8'), digest_size=8).digest()
+        if digest in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(digest)
+        yield row
+
+def merge_streaming(fragment_files):
+    """k-way heap merge of sorted runs; memory is one row per run plus O(unique URLs) digests"""
+    start = time.perf_counter()
+    bytes_in = sum(Path(f).stat().st_size for f in fragment_files)
+    run_paths = all_runs(fragment_files)
+    sort_seconds = time.perf_counter() - start
+
+    shutil.rmtree(PARQUET_DIR / 'source=Brownfield', ignore_errors=True)
+    stats = {'articles': 0, 'duplicates': 0, 'body_chars': 0}
+    sample, batch = [], []
+
+    with open(UNIFIED_CSV, 'w', newline='', encoding='utf-8-sig') as out:
+        writer = csv.DictWriter(out, fieldnames=COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for row in merged_rows(run_paths, stats):
+            writer.writerow(row)
+            row = _typed(row)
+            stats['articles'] += 1
+            stats['body_chars'] += row['body_char_count'] or 0
+            if len(sample) < 5:
+                sample.append(row)
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH:
+                write_articles(batch, PARQUET_DIR, source='Brownfield')
+                batch = []
+    if batch:
+        write_articles(batch, PARQUET_DIR, source='Brownfield')
+
+    elapsed = time.perf_counter() - start
+    print(f"\n⚡ Streaming merge: {len(run_paths)} runs, sort {sort_seconds:.1f}s, total {elapsed:.1f}s")
+    print(f"   {stats['articles'] / elapsed:,.0f} articles/s, {bytes_in / 1e6 / elapsed:,.1f} MB/s in, "
+          f"{stats['duplicates']:,} duplicate URLs dropped")
+
+    stats['sample'] = pd.DataFrame(sample, columns=COLUMNS)[['article_id', 'date', 'title', 'body_char_count']]
+    return stats
+
+def check_order(fragment_dir=ORDER_FIXTURES):
+    """Both modes put the fixture fragments' rows in the same order (pandas keeps duplicates; compare the first)"""
+    fragment_files = sorted(glob.glob(str(Path(fragment_dir) / 'fragment_worker_*.csv')))
+    expected = list(sort_frame(load_fragments(fragment_files))['url'].drop_duplicates())
+    with tempfile.TemporaryDirectory() as runs_dir:
+        got = [row['url'] for row in merged_rows(all_runs(fragment_files, runs_dir), {'duplicates': 0})]
+    if got != expected:
+        print("❌ Streaming and pandas orders differ:")
+        for i, (a, b) in enumerate(zip(got, expected)):
+            if a != b:
+                print(f"   first difference at row {i}: streaming {a} vs pandas {b}")
+                break
+        else:
+            print(f"   {len(got)} streaming rows vs {len(expected)} pandas rows")
+        return False
+    print(f"✅ Streaming and pandas agree on the order of {len(got)} rows")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--streaming', action='store_true', help='k-way merge with URL de-duplication, one row per run in memory')
+    parser.add_argument('--check-order', action='store_true', help=f'Exit 1 unless both modes order {ORDER_FIXTURES.name}/ alike')
+    args = parser.parse_args()
+    if args.check_order:
+        sys.exit(0 if check_order() else 1)
+
+    print(f"📁 Merging fragments from: {FRAGMENTS_DIR.absolute()}")
+    print(f"💾 Output: {UNIFIED_CSV.absolute()}\n")
+
+    fragment_files = find_fragments()
+    result = merge_streaming(fragment_files) if args.streaming else merge_in_memory(fragment_files)
+
+    print(f"\n{'='*70}")
+    print("✅ MERGE COMPLETE")
+    print(f"{'='*70}")
+    print(f"Total articles: {result['articles']:,}")
+    print(f"Total characters in all bodies: {result['body_chars']:,}")
+    print(f"Output file: {UNIFIED_CSV.name}")
+    print("\nSample columns:")
+    print(result['sample'].to_string(index=False))
+    print("\n💡 Usage:")
+    print(f'   df = pd.read_csv("{UNIFIED_CSV.name}", encoding="utf-8-sig")')
+    print('   print(df["body"].iloc[0][:200])  # First 200 chars of first article body')
+    print('   from article_store import read_articles, METADATA_COLUMNS')
+    print(f'   meta = read_articles("{PARQUET_DIR}", columns=METADATA_COLUMNS)  # no body bytes read')
+    print(f"{'='*70}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Process-wide crawl metrics: counters, histograms and optional span traces.
+
+Usage:
+    from metrics import METRICS
+    METRICS.configure(source="Brownfield", worker=3)      # labels on every series
+    METRICS.inc("rows_written_total", 25)
+    METRICS.observe("parse_seconds", 0.012, backend="lxml")
+    with METRICS.span("article", url=url):                # timed into span_seconds{span="article"}
+        ...
+    METRICS.serve(9100)                                   # Prometheus text on :9100/metrics
+    METRICS.start_snapshots("metrics.json", interval=30)  # periodic JSON snapshot
+    METRICS.enable_tracing("trace.jsonl")                 # one JSON line per finished span
+    print(METRICS.summary())
+
+The shared modules report here on their own: fetcher (request latency, bytes,
+status codes), navigation (goto and ready/challenge waits), html_parser (parse
+time), rate_control (pacing sleeps) and fragment_writer (rows, fsync time).
+Scripts only set labels and pick exporters; with none running, an event costs
+one dict update under a lock.
+
+Histograms named *_bytes use size buckets, everything else latency buckets in
+seconds. Span attributes (url, page, ...) only go to the trace file, never into
+labels, so series cardinality stays at source x worker x a few kinds.
+
+configure_from_env() reads SCRAPER_METRICS_PORT, SCRAPER_METRICS_JSON and
+SCRAPER_TRACE, so any crawl loop can be exported without new flags.
+"""
+import atexit
+import bisect
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PREFIX = "scraper_"
+PORT_ENV = "SCRAPER_METRICS_PORT"
+JSON_ENV = "SCRAPER_METRICS_JSON"
+TRACE_ENV = "SCRAPER_TRACE"
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+
+
+def _buckets(name):
+    return BYTES_BUCKETS if name.endswith("_bytes") else LATENCY_BUCKETS
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.labels = {}
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [count per bucket..., overflow, sum, count]
+        self._lock = threading.Lock()
+        self._trace = None
+        self._span_ids = itertools.count(1)
+        self._current_span = contextvars.ContextVar("current_span", default=None)
+        self._server = None
+        self._snapshot_path = None
+        self.started = time.time()
+
+    def configure(self, **labels):
+        """Default labels added to every series (e.g. source, worker)"""
+        self.labels.update({k: str(v) for k, v in labels.items() if v is not None})
+        return self
+
+    def _key(self, name, labels):
+        merged = dict(self.labels)
+        merged.update((k, str(v)) for k, v in labels.items())
+        return name, tuple(sorted(merged.items()))
+
+    # ---- recording ----
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        buckets = _buckets(name)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            hist[bisect.bisect_left(buckets, value)] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a block into span_seconds{span=name}; traced with its parent span when tracing is on"""
+        span_id = f"{os.getpid()}-{next(self._span_ids)}"
+        parent = self._current_span.get()
+        token = self._current_span.set(span_id)
+        started_at = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self._current_span.reset(token)
+            self.observe("span_seconds", seconds, span=name)
+            if self._trace is not None:
+                record = {"span": name, "id": span_id, "parent": parent, "start": started_at,
+                          "seconds": round(seconds, 6), "labels": self.labels, "attrs": attrs}
+                if error:
+                    record["error"] = error
+                line = json.dumps(record, default=str)
+                with self._lock:
+                    self._trace.write(line + "\n")
+
+    # ---- export ----
+
+    def snapshot(self):
+        """Everything recorded so far as a JSON-able dict (histogram buckets cumulative)"""
+        with self._lock:
+            counters = list(self.counters.items())
+            histograms = [(key, list(hist)) for key, hist in self.histograms.items()]
+        out = {"time": time.time(), "uptime": time.time() - self.started, "labels": dict(self.labels),
+               "counters": [], "histograms": []}
+        for (name, labels), value in counters:
+            out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+        for (name, labels), hist in histograms:
+            cumulative = list(itertools.accumulate(hist[:-2]))
+            out["histograms"].append({
+                "name": name, "labels": dict(labels), "count": hist[-1], "sum": hist[-2],
+                "buckets": dict(zip([str(b) for b in _buckets(name)] + ["+Inf"], cumulative)),
+            })
+        return out
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(hist)) for key, hist in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{name}{_label_text(labels)} {value}")
+        for (name, labels), hist in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+            bounds = [f"{b:g}" for b in _buckets(name)] + ["+Inf"]
+            for bound, count in zip(bounds, itertools.accumulate(hist[:-2])):
+                lines.append(f"{PREFIX}{name}_bucket{_label_text(labels + (('le', bound),))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_label_text(labels)} {hist[-2]}")
+            lines.append(f"{PREFIX}{name}_count{_label_text(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics (Prometheus) and /snapshot.json from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics"):
+                    body, kind = metrics.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path.startswith("/snapshot.json"):
+                    body, kind = json.dumps(metrics.snapshot()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def write_snapshot(self, path=None):
+        path = Path(path or self._snapshot_path)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def start_snapshots(self, path, interval=30):
+        """Rewrite `path` every `interval` s from a daemon thread, and once more at exit"""
+        self._snapshot_path = Path(path)
+        self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot()
+
+        threading.Thread(target=loop, name="metrics-snapshot", daemon=True).start()
+        atexit.register(self.write_snapshot)
+
+    def enable_tracing(self, path):
+        """Append one JSON line per finished span to `path`"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._trace = open(path, "a", encoding="utf-8", buffering=1)
+        atexit.register(self._trace.close)
+
+    def configure_from_env(self, **labels):
+        """configure(**labels), then start whichever exporters the SCRAPER_* variables ask for"""
+        self.configure(**labels)
+        if os.environ.get(PORT_ENV):
+            self.serve(int(os.environ[PORT_ENV]))
+        if os.environ.get(JSON_ENV):
+            self.start_snapshots(os.environ[JSON_ENV])
+        if os.environ.get(TRACE_ENV):
+            self.enable_tracing(os.environ[TRACE_ENV])
+        return self
+
+    def summary(self):
+        """One line: per-metric totals across all labels, slowest total time first"""
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, _), value in self.counters.items():
+                counters[name] = counters.get(name, 0) + value
+            for (name, _), hist in self.histograms.items():
+                total = histograms.setdefault(name, [0.0, 0])
+                total[0] += hist[-2]
+                total[1] += hist[-1]
+        parts = []
+        for name, (total, n) in sorted(histograms.items(), key=lambda item: -item[1][0]):
+            if name.endswith("_bytes"):
+                parts.append(f"{name} {n} x avg {total / n / 1024:.0f} KB")
+            else:
+                parts.append(f"{name} {n} x avg {total / n * 1e3:.0f} ms ({total:.1f}s)")
+        parts += [f"{name} {value:g}" for name, value in sorted(counters.items())]
+        return "Metrics: " + (" | ".join(parts) or "none")
+
+
+METRICS = Metrics()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Event-driven Playwright waits: return as soon as the page is ready, not after a
+fixed wait_for_timeout().
+
+Usage:
+    waits = WaitStats()
+    response, ready = goto_ready(page, url, ["p.post_title", "div.singleimg"], stats=waits)
+    ...
+    print(waits.summary())
+
+`ready` is a CSS selector or list of selectors (any one matching is enough);
+`timeout` caps the wait in ms. Each wait is timed into WaitStats per label so
+the logs show how long pages actually took to become usable.
+"""
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from metrics import METRICS
+
+
+def _css(ready):
+    return ready if isinstance(ready, str) else ", ".join(ready)
+
+
+class WaitStats:
+    def __init__(self):
+        self.waits = {}  # label -> [count, total_s, max_s, timeouts]
+
+    def record(self, label, seconds, ok):
+        METRICS.observe("wait_seconds", seconds, label=label)
+        if not ok:
+            METRICS.inc("wait_timeouts_total", label=label)
+        entry = self.waits.setdefault(label, [0, 0.0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        if not ok:
+            entry[3] += 1
+
+    def summary(self):
+        parts = [f"{label}: {n} waits, avg {total / n:.2f}s, max {peak:.2f}s, {timeouts} timeouts"
+                 for label, (n, total, peak, timeouts) in self.waits.items()]
+        return "Waits: " + ("; ".join(parts) or "none")
+
+
+def wait_ready(page, ready, timeout=15000, stats=None, label="ready", state="attached"):
+    """Block until `ready` reaches `state` (attached/visible/hidden) or `timeout` ms; True if it did"""
+    start = time.monotonic()
+    try:
+        page.wait_for_selector(_css(ready), state=state, timeout=timeout)
+        ok = True
+    except PlaywrightTimeoutError:
+        ok = False
+    if stats is not None:
+        stats.record(label, time.monotonic() - start, ok)
+    return ok
+
+
+def wait_for_count(page, css, above, timeout=15000, stats=None, label="count"):
+    """Block until more than `above` elements match `css` (e.g. after a "Load More" click)"""
+    start = time.monotonic()
+    try:
+        page.wait_for_function("([css, n]) => document.querySelectorAll(css).length > n",
+                               arg=[css, above], timeout=timeout)
+        ok = True
+    except PlaywrightTimeoutError:
+        ok = False
+    if stats is not None:
+        stats.record(label, time.monotonic() - start, ok)
+    return ok
+
+
+def goto_ready(page, url, ready, timeout=15000, stats=None, label="goto", goto_timeout=60000):
+    """page.goto to DOMContentLoaded, then wait for `ready`. Returns (response, ready_found)."""
+    with METRICS.timer("goto_seconds"):
+        response = page.goto(url, wait_until="domcontentloaded", timeout=goto_timeout)
+    return response, wait_ready(page, ready, timeout, stats, label)
+
+
+async def wait_ready_async(page, ready, timeout=15000, stats=None, label="ready", state="attached"):
+    """wait_ready for playwright.async_api pages"""
+    start = time.monotonic()
+    try:
+        await page.wait_for_selector(_css(ready), state=state, timeout=timeout)
+        ok = True
+    except PlaywrightTimeoutError:
+        ok = False
+    if stats is not None:
+        stats.record(label, time.monotonic() - start, ok)
+    return ok
+
+
+async def goto_ready_async(page, url, ready, timeout=15000, stats=None, label="goto", goto_timeout=60000):
+    """goto_ready for playwright.async_api pages"""
+    with METRICS.timer("goto_seconds"):
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=goto_timeout)
+    return response, await wait_ready_async(page, ready, timeout, stats, label)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate article detection across sources (shingling + MinHash + LSH).
+
+Usage:
+    index = NearDupIndex("articles_parquet/_near_dup.sqlite")
+    canonical = index.check(url, body, source="Producer")
+    if canonical is not None:
+        ...  # syndicated copy of `canonical`: linked in the index, don't store it
+    print(index.summary())
+
+Bodies are lowercased and cut into 5-word shingles (crc32 per word, combined
+into a 64-bit shingle hash in numpy), then reduced to a 128-value MinHash
+signature with multiply-shift hashing in one numpy pass. The signature is split into 16
+bands of 8 rows; articles sharing any band are candidates, and a candidate whose
+estimated Jaccard similarity reaches `threshold` is a near duplicate. Band
+buckets live in memory (rebuilt from SQLite at open), so a check is a few dict
+lookups after hashing; signatures and duplicate links persist between runs.
+
+Articles are keyed by canonical_url(), so re-scraping the same URL is never
+reported as a duplicate of itself. Only an article from a different source is
+a match: same-source lookalikes (a site's recurring templated market wraps)
+are separate articles, not syndicated copies.
+"""
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from url_frontier import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    key        TEXT PRIMARY KEY,
+    url        TEXT,
+    source     TEXT,
+    signature  BLOB NOT NULL,
+    added_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    key        TEXT PRIMARY KEY,
+    canonical  TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    url        TEXT,
+    source     TEXT,
+    linked_at  REAL NOT NULL
+);
+"""
+
+WORD = re.compile(r"\w+")
+SHIFT = np.uint64(32)
+# Odd 64-bit multipliers: shingle hash = sum(word_hash[i + j] * POSITION[j]) mod 2**64
+POSITION = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+                     0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53,
+                     0x94D049BB133111EB, 0xBF58476D1CE4E5B9], dtype=np.uint64)
+
+
+def shingle_hashes(text, k=5):
+    """Distinct 64-bit hashes of every k-word shingle (one shingle when shorter than k words)"""
+    words = WORD.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    k = min(k, len(words))
+    count = len(words) - k + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for j in range(k):
+        hashes += word_hashes[j:j + count] * POSITION[j % len(POSITION)]
+    return np.unique(hashes)
+
+
+class MinHasher:
+    """num_perm multiply-shift hash functions h(x) = (a*x + b) >> 32 over uint64"""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.RandomState(seed)
+        high = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        low = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.a = (high << SHIFT) | low | np.uint64(1)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64) << SHIFT
+
+    def signature(self, hashes):
+        """uint32 signature of a shingle-hash array (all permutations at once)"""
+        permuted = np.multiply.outer(self.a, hashes)
+        permuted += self.b[:, None]
+        # >> is monotone, so shifting the row minima equals minimising the shifted rows
+        return (permuted.min(axis=1) >> SHIFT).astype(np.uint32)
+
+
+class NearDupIndex:
+    def __init__(self, path, threshold=0.8, num_perm=128, bands=16, shingle=5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.hasher = MinHasher(num_perm)
+        self.conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.signatures = {}  # key -> signature
+        self.sources = {}  # key -> source
+        self.buckets = [{} for _ in range(bands)]  # band -> {band bytes: [keys]}
+        for key, source, blob in self.conn.execute("SELECT key, source, signature FROM signatures"):
+            self._index(key, np.frombuffer(blob, dtype=np.uint32), source)
+        self.stats = {'checked': 0, 'duplicates': 0, 'added': 0, 'check_seconds': 0.0}
+
+    def _band_keys(self, sig):
+        raw = sig.tobytes()
+        width = self.rows * 4
+        return [raw[i * width:(i + 1) * width] for i in range(self.bands)]
+
+    def _index(self, key, sig, source=None):
+        self.signatures[key] = sig
+        self.sources[key] = source
+        for band, bucket_key in zip(self.buckets, self._band_keys(sig)):
+            band.setdefault(bucket_key, []).append(key)
+
+    def _unindex(self, key):
+        sig = self.signatures.pop(key)
+        self.sources.pop(key, None)
+        for band, bucket_key in zip(self.buckets, self._band_keys(sig)):
+            keys = band[bucket_key]
+            keys.remove(key)
+            if not keys:
+                del band[bucket_key]
+
+    def signature(self, text):
+        hashes = shingle_hashes(text or "", self.shingle)
+        return self.hasher.signature(hashes) if len(hashes) else None
+
+    def query(self, sig, exclude=None, source=None):
+        """
+        (key, estimated Jaccard) of the most similar indexed article >= threshold,
+        or None; articles from `source` itself are not candidates.
+        """
+        candidates = set()
+        for band, bucket_key in zip(self.buckets, self._band_keys(sig)):
+            candidates.update(band.get(bucket_key, ()))
+        candidates.discard(exclude)
+        best = None
+        for key in candidates:
+            if source is not None and self.sources[key] == source:
+                continue
+            similarity = float(np.count_nonzero(self.signatures[key] == sig)) / len(sig)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def check(self, url, text, source=None):
+        """
+        Canonical key if `text` is a near duplicate of an indexed article from
+        another source (the link is recorded), else None after indexing it.
+        """
+        start = time.perf_counter()
+        key = canonical_url(url)
+        sig = self.signature(text)
+        result = None
+        if sig is not None and key not in self.signatures:
+            match = self.query(sig, exclude=key, source=source)
+            if match is not None:
+                result = match[0]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO links (key, canonical, similarity, url, source, linked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, match[0], match[1], url, source, time.time()))
+                self.stats['duplicates'] += 1
+            else:
+                self._index(key, sig, source)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO signatures (key, url, source, signature, added_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, url, source, sig.tobytes(), time.time()))
+                self.stats['added'] += 1
+        self.stats['checked'] += 1
+        self.stats['check_seconds'] += time.perf_counter() - start
+        return result
+
+    def filter(self, df, body_column='body'):
+        """Rows of `df` that are not near duplicates (duplicates are linked, not kept)"""
+        if df.empty or 'url' not in df.columns or body_column not in df.columns:
+            return df
+        sources = df['source'] if 'source' in df.columns else [None] * len(df)
+        indexed, stats = len(self.signatures), dict(self.stats)
+        self.conn.execute("BEGIN")  # one commit for the whole batch
+        try:
+            keep = [self.check(url, body if isinstance(body, str) else '', source) is None
+                    for url, body, source in zip(df['url'], df[body_column], sources)]
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            # keys are only ever appended, so the batch's are the tail of the dict
+            for key in list(self.signatures)[indexed:]:
+                self._unindex(key)
+            self.stats = stats
+            raise
+        self.conn.execute("COMMIT")
+        return df[keep]
+
+    def links(self):
+        """{duplicate key: (canonical key, similarity)} for everything linked so far"""
+        return {key: (canonical, similarity) for key, canonical, similarity in
+                self.conn.execute("SELECT key, canonical, similarity FROM links")}
+
+    def summary(self):
+        s = self.stats
+        avg_us = s['check_seconds'] / s['checked'] * 1e6 if s['checked'] else 0.0
+        return (f"Near-dup: {s['checked']} checked ({avg_us:.0f} µs avg), {s['duplicates']} linked as duplicates, "
+                f"{s['added']} indexed, {len(self.signatures)} in index")
+
+    def close(self):
+        self.conn.close()
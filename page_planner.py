@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Find the listing pages that cover a date window by probing, not walking.
+
+Usage:
+    planner = PagePlanner(lambda n: listing_dates(listing_url(n)), last_page=620)
+    pages = planner.plan(start=date(2018, 1, 1), end=date(2019, 12, 31))
+    if pages is not None:
+        first, last = pages          # fetch only these (in parallel if you like)
+    print(planner.summary())
+
+Listings are newest first, so page spans only move back in time as N grows.
+plan() gallops (1, 2, 4, 8, ...) until a page is entirely older than `start`
+(or `last_page` / `max_page` is reached), then binary-searches both edges in
+that bracket:
+
+    last  = the page before the first one whose newest date is before `start`
+    first = the first page holding anything on or before `end`
+
+A window deep in a 620-page archive costs about 3*log2(N) probes instead of N
+page loads. Probes are memoised in `pages`.
+
+probe(n) returns the dates parsed on page n ([] past the end), or None when the
+page could not be loaded. A failed probe always widens the range (it counts as
+"not older than start" and "already at or before end"), and so does a sticky
+old post on page 1, so errors cost extra pages, never missing ones.
+"""
+import time
+
+
+class PagePlanner:
+    def __init__(self, probe, last_page=None, max_page=1000):
+        self.probe = probe
+        self.last_page = last_page or max_page
+        self.pages = {}  # page -> dates, or None if the probe failed
+        self.stats = {'probes': 0, 'failed': 0, 'seconds': 0.0, 'plan': None}
+
+    def dates(self, page):
+        if page not in self.pages:
+            start = time.perf_counter()
+            dates = self.probe(page)
+            self.stats['seconds'] += time.perf_counter() - start
+            self.stats['probes'] += 1
+            if dates is None:
+                self.stats['failed'] += 1
+            else:
+                dates = [d for d in dates if d is not None]
+            self.pages[page] = dates
+        return self.pages[page]
+
+    def older_than(self, page, start):
+        """Everything on `page` predates `start` (an empty page is past the end)"""
+        dates = self.dates(page)
+        return dates is not None and (not dates or (start is not None and max(dates) < start))
+
+    def reached(self, page, end):
+        """`page` holds something on or before `end`"""
+        if end is None:
+            return True
+        dates = self.dates(page)
+        return dates is None or not dates or min(dates) <= end
+
+    @staticmethod
+    def first_true(pred, lo, hi):
+        """Smallest page in (lo, hi] with pred(page), given pred(hi) and not pred(lo)"""
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if pred(mid):
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+    def plan(self, start=None, end=None):
+        """(first, last) pages covering [start, end] (either open-ended), or None if no page does"""
+        older = lambda n: self.older_than(n, start)
+        reached = lambda n: self.reached(n, end)
+
+        # gallop: lo is known to be inside the window's span, n the next guess
+        lo, n = 0, 1
+        while not older(n):
+            if n >= self.last_page:
+                lo, n = n, n + 1  # the whole archive reaches back to `start`
+                break
+            lo, n = n, min(n * 2, self.last_page)
+        if n > self.last_page:
+            last = self.last_page
+        else:
+            last = self.first_true(older, lo, n) - 1
+        if last < 1 or not reached(last):
+            self.stats['plan'] = (start, end, None)
+            return None
+        first = self.first_true(reached, 0, last)
+        self.stats['plan'] = (start, end, (first, last))
+        return first, last
+
+    def summary(self):
+        s = self.stats
+        if s['plan'] is None:
+            return "Planner: not run"
+        start, end, pages = s['plan']
+        window = f"{start or 'oldest'}..{end or 'newest'}"
+        found = f"pages {pages[0]}-{pages[1]}" if pages else "no pages"
+        return (f"Planner: {found} for {window} in {s['probes']} probes "
+                f"({s['failed']} failed, {s['seconds']:.1f}s)")
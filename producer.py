@@ -1,9 +1,19 @@
-from bs4 import BeautifulSoup
+import os
 import pandas as pd
 from datetime import datetime
 import time
 import random
 from playwright.sync_api import sync_playwright
+from resource_blocking import SITE_POLICIES, BlockStats, install_resource_blocking
+from browser_pool import BrowserPool
+from url_frontier import URLFrontier
+from wp_discovery import WPDiscovery
+from response_cache import ResponseCache
+from article_store import write_articles
+from date_parser import parse_date
+from html_parser import parse_html
+from extraction import SITE_SPECS
+from metrics import METRICS
 
 try:
     from playwright_stealth import stealth
@@ -67,35 +77,11 @@ def handle_cloudflare_checkbox(page, max_wait=45):
     
     print(f"  No checkbox found or verification timed out after {max_wait}s")
     return False
-def parse_date(s):
-    month = {
-        "January": "01", "Jan": "01",
-        "February": "02", "Feb": "02", 
-        "March": "03", "Mar": "03",
-        "April": "04", "Apr": "04",
-        "May": "05",
-        "June": "06", "Jun": "06",
-        "July": "07", "Jul": "07",
-        "August": "08", "Aug": "08",
-        "September": "09", "Sep": "09", "Sept": "09",
-        "October": "10", "Oct": "10",
-        "November": "11", "Nov": "11",
-        "December": "12", "Dec": "12"
-    }
-    l = s.split()  
-    year = l[2]                   
-    m = month[l[0]]               
-    day = l[1].rstrip(',')     
-    
-    if int(day) < 10:
-        day = '0' + day
-    
-    date_str = f"{year}-{m}-{day}"
-    return datetime.strptime(date_str, "%Y-%m-%d").date()
-
 def human_delay(min_sec=2, max_sec=5):
     """Random delay like a human thinking"""
-    time.sleep(random.uniform(min_sec, max_sec))
+    delay = random.uniform(min_sec, max_sec)
+    METRICS.observe("sleep_seconds", delay, reason="human")
+    time.sleep(delay)
 
 def human_scroll(page):
     """Scroll like a human reading the page"""
@@ -165,258 +151,299 @@ def wait_for_cloudflare_bypass(page, max_wait=45):
     
     print(f"  Timeout after {max_wait}s")
     return False
+
+def load_listing_html(page, url, commodity):
+    """Render a commodity listing page through Cloudflare; returns HTML or None"""
+    # Navigate to page
+    page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    
+    # Human-like delay before any interaction
+    time.sleep(random.uniform(2, 4))
+    
+    # Handle Cloudflare checkbox specifically
+    handle_cloudflare_checkbox(page, max_wait=45)
+    
+    # Additional wait for content to fully load after verification
+    time.sleep(random.uniform(3, 6))
+    
+    # Human-like scrolling
+    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    time.sleep(2)
+    page.evaluate("window.scrollTo(0, 0)")
+    time.sleep(1)
+    
+    # Wait for articles container
+    try:
+        page.wait_for_selector("div.archive-articles-list", timeout=10000)
+    except:
+        print(f"Could not find articles container for {commodity}")
+        return None
+
+    html = page.content()
+    
+    # Final check - if still blocked, wait for manual intervention
+    if "Just a moment" in html or "Verification successful" in html:
+        print("Still on Cloudflare page - waiting 60s for manual verification...")
+        print("PLEASE CLICK THE CHECKBOX IF IT APPEARS")
+        time.sleep(60)
+        
+        # Check again after manual intervention
+        html = page.content()
+        if "Just a moment" in html:
+            print("Still blocked, skipping...")
+            return None
+    return html
+
+def load_article_html(page, url):
+    """Render one article like a human reader; returns HTML or None"""
+    # Human-like: Random delay before opening article
+    human_delay(2, 5)
+    
+    # Navigate to article
+    page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    
+    # Human-like: Wait for page to "load"
+    human_delay(2, 4)
+    
+    # Human mouse movement
+    human_mouse_movement(page)
+    
+    # Wait for Cloudflare on article page
+    wait_for_cloudflare_bypass(page, max_wait=30)
+    
+    # Human-like scrolling
+    human_scroll(page)
+    
+    article_html = page.content()
+    
+    if "Just a moment" in article_html:
+        print("Blocked on article page, waiting for manual verify...")
+        time.sleep(30)
+        article_html = page.content()
+        
+        if "Just a moment" in article_html:
+            print("Still blocked, skipping...")
+            return None
+    
+    # Wait for article content to render
+    try:
+        page.wait_for_selector("h1.entry-title", timeout=10000)
+    except:
+        print("Article content didn't load...")
+        return None
+    
+    # Human-like: Wait before scraping (like reading)
+    human_delay(1, 3)
+    return article_html
     
 BASE_URL = "https://www.producer.com/commodity"
+SITE_ROOT = "https://www.producer.com"
 sectors = {"Oil Seeds": ["Canola", "Soybeans", "Sunflowers", "Flax"], 
            "Cereals": ["Wheat", "Barley", "Oats", "Corn"], 
            "Field Crops": ["Potatoes"], 
            "Pulses": ["Chickpeas"]}
 CUT_OFF = datetime(2023, 1, 1).date()
+LISTING_PAGE_SIZE = 10  # posts on a rendered commodity listing (WordPress' posts_per_page)
+BACKFILL = os.environ.get("PRODUCER_BACKFILL") == "1"  # 1 = every post since CUT_OFF, not just the latest page
+CACHE_DIR = "http_cache"  # SCRAPER_OFFLINE=1 replays everything from here
+MAX_NAVIGATIONS_PER_PAGE = 40  # Recycle the tab after this many gotos to cap renderer memory
+LISTING_SPEC = SITE_SPECS["producer"]["listing"]
+ARTICLE_SPEC = SITE_SPECS["producer"]["article"]
 
 all_data = []
+block_stats = BlockStats()
+cache = ResponseCache(CACHE_DIR)
+discovery = WPDiscovery(SITE_ROOT, cache=cache)  # REST/sitemaps over urllib; may be challenged
+
+def setup_page(page):
+    """Stealth + anti-detection overrides for every page the pool opens"""
+    if USE_STEALTH:
+        try:
+            stealth(page)
+        except:
+            pass
+    
+    # Advanced anti-detection scripts
+    page.add_init_script("""
+        // Hide webdriver
+        Object.defineProperty(navigator, 'webdriver', {
+            get: () => undefined
+        });
+        
+        // Fake plugins
+        Object.defineProperty(navigator, 'plugins', {
+            get: () => [1, 2, 3, 4, 5]
+        });
+        
+        // Fake languages
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['en-US', 'en']
+        });
+        
+        // Fake hardware
+        Object.defineProperty(navigator, 'hardwareConcurrency', {
+            get: () => 8
+        });
+        Object.defineProperty(navigator, 'deviceMemory', {
+            get: () => 8
+        });
+        
+        // Remove automation flags
+        delete navigator.__proto__.webdriver;
+    """)
+
+def crawl_listing_page(pool, url, commodity):
+    """Fallback discovery: the rendered commodity listing; URLFrontier, or None if it won't load"""
+    html = cache.lookup(url)
+    if html is None and not cache.offline:
+        html = load_listing_html(pool.page(), url, commodity)
+        if html is not None:
+            cache.store(url, html)
+    if html is None:
+        return None
+    
+    article_links = URLFrontier()
+    listing = LISTING_SPEC.extract(parse_html(html))
+    
+    if not listing["container"]:
+        return None
+    
+    for article in listing["articles"]:
+        datetime_str = article["datetime"]
+        article_date = None
+        if datetime_str is not None:
+            try:
+                article_date = datetime.fromisoformat(datetime_str)
+                if article_date.date() < CUT_OFF:
+                    continue
+            except:
+                continue
+        
+        href = article["href"]
+        if href:
+            article_links.add(href, date=article_date)
+    return article_links
+
+METRICS.configure_from_env(source="Producer")
 
 with sync_playwright() as p:
-    for sector in sectors:
-        for commodity in sectors[sector]:
-            Current_url = f"{BASE_URL}/{commodity.lower()}".strip()
-            print(f"\n{'='*60}")
-            print(f"Processing {commodity}: {Current_url}")
-            print(f"{'='*60}")
-            
-            # MUST be headless=False for human-like behavior
-            browser = p.chromium.launch(
-                headless=False,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    "--disable-web-security",
-                    "--window-size=1920,1080",
-                ]
-            )
-            
-            context = browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                locale="en-US",
-                timezone_id="America/Chicago",
-            )
-            
-            page = context.new_page()
-            
-            # Apply stealth
-            if USE_STEALTH:
-                try:
-                    stealth(page)
-                except:
-                    pass
-            
-            # Advanced anti-detection scripts
-            page.add_init_script("""
-                // Hide webdriver
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                
-                // Fake plugins
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-                
-                // Fake languages
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en']
-                });
-                
-                // Fake hardware
-                Object.defineProperty(navigator, 'hardwareConcurrency', {
-                    get: () => 8
-                });
-                Object.defineProperty(navigator, 'deviceMemory', {
-                    get: () => 8
-                });
-                
-                // Remove automation flags
-                delete navigator.__proto__.webdriver;
-            """)
+    # One browser for every commodity; clearance cookies survive between listings
+    pool = BrowserPool(
+        p,
+        # MUST be headless=False for human-like behavior
+        launch_options=dict(
+            headless=False,
+            args=[
+                "--disable-blink-features=AutomationControlled",
+                "--disable-dev-shm-usage",
+                "--no-sandbox",
+                "--disable-web-security",
+                "--window-size=1920,1080",
+            ],
+        ),
+        context_options=dict(
+            viewport={"width": 1920, "height": 1080},
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            locale="en-US",
+            timezone_id="America/Chicago",
+        ),
+        setup_context=lambda context: install_resource_blocking(context, SITE_POLICIES["producer"], block_stats),
+        setup_page=setup_page,
+        max_navigations=MAX_NAVIGATIONS_PER_PAGE,
+    )
+    try:
+        for sector in sectors:
+            for commodity in sectors[sector]:
+                Current_url = f"{BASE_URL}/{commodity.lower()}".strip()
+                print(f"\n{'='*60}")
+                print(f"Processing {commodity}: {Current_url}")
+                print(f"{'='*60}")
             
-            try:
-                # Navigate to page
-                page.goto(Current_url, wait_until="domcontentloaded", timeout=60000)
-                
-                # Human-like delay before any interaction
-                time.sleep(random.uniform(2, 4))
-                
-                # Handle Cloudflare checkbox specifically
-                handle_cloudflare_checkbox(page, max_wait=45)
-                
-                # Additional wait for content to fully load after verification
-                time.sleep(random.uniform(3, 6))
-                
-                # Human-like scrolling
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(2)
-                page.evaluate("window.scrollTo(0, 0)")
-                time.sleep(1)
-                
-                # Wait for articles container
                 try:
-                    page.wait_for_selector("div.archive-articles-list", timeout=10000)
-                except:
-                    print(f"Could not find articles container for {commodity}")
-                    browser.close()
-                    continue
+                    # like the listing crawl, a routine run only takes the newest page's worth
+                    posts = discovery.posts(taxonomy="commodity", term=commodity.lower(), after=CUT_OFF,
+                                            limit=None if BACKFILL else LISTING_PAGE_SIZE)
+                    print(discovery.summary())
+                    if posts is not None:
+                        article_links = URLFrontier()
+                        for post in posts:
+                            article_links.add(post.url, date=post.date)
+                    else:
+                        article_links = crawl_listing_page(pool, Current_url, commodity)
+                        if article_links is None:
+                            continue
 
-                html = page.content()
+                    print(f"{commodity}: {len(article_links)} articles found")
                 
-                # Final check - if still blocked, wait for manual intervention
-                if "Just a moment" in html or "Verification successful" in html:
-                    print("Still on Cloudflare page - waiting 60s for manual verification...")
-                    print("PLEASE CLICK THE CHECKBOX IF IT APPEARS")
-                    time.sleep(60)
+                    # Scrape article content
+                    idx = 0
+                    while (url := article_links.pop()) is not None:  # newest first
+                        idx += 1
+                        print(f"Scraping {idx}/{len(article_links)}...")
                     
-                    # Check again after manual intervention
-                    html = page.content()
-                    if "Just a moment" in html:
-                        print("Still blocked, skipping...")
-                        browser.close()
-                        continue
-                
-                soup = BeautifulSoup(html, "html.parser")
-                article_links = set()
-                articles = soup.find("div", class_="archive-articles-list")
-                
-                if articles is None:
-                    browser.close()
-                    continue
-                
-                for article in articles.find_all("article"):
-                    time_elem = article.find("time", class_="updated dtstamp")
-                    if time_elem:
-                        datetime_str = time_elem.get("datetime", "")
                         try:
-                            article_date = datetime.fromisoformat(datetime_str)
-                            if article_date.date() < CUT_OFF:
+                            article_html = cache.lookup(url)
+                            cached = article_html is not None
+                            if not cached and not cache.offline:
+                                article_html = load_article_html(pool.page(), url)
+                                if article_html is not None:
+                                    cache.store(url, article_html)
+                            if article_html is None:
                                 continue
-                        except:
-                            continue
-                    
-                    h2 = article.find("h2", class_="entry-title")
-                    if h2:
-                        link_tag = h2.find("a")
-                        if link_tag:
-                            href = link_tag.get("href")
-                            if href:
-                                article_links.add(href)
-
-                article_links = list(article_links)
-                print(f"{commodity}: {len(article_links)} articles found")
-                
-                # Scrape article content
-                for idx, url in enumerate(article_links):
-                    print(f"Scraping {idx+1}/{min(5, len(article_links))}...")
-                    
-                    try:
-                        # Human-like: Random delay before opening article
-                        human_delay(2, 5)
                         
-                        # Navigate to article
-                        page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                            fields = ARTICLE_SPEC.extract(parse_html(article_html))
                         
-                        # Human-like: Wait for page to "load"
-                        human_delay(2, 4)
+                            row = {}
+                            row["scraped_at"] = datetime.now().isoformat()
+                            row["url"] = url
+                            row["sector"] = sector
+                            row["commodity"] = commodity
                         
-                        # Human mouse movement
-                        human_mouse_movement(page)
+                            row["Title"] = fields["Title"]
+                            row["author"] = fields["author"]
                         
-                        # Wait for Cloudflare on article page
-                        wait_for_cloudflare_bypass(page, max_wait=30)
+                            date_text = fields["date_text"]
+                            if date_text is not None:
+                                try:
+                                    row["date"] = str(parse_date(date_text, row["scraped_at"]))
+                                except ValueError:
+                                    row["date"] = date_text
+                            else:
+                                row["date"] = "N/A"
                         
-                        # Human-like scrolling
-                        human_scroll(page)
+                            row["body"] = fields["body"]
+                            row["summary"] = fields["summary"]
+                            row["tag"] = fields["tag"]
                         
-                        article_html = page.content()
+                            all_data.append(row)
+                            print(f"Success: {row['Title'][:40]}...")
                         
-                        if "Just a moment" in article_html:
-                            print("Blocked on article page, waiting for manual verify...")
-                            time.sleep(30)
-                            article_html = page.content()
-                            
-                            if "Just a moment" in article_html:
-                                print("Still blocked, skipping...")
-                                continue
+                            # Human-like: Delay between articles
+                            if not cached:
+                                human_delay(3, 7)
                         
-                        # Wait for article content to render
-                        try:
-                            page.wait_for_selector("h1.entry-title", timeout=10000)
-                        except:
-                            print("Article content didn't load...")
+                        except Exception as e:
+                            print(f"Error: {e}")
                             continue
-                        
-                        # Human-like: Wait before scraping (like reading)
-                        human_delay(1, 3)
-                        
-                        soup = BeautifulSoup(article_html, "html.parser")
-                        
-                        row = {}
-                        row["scraped_at"] = datetime.now().isoformat()
-                        row["url"] = url
-                        row["sector"] = sector
-                        row["commodity"] = commodity
-                        
-                        title_elem = soup.select_one("h1.entry-title")
-                        row["Title"] = title_elem.get_text(strip=True) if title_elem else "N/A"
-                        
-                        author_elem = soup.select_one("a.tw\\:align-top.tw\\:text-lg")
-                        row["author"] = author_elem.get_text(strip=True) if author_elem else "N/A"
-                        
-                        date_elem = soup.find("p", class_="entry-details-date tw:text-sm tw:mb-0")
-                        if date_elem:
-                            try:
-                                row["date"] = str(parse_date(date_elem.get_text()))
-                            except:
-                                row["date"] = date_elem.get_text(strip=True)
-                        else:
-                            row["date"] = "N/A"
-                        
-                        body_elem = soup.find("div", class_="body-text")
-                        if body_elem:
-                            body_str = body_elem.get_text(separator=" ", strip=True)
-                            pos = body_str.find("Newsletter Sign Up")
-                            row["body"] = body_str[:pos] if pos != -1 else body_str
-                        else:
-                            row["body"] = "N/A"
-                        
-                        summary_elem = soup.find("h2", class_="deck")
-                        row["summary"] = summary_elem.get_text(strip=True) if summary_elem else "N/A"
-                        
-                        tag_elem = soup.select_one("p.entry-details-categories.tw\\:text-sm")
-                        row["tag"] = tag_elem.get_text(strip=True) if tag_elem else "N/A"
-                        
-                        all_data.append(row)
-                        print(f"Success: {row['Title'][:40]}...")
-                        
-                        # Human-like: Delay between articles
-                        human_delay(3, 7)
-                        
-                    except Exception as e:
-                        print(f"Error: {e}")
-                        continue
                 
-                # Human-like: Delay between commodities
-                human_delay(5, 10)
+                    # Human-like: Delay between commodities
+                    human_delay(5, 10)
                 
-            except Exception as e:
-                print(f"Error processing {commodity}: {e}")
-            finally:
-                browser.close()
-                time.sleep(3)
+                except Exception as e:
+                    print(f"Error processing {commodity}: {e}")
+    finally:
+        pool.close()
 
 # Save all data
 if all:
     df = pd.DataFrame(all_data)
     filename = f"producer_scraped_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     df.to_csv(filename, index=False, encoding='utf-8-sig')
+    write_articles(df, source="Producer")
     print(f"\nSaved {len(all_data)} articles to {filename}")
+    print(block_stats.summary())
+    print(cache.summary())
+    print(pool.summary())
+    print(METRICS.summary())
 else:
     print("\nNo articles were successfully scraped")
\ No newline at end of file
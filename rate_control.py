@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Adaptive per-host request pacing (AIMD) to replace the scrapers' fixed sleeps.
+
+Usage:
+    rate = RateController(initial_rate=0.5, max_rate=4.0)
+    rate.wait(url)                      # or: await rate.wait_async(url)
+    status, html = ...                  # the request
+    rate.record(url, status, elapsed, headers)
+    print(rate.summary())               # achieved req/s per host
+
+While responses are healthy the host's rate grows by `increase` req/s per
+request; a 429/503, any other 5xx, a network error (status None) or a response
+slower than `slow_after` seconds multiplies it by `decrease`. Retry-After pauses
+the host outright, and a robots.txt Crawl-delay / Request-rate caps max_rate.
+Waiting is schedule-based (next free slot per host), so the same controller
+paces sync threads and asyncio tasks alike.
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+from urllib.robotparser import RobotFileParser
+
+from metrics import METRICS
+
+BACKOFF_STATUSES = {429, 503}
+
+
+def retry_after_seconds(value):
+    """Retry-After header (delta-seconds or HTTP date) -> seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def urllib_fetch(url, timeout=15, headers=None):
+    """Minimal robots_fetch for scrapers without a Fetcher -> (status, text, headers)"""
+    try:
+        with urlopen(Request(url, headers={'User-Agent': 'Mozilla/5.0', **(headers or {})}), timeout=timeout) as resp:
+            return resp.status, resp.read().decode('utf-8', 'replace'), dict(resp.headers)
+    except HTTPError as e:
+        return e.code, '', dict(e.headers or {})
+
+
+class HostRate:
+    def __init__(self, rate, min_rate, max_rate):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.next_at = 0.0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.backoffs = 0
+        self.first_at = None
+        self.last_at = None
+
+    def reserve(self, now):
+        """Claim the next slot; returns seconds to sleep before using it"""
+        slot = max(now, self.next_at, self.cooldown_until)
+        self.next_at = slot + 1.0 / self.rate
+        return slot - now
+
+    @property
+    def achieved(self):
+        """Requests/sec actually completed between the first and last response"""
+        if self.requests < 2 or self.last_at == self.first_at:
+            return 0.0
+        return (self.requests - 1) / (self.last_at - self.first_at)
+
+
+class RateController:
+    def __init__(self, initial_rate=0.5, min_rate=0.05, max_rate=4.0, increase=0.05, decrease=0.5,
+                 slow_after=10.0, user_agent='*', robots_fetch=None):
+        """
+        robots_fetch: callable(url) -> (status, text, headers) used once per host to
+                      read robots.txt; None skips robots (e.g. offline replay).
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_after = slow_after
+        self.user_agent = user_agent
+        self.robots_fetch = robots_fetch
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    # ---- per-host state ----
+
+    def _robots_cap(self, host_url):
+        """Max req/s allowed by robots.txt for our user agent, or None"""
+        try:
+            status, text, _ = self.robots_fetch(host_url + '/robots.txt')
+        except Exception:
+            return None
+        if status != 200:
+            return None
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        caps = []
+        if (delay := parser.crawl_delay(self.user_agent)):
+            caps.append(1.0 / float(delay))
+        if (request_rate := parser.request_rate(self.user_agent)):
+            caps.append(request_rate.requests / request_rate.seconds)
+        return min(caps) if caps else None
+
+    def known(self, url):
+        return urlsplit(url).netloc.lower() in self._hosts
+
+    def host(self, url):
+        split = urlsplit(url)
+        key = split.netloc.lower()
+        with self._lock:
+            state = self._hosts.get(key)
+        if state is not None:
+            return state
+        max_rate = self.max_rate
+        if self.robots_fetch is not None:
+            cap = self._robots_cap(f"{split.scheme or 'https'}://{split.netloc}")
+            if cap is not None:
+                max_rate = max(self.min_rate, min(max_rate, cap))
+        with self._lock:
+            return self._hosts.setdefault(key, HostRate(min(self.initial_rate, max_rate), self.min_rate, max_rate))
+
+    # ---- pacing ----
+
+    def _reserve(self, url):
+        state = self.host(url)
+        with self._lock:
+            return state.reserve(time.monotonic())
+
+    def wait(self, url):
+        """Block until `url`'s host may be hit again. Returns seconds waited."""
+        delay = self._reserve(url)
+        if delay > 0:
+            METRICS.observe("sleep_seconds", delay, reason="rate")
+            time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url):
+        if not self.known(url):
+            await asyncio.to_thread(self.host, url)  # first sight may fetch robots.txt
+        delay = self._reserve(url)
+        if delay > 0:
+            METRICS.observe("sleep_seconds", delay, reason="rate")
+            await asyncio.sleep(delay)
+        return delay
+
+    # ---- feedback ----
+
+    def record(self, url, status, elapsed, headers=None):
+        """
+        Feed one outcome back. status None = network error / timeout.
+        Returns the host's new rate (req/s).
+        """
+        state = self.host(url)
+        now = time.monotonic()
+        retry_after = None
+        if headers:
+            retry_after = retry_after_seconds({k.lower(): v for k, v in headers.items()}.get('retry-after'))
+        with self._lock:
+            state.requests += 1
+            state.first_at = state.first_at if state.first_at is not None else now
+            state.last_at = now
+            healthy = status is not None and status < 500 and status not in BACKOFF_STATUSES
+            if healthy and elapsed <= self.slow_after:
+                state.rate = min(state.max_rate, state.rate + self.increase)
+            else:
+                state.rate = max(state.min_rate, state.rate * self.decrease)
+                state.backoffs += 1
+                # re-space the queue at the new, slower rate
+                state.next_at = max(state.next_at, now + 1.0 / state.rate)
+            if retry_after is not None and status in BACKOFF_STATUSES:
+                state.cooldown_until = max(state.cooldown_until, now + retry_after)
+            return state.rate
+
+    # ---- export ----
+
+    def snapshot(self):
+        """{host: {rate, max_rate, achieved, requests, backoffs}} for logging/metrics"""
+        with self._lock:
+            return {
+                host: {'rate': round(s.rate, 3), 'max_rate': round(s.max_rate, 3),
+                       'achieved': round(s.achieved, 3), 'requests': s.requests, 'backoffs': s.backoffs}
+                for host, s in self._hosts.items()
+            }
+
+    def summary(self):
+        parts = [f"{host}: {s['achieved']:.2f} req/s achieved (now {s['rate']:.2f}, cap {s['max_rate']:.2f}, "
+                 f"{s['requests']} requests, {s['backoffs']} backoffs)"
+                 for host, s in self.snapshot().items()]
+        return "Rate: " + ("; ".join(parts) or "no requests")
+
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk HTTP response cache with conditional revalidation.
+
+Entries are keyed by sha256(normalized URL) and stored as
+    <cache_dir>/<key[:2]>/<key>.json     metadata (url, status, ETag, Last-Modified, fetched_at)
+    <cache_dir>/<key[:2]>/<key>.html.gz  gzip-compressed body
+
+Freshness comes from TTL_RULES (listing pages short, articles never expire).
+Stale entries with validators are revalidated with If-None-Match /
+If-Modified-Since; a 304 just refreshes fetched_at.
+
+Offline replay: SCRAPER_OFFLINE=1 (or offline=True) serves every request from
+disk regardless of age and never touches the network, so parser changes can be
+re-run over the whole corpus.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+OFFLINE_ENV = "SCRAPER_OFFLINE"
+DEFAULT_CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", "http_cache")
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# First match wins; ttl=None means the entry never goes stale
+TTL_RULES = [
+    (re.compile(r"/page/\d+/?$"), 6 * HOUR),                     # paginated listings
+    (re.compile(r"/(crops-markets|category/[^/]+|commodity/[^/]+)/?$"), 1 * HOUR),  # listing page 1
+    (re.compile(r"/feed/?$"), 15 * 60),                           # RSS
+    (re.compile(r"/wp-json/|sitemap[^/]*\.xml$"), 1 * HOUR),      # WordPress discovery endpoints
+    (re.compile(r"datadownload/(Output|Choose)\.aspx"), 6 * HOUR),  # FRB H10
+]
+DEFAULT_TTL = None  # article pages: effectively immortal
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "_ga"}
+
+
+def normalize_url(url):
+    """Lowercase scheme/host, drop fragment, default ports and tracking params, sort the query"""
+    split = urlsplit(url.strip())
+    scheme = split.scheme.lower() or "https"
+    netloc = split.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = [(k, v) for k, v in parse_qsl(split.query, keep_blank_values=True)
+             if not k.startswith("utm_") and k not in TRACKING_PARAMS]
+    return urlunsplit((scheme, netloc, split.path or "/", urlencode(sorted(query)), ""))
+
+
+def ttl_for(url, rules=TTL_RULES, default=DEFAULT_TTL):
+    path = urlsplit(url).path
+    for pattern, ttl in rules:
+        if pattern.search(path):
+            return ttl
+    return default
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, offline=None, rules=TTL_RULES, default_ttl=DEFAULT_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.offline = os.environ.get(OFFLINE_ENV) == "1" if offline is None else offline
+        self.rules = rules
+        self.default_ttl = default_ttl
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0, 'stored': 0, 'offline_miss': 0}
+
+    def _paths(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        folder = self.cache_dir / key[:2]
+        return folder / f"{key}.json", folder / f"{key}.html.gz"
+
+    def load(self, url):
+        """(meta, body) for a cached URL, or (None, None)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(body_path, "rt", encoding="utf-8") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def store(self, url, body, status=200, headers=None):
+        """Write an entry atomically (safe with several workers sharing the cache)"""
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": normalize_url(url),
+            "status": status,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_type": headers.get("content-type"),
+            "fetched_at": time.time(),
+        }
+        # unique per writer: threads of one process may store the same URL at once
+        tmp_body = body_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with gzip.open(tmp_body, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(body)
+        os.replace(tmp_body, body_path)
+        self._write_meta(meta_path, meta)
+        self.stats['stored'] += 1
+
+    def _write_meta(self, meta_path, meta):
+        tmp_meta = meta_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def is_fresh(self, url, meta, ttl=...):
+        if ttl is ...:
+            ttl = ttl_for(url, self.rules, self.default_ttl)
+        return ttl is None or time.time() - meta["fetched_at"] < ttl
+
+    def lookup(self, url, ttl=...):
+        """Cached body if usable without any network request, else None"""
+        meta, body = self.load(url)
+        if meta is None:
+            if self.offline:
+                self.stats['offline_miss'] += 1
+            return None
+        if self.offline or self.is_fresh(url, meta, ttl):
+            self.stats['hit'] += 1
+            return body
+        return None
+
+    def fetch(self, url, http_get, ttl=..., accept=None):
+        """
+        Cache-aware GET. `http_get(url, headers)` -> (status, text, response_headers).
+        Only 200 responses passing `accept(text)` (if given) are stored.
+        Returns (status, text); offline misses return (None, None).
+        """
+        meta, body = self.load(url)
+        if meta is not None and (self.offline or self.is_fresh(url, meta, ttl)):
+            self.stats['hit'] += 1
+            return meta["status"], body
+        if self.offline:
+            self.stats['offline_miss'] += 1
+            return None, None
+
+        conditional = {}
+        if meta is not None:
+            if meta.get("etag"):
+                conditional["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                conditional["If-Modified-Since"] = meta["last_modified"]
+
+        status, text, headers = http_get(url, conditional)
+        if status == 304 and meta is not None:
+            meta["fetched_at"] = time.time()
+            self._write_meta(self._paths(url)[0], meta)
+            self.stats['revalidated'] += 1
+            return meta["status"], body
+
+        self.stats['miss'] += 1
+        if status == 200 and (accept is None or accept(text)):
+            self.store(url, text, status, headers)
+        return status, text
+
+    def summary(self):
+        s = self.stats
+        mode = "OFFLINE " if self.offline else ""
+        return (f"{mode}cache: {s['hit']} hits, {s['revalidated']} revalidated (304), "
+                f"{s['miss']} fetched, {s['stored']} stored, {s['offline_miss']} offline misses")
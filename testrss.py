@@ -1,40 +1,21 @@
-import feedparser
+import argparse
+import asyncio
 import requests
 from datetime import datetime, timedelta
 import pandas as pd
 import time
 import random
-from bs4 import BeautifulSoup
-import re
 from playwright.sync_api import sync_playwright
-
-# ============ TEXT CLEANING ============
-def clean_html_text(html_content):
-    """Remove HTML tags and clean up text"""
-    if not html_content or html_content == 'N/A':
-        return 'N/A'
-    
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove unwanted elements
-    for tag in soup(['script', 'style', 'iframe', 'noscript', 'nav', 'footer', 'header']):
-        tag.decompose()
-    
-    text = soup.get_text(separator=' ', strip=True)
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove RSS artifacts
-    for artifact in ['Read more...', 'Continue reading...', 'Newsletter Sign Up', 'Subscribe']:
-        text = text.replace(artifact, '')
-    
-    # Fix HTML entities
-    entities = {'&nbsp;': ' ', '&amp;': '&', '&lt;': '<', '&gt;': '>', 
-                '&quot;': '"', '&#8217;': "'", '&#8216;': "'", '&#8220;': '"', 
-                '&#8221;': '"', '&#8211;': '-', '&#8212;': '—'}
-    for entity, char in entities.items():
-        text = text.replace(entity, char)
-    
-    return text.strip()
+from resource_blocking import SITE_POLICIES, install_resource_blocking
+from article_store import write_articles
+from date_parser import parse_datetime
+from html_parser import parse_html
+from text_cleaning import clean_html_text, clean_text
+from extraction import SITE_SPECS
+from rate_control import RateController, urllib_fetch
+from feed_poller import FeedPoller
+from url_frontier import URLFrontier
+from metrics import METRICS
 
 # ============ DATE/COMMODITY HELPERS ============
 def parse_date(date_tuple):
@@ -91,7 +72,9 @@ def wait_for_cloudflare_bypass(page, max_wait=45):
     return False
 
 def human_delay(min_s=2, max_s=5):
-    time.sleep(random.uniform(min_s, max_s))
+    delay = random.uniform(min_s, max_s)
+    METRICS.observe("sleep_seconds", delay, reason="human")
+    time.sleep(delay)
 
 # ============ SCRAPING FUNCTIONS ============
 def scrape_article_content(page, url):
@@ -108,38 +91,16 @@ def scrape_article_content(page, url):
         page.wait_for_selector("h1.entry-title", timeout=10000)
         human_delay(1, 2)
         
-        html = page.content()
-        soup = BeautifulSoup(html, "html.parser")
+        fields = ARTICLE_SPEC.extract(parse_html(page.content()))
         
         row = {}
-        row["Title"] = soup.select_one("h1.entry-title")
-        row["Title"] = row["Title"].get_text(strip=True) if row["Title"] else "N/A"
-        
-        author = soup.select_one("a.tw\\:align-top.tw\\:text-lg")
-        row["author"] = author.get_text(strip=True) if author else "N/A"
-        
-        date_elem = soup.find("p", class_="entry-details-date tw:text-sm tw:mb-0")
-        if date_elem:
-            try:
-                row["date"] = str(parse_date_from_text(date_elem.get_text()))
-            except:
-                row["date"] = date_elem.get_text(strip=True)
-        else:
-            row["date"] = "N/A"
-        
-        body_elem = soup.find("div", class_="body-text")
-        if body_elem:
-            body_str = body_elem.get_text(separator=" ", strip=True)
-            pos = body_str.find("Newsletter Sign Up")
-            row["body"] = clean_html_text(body_str[:pos] if pos != -1 else body_str)
-        else:
-            row["body"] = "N/A"
-        
-        summary = soup.find("h2", class_="deck")
-        row["summary"] = summary.get_text(strip=True) if summary else "N/A"
-        
-        tags = soup.select_one("p.entry-details-categories.tw\\:text-sm")
-        row["tag"] = tags.get_text(strip=True) if tags else "N/A"
+        row["Title"] = fields["Title"]
+        row["author"] = fields["author"]
+        row["date"] = str(parse_date_from_text(fields["date_text"])) if fields["date_text"] is not None else "N/A"
+        # Already plain text: clean it without a second parse
+        row["body"] = clean_text(fields["body"]) or "N/A"
+        row["summary"] = fields["summary"]
+        row["tag"] = fields["tag"]
         
         return row
     except Exception as e:
@@ -147,27 +108,17 @@ def scrape_article_content(page, url):
         return None
 
 def parse_date_from_text(text):
-    """Parse date from visible text like 'January 15, 2024'"""
-    months = {"January":1,"February":2,"March":3,"April":4,"May":5,"June":6,
-              "July":7,"August":8,"September":9,"October":10,"November":11,"December":12,
-              "Jan":1,"Feb":2,"Mar":3,"Apr":4,"Jun":6,"Jul":7,"Aug":8,"Sep":9,"Oct":10,"Nov":11,"Dec":12}
-    
-    parts = text.replace(',', '').split()
-    for i, part in enumerate(parts):
-        if part in months and i+2 < len(parts) and parts[i+1].isdigit():
-            try:
-                return datetime(int(parts[i+2]), months[part], int(parts[i+1]))
-            except:
-                pass
-    return datetime.now()
+    """Parse date from visible text like 'January 15, 2024' or '3 days ago'"""
+    return parse_datetime(text, default=None) or datetime.now()
 
 def get_paginated_article_urls(base_url, commodity, max_pages=10):
     """Get article URLs from paginated archive pages"""
-    urls = set()
+    urls = URLFrontier()
     
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False, args=["--disable-blink-features=AutomationControlled", "--no-sandbox"])
         context = browser.new_context(viewport={"width": 1920, "height": 1080})
+        install_resource_blocking(context, SITE_POLICIES["producer"])
         page = context.new_page()
         
         for page_num in range(1, max_pages + 1):
@@ -179,46 +130,43 @@ def get_paginated_article_urls(base_url, commodity, max_pages=10):
             print(f"  Fetching page {page_num}: {url}")
             
             try:
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                RATE.wait(url)
+                start = time.monotonic()
+                response = page.goto(url, wait_until="domcontentloaded", timeout=60000)
                 human_delay(2, 4)
                 
                 if not wait_for_cloudflare_bypass(page, max_wait=30):
+                    RATE.record(url, response.status if response else None, time.monotonic() - start)
                     print("  Cloudflare blocking pagination - stopping")
                     break
+                RATE.record(url, response.status if response else None, time.monotonic() - start)
                 
                 page.wait_for_selector("div.archive-articles-list", timeout=10000)
-                html = page.content()
-                soup = BeautifulSoup(html, "html.parser")
-                
-                articles = soup.find("div", class_="archive-articles-list")
-                if not articles:
+                doc = parse_html(page.content())
+                listing = LISTING_SPEC.extract(doc)
+                if not listing["container"]:
                     print(f"  No more articles found at page {page_num}")
                     break
                 
-                for article in articles.find_all("article"):
-                    time_elem = article.find("time", class_="updated dtstamp")
-                    if time_elem:
+                for article in listing["articles"]:
+                    article_date = None
+                    if article["datetime"] is not None:
                         try:
-                            article_date = datetime.fromisoformat(time_elem.get("datetime", "").split('+')[0])
+                            article_date = datetime.fromisoformat(article["datetime"].split('+')[0])
                             if article_date.date() < datetime(2024, 1, 1).date():
                                 continue  # Stop if we're past our cutoff
                         except:
                             pass
                     
-                    h2 = article.find("h2", class_="entry-title")
-                    if h2:
-                        link = h2.find("a")
-                        if link and link.get("href"):
-                            urls.add(link.get("href"))
+                    if article["href"]:
+                        urls.add(article["href"], date=article_date)
                 
                 # Check if there's a next page
-                next_btn = soup.find("a", class_="next") or soup.find("a", string="Next")
+                next_btn = listing["next"] or any(a.text() == "Next" for a in doc.select("a"))
                 if not next_btn:
                     print(f"  No more pages after {page_num}")
                     break
                 
-                human_delay(3, 6)
-                
             except Exception as e:
                 print(f"  Error on page {page_num}: {e}")
                 break
@@ -230,7 +178,10 @@ def get_paginated_article_urls(base_url, commodity, max_pages=10):
 # ============ MAIN EXECUTION ============
 BASE_URL = "https://www.producer.com"
 CUT_OFF = datetime(2022, 1, 1)
+LISTING_SPEC = SITE_SPECS["producer"]["listing"]
+ARTICLE_SPEC = SITE_SPECS["producer_rss"]["article"]
 RSS_CUTOFF = datetime(2025, 11, 1)  # RSS only has articles after this date
+RATE = RateController(initial_rate=0.2, max_rate=1.0, robots_fetch=urllib_fetch)  # adaptive pacing for producer.com
 
 RSS_FEEDS = {
     'Canola': 'https://www.producer.com/commodity/canola/feed/',
@@ -245,8 +196,51 @@ RSS_FEEDS = {
     'Chickpeas': 'https://www.producer.com/commodity/chickpeas/feed/',
 }
 
+FEED_STATE = "feed_state.json"  # ETag/Last-Modified + already-emitted entries per feed
+FEED_INTERVALS = {}  # per-feed polling interval overrides (seconds) for --watch
+
+def rss_row(commodity, entry, pub_date):
+    """Article row straight from a feed entry (RSS carries the full body)"""
+    return {
+        "scraped_at": datetime.now().isoformat(),
+        "Title": entry.get('title', 'N/A'),
+        "url": entry.get('link'),
+        "date": pub_date.strftime("%Y-%m-%d"),
+        "author": entry.get('author', 'N/A'),
+        "summary": clean_html_text(entry.get('summary', 'N/A')),
+        "body": clean_html_text(entry.get('content', [{}])[0].get('value', 'N/A') if entry.get('content') else entry.get('summary', 'N/A')),
+        "tag": ", ".join([tag.term for tag in entry.get('tags', [])]) if entry.get('tags') else 'N/A',
+        "sector": extract_sector(commodity),
+        "commodity": commodity,
+        "source": "RSS"
+    }
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--watch', action='store_true', help='Keep polling the feeds and store new articles as they appear')
+parser.add_argument('--interval', type=int, default=600, help='--watch: seconds between polls of each feed')
+parser.add_argument('--full', action='store_true', help='--watch: ignore saved feed state and re-read every feed entry')
+args = parser.parse_args()
+METRICS.configure_from_env(source="Producer RSS")
+
+# Batch mode writes a full snapshot of the feeds every run, so only --watch keeps feed state
+poller = FeedPoller(RSS_FEEDS, state_path=FEED_STATE if args.watch and not args.full else None)
+
+if args.watch:
+    def store_new_entries(commodity, entries):
+        rows = [rss_row(commodity, e, parse_date(e.get('published_parsed'))) for e in entries if e.get('link')]
+        write_articles(rows, source="Producer")
+        for row in rows:
+            print(f"  ✓ {commodity}: {row['date']} - {row['Title'][:50]}")
+    
+    print(f"Watching {len(RSS_FEEDS)} feeds every {args.interval}s (Ctrl+C to stop)...")
+    try:
+        asyncio.run(poller.run_forever(store_new_entries, interval=args.interval, intervals=FEED_INTERVALS))
+    except KeyboardInterrupt:
+        print(f"\n{poller.summary()}")
+    raise SystemExit(0)
+
 all_data = []
-all_urls = set()
+all_urls = URLFrontier()
 
 print("="*70)
 print("HYBRID SCRAPER: RSS (recent) + Pagination (historical)")
@@ -254,44 +248,31 @@ print("="*70)
 
 # STEP 1: Get recent articles from RSS (fast, no Cloudflare)
 print("\n[STEP 1] Fetching recent articles from RSS feeds...")
-for commodity, rss_url in RSS_FEEDS.items():
-    print(f"\n  {commodity}: {rss_url}")
+# All feeds at once, every entry (no saved state: this run's CSV is a full snapshot)
+for commodity, entries in asyncio.run(poller.poll_once()).items():
+    print(f"\n  {commodity}: {RSS_FEEDS[commodity]} ({len(entries)} entries)")
     
-    feed = feedparser.parse(rss_url)
-    for entry in feed.entries:
+    for entry in entries:
         pub_date = parse_date(entry.get('published_parsed'))
         url = entry.get('link')
         
-        if url and url not in all_urls:
-            all_urls.add(url)
+        if url and all_urls.add(url, date=pub_date):
             
             # RSS has full content for recent articles
             if pub_date >= RSS_CUTOFF:
-                row = {
-                    "scraped_at": datetime.now().isoformat(),
-                    "Title": entry.get('title', 'N/A'),
-                    "url": url,
-                    "date": pub_date.strftime("%Y-%m-%d"),
-                    "author": entry.get('author', 'N/A'),
-                    "summary": clean_html_text(entry.get('summary', 'N/A')),
-                    "body": clean_html_text(entry.get('content', [{}])[0].get('value', 'N/A') if entry.get('content') else entry.get('summary', 'N/A')),
-                    "tag": ", ".join([tag.term for tag in entry.get('tags', [])]) if entry.get('tags') else 'N/A',
-                    "sector": extract_sector(commodity),
-                    "commodity": commodity,
-                    "source": "RSS"
-                }
+                row = rss_row(commodity, entry, pub_date)
                 all_data.append(row)
                 print(f"    ✓ RSS: {pub_date.strftime('%Y-%m-%d')} - {row['Title'][:40]}...")
-            
-            time.sleep(random.uniform(0.2, 0.5))
 
+print(f"\n  {poller.summary()}")
 print(f"\n  RSS phase complete: {len(all_data)} recent articles collected")
 
 # STEP 2: Get older articles via pagination (slower, needs Cloudflare handling)
 print(f"\n[STEP 2] Fetching historical articles (before {RSS_CUTOFF.strftime('%Y-%m-%d')}) via pagination...")
 
 # Only scrape full content for URLs we haven't processed yet
-urls_to_scrape = [url for url in all_urls if url not in [d['url'] for d in all_data]]
+rss_urls = {d['url'] for d in all_data}
+urls_to_scrape = all_urls.pending(rss_urls)
 
 if urls_to_scrape:
     print(f"  Found {len(urls_to_scrape)} older articles to scrape...")
@@ -305,6 +286,7 @@ if urls_to_scrape:
             viewport={"width": 1920, "height": 1080},
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         )
+        block_stats = install_resource_blocking(context, SITE_POLICIES["producer"])
         page = context.new_page()
         
         # Apply stealth if available
@@ -320,11 +302,18 @@ if urls_to_scrape:
             Object.defineProperty(navigator, 'languages', {get: () => ['en-US','en']});
         """)
         
-        for idx, url in enumerate(urls_to_scrape[:20]):  # Limit to 20 for testing
+        idx = 0
+        while idx < 20 and (url := all_urls.pop()) is not None:  # Newest first, limit to 20 for testing
+            if url in rss_urls:
+                continue
+            idx += 1
             commodity = extract_commodity_from_url(url)
-            print(f"\n  [{idx+1}/{min(20, len(urls_to_scrape))}] Scraping: {url[:70]}...")
+            print(f"\n  [{idx}/{min(20, len(urls_to_scrape))}] Scraping: {url[:70]}...")
             
+            RATE.wait(url)
+            start = time.monotonic()
             row = scrape_article_content(page, url)
+            RATE.record(url, 200 if row else None, time.monotonic() - start)
             if row and row.get("Title") != "N/A":
                 row["scraped_at"] = datetime.now().isoformat()
                 row["url"] = url
@@ -333,9 +322,10 @@ if urls_to_scrape:
                 row["source"] = "Pagination"
                 all_data.append(row)
                 print(f"    ✓ Success: {row['Title'][:40]}...")
-            
-            human_delay(5, 10)  # Important: delay between articles
         
+        print(f"  {block_stats.summary()}")
+        print(f"  {RATE.summary()}")
+        print(f"  {METRICS.summary()}")
         browser.close()
 else:
     print("  No older articles need scraping (RSS covered everything)")
@@ -347,6 +337,8 @@ if all:
     
     filename = f"producer_hybrid_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     df.to_csv(filename, index=False, encoding='utf-8-sig')
+    # "source" here is the ingestion channel (RSS/Pagination), not the site
+    write_articles(df.rename(columns={'source': 'channel'}), source="Producer")
     
     print(f"\n{'='*70}")
     print(f"COMPLETE! Saved {len(df)} articles to {filename}")
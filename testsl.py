@@ -1,64 +1,175 @@
+import argparse
+import glob
+import os
 import pandas as pd
+import numpy as np
 import io
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import re
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from response_cache import ResponseCache, HOUR
 
 # ===== CONFIGURATION =====
 start_date = "01/01/1971"          # Start date (MM/DD/YYYY)
 end_date = datetime.today().strftime("%m/%d/%Y")  # End date (today)
 CHUNK_YEARS = 5                    # Safe chunk size (5 years ≈ 1,825 days)
+CACHE_DIR = "http_cache"           # SCRAPER_OFFLINE=1 rebuilds from cached chunks only
+OUTPUT_CSV = "frb_h10_daily_extracted.csv"
+EXISTING_GLOB = "frb_h10_*extracted*.csv"  # incremental mode reads the newest of these
+DOWNLOAD_WORKERS = 4
+REQUEST_TIMEOUT = (10, 120)        # connect, read (seconds)
+ACTIVE_WINDOW_DAYS = 30            # series silent longer than this are treated as discontinued
 
-date_chunks = []
-current_start = datetime.strptime(start_date, "%m/%d/%Y")
-end_dt = datetime.strptime(end_date, "%m/%d/%Y")
-
-while current_start <= end_dt:
-    chunk_end = min(datetime(current_start.year + CHUNK_YEARS, 12, 31), end_dt)
-    date_chunks.append((
-        current_start.strftime("%m/%d/%Y"),
-        chunk_end.strftime("%m/%d/%Y")
-    ))
-    current_start = chunk_end + timedelta(days=1)
-
-dfs = []
-for chunk_start, chunk_end in date_chunks:
-    url = f"https://www.federalreserve.gov/datadownload/Output.aspx?rel=H10&series=60f32914ab61dfab590e0e470153e3ae&lastobs=&from={chunk_start}&to={chunk_end}&filetype=csv&label=include&layout=seriesrow"
+OUTPUT_URL = "https://www.federalreserve.gov/datadownload/Output.aspx?rel=H10&series=60f32914ab61dfab590e0e470153e3ae&lastobs=&from={start}&to={end}&filetype=csv&label=include&layout=seriesrow"
+RELEASE_URL = "https://www.federalreserve.gov/datadownload/Choose.aspx?rel=H10"
+
+cache = ResponseCache(CACHE_DIR)
+
+def make_session(pool_size=DOWNLOAD_WORKERS):
+    """One keep-alive session for every chunk, with retry/backoff on 429/5xx"""
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"], respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+session = make_session()
+
+def http_get(url, headers):
+    resp = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    return resp.status_code, resp.text, dict(resp.headers)
+
+ID_VARS = ['Descriptions:', 'Unit:', 'Multiplier:', 'Currency:', 'Unique Identifier:', 'Series Name:']
+SERIES_KEY = 'Series Name:'
+DATE_COL = re.compile(r'\d{4}-\d{2}-\d{2}')
+VALUE_DTYPE = np.float32
+
+def chunk_to_long(df_chunk):
+    """One wide seriesrow chunk -> (series keys, ISO dates, values) in pd.melt order"""
+    date_cols = [col for col in df_chunk.columns if DATE_COL.match(col)]
+    # FRB marks gaps with "ND"; coerce the whole block in one pass
+    values = pd.to_numeric(pd.Series(df_chunk[date_cols].to_numpy().ravel()), errors='coerce')
+    values = values.to_numpy(dtype=np.float64).reshape(len(df_chunk), len(date_cols))
+    n_series = len(df_chunk)
+    return (
+        np.tile(df_chunk[SERIES_KEY].to_numpy(), len(date_cols)),
+        np.repeat(pd.to_datetime(date_cols).strftime('%Y-%m-%d').to_numpy(), n_series),
+        values.T.ravel(),  # date-major, like melt over date columns
+    )
+
+def build_long_frame(dfs):
+    """
+    Long-format concat of all chunks with USD series inverted by one masked
+    np.reciprocal; metadata is fixed up once per series, not once per row.
+    """
+    parts = [chunk_to_long(df_chunk) for df_chunk in dfs]
+    keys = np.concatenate([p[0] for p in parts])
+    dates = np.concatenate([p[1] for p in parts])
+    values = np.concatenate([p[2] for p in parts])
+
+    meta = pd.concat([df_chunk[ID_VARS] for df_chunk in dfs]).drop_duplicates(SERIES_KEY).reset_index(drop=True)
+    mask_usd = (meta['Currency:'] == 'USD').to_numpy()
+    meta.loc[mask_usd, 'Unit:'], meta.loc[mask_usd, 'Currency:'] = meta.loc[mask_usd, 'Currency:'], meta.loc[mask_usd, 'Unit:']
+    meta['Currency:'] = meta['Currency:'].str.replace('Currency:_Per_', '', regex=False)
+    meta['Unit:'] = meta['Unit:'].str.replace('Currency:_Per_', '', regex=False)
+
+    codes = pd.Index(meta[SERIES_KEY]).get_indexer(keys)
+    row_usd = mask_usd[codes]
+    np.reciprocal(values, out=values, where=row_usd)
+
+    out = pd.DataFrame({
+        col: pd.Categorical(meta[col].to_numpy()[codes]) for col in ID_VARS
+    })
+    out['Date'] = pd.Categorical(dates)
+    out['Value'] = values.astype(VALUE_DTYPE)
+    out['Multiplier'] = np.int8(1)
+    return out
+
+def make_date_chunks(start_dt, end_dt, years=CHUNK_YEARS):
+    date_chunks = []
+    current_start = start_dt
+    while current_start <= end_dt:
+        chunk_end = min(datetime(current_start.year + years, 12, 31), end_dt)
+        date_chunks.append((
+            current_start.strftime("%m/%d/%Y"),
+            chunk_end.strftime("%m/%d/%Y")
+        ))
+        current_start = chunk_end + timedelta(days=1)
+    return date_chunks
+
+def download_chunk(chunk_start, chunk_end):
+    url = OUTPUT_URL.format(start=chunk_start, end=chunk_end)
     print(f"Downloading {chunk_start} to {chunk_end}...")
-    df_chunk = pd.read_csv(io.StringIO(requests.get(url).text), header=0)
-    dfs.append(df_chunk)
+    # Closed chunks never change; only the one reaching today needs refreshing
+    ttl = None if chunk_end != end_date else 6 * HOUR
+    status, text = cache.fetch(url, http_get, ttl=ttl)
+    if text is None:
+        raise RuntimeError(f"No data for {chunk_start}-{chunk_end} (status {status})")
+    return pd.read_csv(io.StringIO(text), header=0)
 
-df = dfs[0].copy()
-for df_chunk in dfs[1:]:
-    date_cols = [col for col in df_chunk.columns if re.match(r'\d{4}-\d{2}-\d{2}', col)]
-    cols_to_keep = [df_chunk.columns[0]] + date_cols
-    df_chunk_trimmed = df_chunk[cols_to_keep]
-    
-    df = pd.merge(df, df_chunk_trimmed, on=df.columns[0], how='outer')
+def download_chunks(date_chunks, workers=DOWNLOAD_WORKERS):
+    """Fetch all chunks concurrently over the shared session; results keep chunk order"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda chunk: download_chunk(*chunk), date_chunks))
 
-date_columns = [col for col in df.columns if re.match(r'\d{4}-\d{2}-\d{2}', col)] 
-mask_usd = df['Currency:'] == 'USD'
+def publication_date():
+    _, html = cache.fetch(RELEASE_URL, http_get)
+    html = html or ""
+    pub_date_match = re.search(r'last released\s+(?:[A-Za-z]+,\s+)?([A-Za-z]+\s+\d{1,2},\s+\d{4})', html)
+    pub_date_str = pub_date_match.group(1) if pub_date_match else datetime.today().strftime("%B %d, %Y")
+    return datetime.strptime(pub_date_str, "%B %d, %Y").strftime("%Y-%m-%d")
 
-for date_column in date_columns:
-    df.loc[mask_usd, date_column] = 1 / df.loc[mask_usd, date_column]
+def load_existing():
+    """Newest previous extract, or None"""
+    files = sorted(glob.glob(EXISTING_GLOB), key=os.path.getmtime)
+    if not files:
+        return None
+    print(f"Incremental: reading {files[-1]}")
+    existing = pd.read_csv(files[-1])
+    return existing.drop(columns=['Publication date'], errors='ignore')
 
-df.loc[mask_usd, 'Unit:'], df.loc[mask_usd, 'Currency:'] = df.loc[mask_usd, 'Currency:'], df.loc[mask_usd, 'Unit:']
+def tail_start(existing):
+    """
+    Day after the oldest last-observation among active series: everything from
+    there on is re-requested, everything before is kept from the existing file.
+    """
+    observed = existing.dropna(subset=['Value'])
+    last_obs = pd.to_datetime(observed.groupby(SERIES_KEY)['Date'].max())
+    active = last_obs[last_obs >= last_obs.max() - timedelta(days=ACTIVE_WINDOW_DAYS)]
+    return active.min() + timedelta(days=1)
 
-id_vars = ['Descriptions:', 'Unit:', 'Multiplier:', 'Currency:', 'Unique Identifier:', 'Series Name:']
-df_melted = pd.melt(df, id_vars=id_vars, var_name='Date', value_name='Value')
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true', help=f'Only fetch observations newer than the latest {EXISTING_GLOB}')
+    parser.add_argument('--workers', type=int, default=DOWNLOAD_WORKERS, help='Concurrent chunk downloads')
+    parser.add_argument('--output', default=OUTPUT_CSV)
+    args = parser.parse_args()
 
-df_melted['Date'] = pd.to_datetime(df_melted['Date']).dt.strftime('%Y-%m-%d')  
+    start_dt = datetime.strptime(start_date, "%m/%d/%Y")
+    end_dt = datetime.strptime(end_date, "%m/%d/%Y")
+    existing = load_existing() if args.incremental else None
+    if existing is not None:
+        start_dt = tail_start(existing)
+        print(f"Incremental: requesting {start_dt:%Y-%m-%d} onwards")
+        if start_dt > end_dt:
+            print("Already up to date")
+            return
 
-df_melted['Currency:'] = df_melted['Currency:'].str.replace('Currency:_Per_', '', regex=False)
-df_melted['Unit:'] = df_melted['Unit:'].str.replace('Currency:_Per_', '', regex=False)
-df_melted['Multiplier']=1
+    dfs = download_chunks(make_date_chunks(start_dt, end_dt), args.workers)
+    df_melted = build_long_frame(dfs)
 
-html_url = "https://www.federalreserve.gov/datadownload/Choose.aspx?rel=H10"
-html = requests.get(html_url).text
-pub_date_match = re.search(r'last released\s+(?:[A-Za-z]+,\s+)?([A-Za-z]+\s+\d{1,2},\s+\d{4})', html)
-pub_date_str = pub_date_match.group(1) if pub_date_match else datetime.today().strftime("%B %d, %Y")
-publication_date = datetime.strptime(pub_date_str, "%B %d, %Y").strftime("%Y-%m-%d")
-df_melted['Publication date'] = publication_date
+    if existing is not None:
+        kept = existing[pd.to_datetime(existing['Date']) < start_dt]
+        df_melted = pd.concat([kept, df_melted.astype({c: object for c in ID_VARS + ['Date']})], ignore_index=True)
 
-df_melted.to_csv('frb_h10_daily_extracted.csv', index=False)
+    df_melted['Publication date'] = publication_date()
+    df_melted.to_csv(args.output, index=False)
+    print(f"Saved {len(df_melted):,} rows to {args.output}")
 
+if __name__ == '__main__':
+    main()
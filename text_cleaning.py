@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Body-text cleaning for feed and page content.
+
+Usage:
+    clean_html_text(entry['summary'])   # HTML fragment -> plain text
+    clean_text(fields['body'])          # already-extracted text -> tidied text
+
+Kept out of testrss.py so the benchmarks can time it without running a crawl.
+"""
+import re
+
+from html_parser import parse_html
+
+
+def clean_html_text(html_content):
+    """Remove HTML tags and clean up text"""
+    if not html_content or html_content == 'N/A':
+        return 'N/A'
+    
+    # Private tree: we strip elements from it
+    doc = parse_html(html_content, memo=False)
+    
+    # Remove unwanted elements
+    doc.remove('script, style, iframe, noscript, nav, footer, header')
+    
+    return clean_text(doc.text(separator=' ', strip=True))
+
+
+def clean_text(text):
+    """Whitespace, RSS artifacts and leftover entities in already-extracted text"""
+    text = re.sub(r'\s+', ' ', text)
+    
+    # Remove RSS artifacts
+    for artifact in ['Read more...', 'Continue reading...', 'Newsletter Sign Up', 'Subscribe']:
+        text = text.replace(artifact, '')
+    
+    # Fix HTML entities
+    entities = {'&nbsp;': ' ', '&amp;': '&', '&lt;': '<', '&gt;': '>', 
+                '&quot;': '"', '&#8217;': "'", '&#8216;': "'", '&#8220;': '"', 
+                '&#8221;': '"', '&#8211;': '-', '&#8212;': '—'}
+    for entity, char in entities.items():
+        text = text.replace(entity, char)
+    
+    return text.strip()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+URL frontier shared by the scrapers: ordered set + priority queue in one.
+
+    frontier = URLFrontier()
+    frontier.add(url, date=article_date)   # False if already known (any spelling)
+    url in frontier                        # O(1), canonicalised
+    for url in frontier: ...               # insertion (discovery) order
+    while (url := frontier.pop()) is not None:
+        ...                                # newest date first (undated last), then discovery order
+    frontier.pending(done)                 # known URLs not in `done`, in order
+
+Membership is on canonical_url(): normalize_url() (lowercase scheme/host,
+tracking params dropped, query sorted) plus http->https and no trailing slash,
+so "http://x.com/a/?utm_source=rss" and "https://x.com/a" are one entry. The
+original spelling is kept for fetching.
+"""
+import heapq
+import itertools
+
+from response_cache import normalize_url
+
+
+def canonical_url(url):
+    canonical = normalize_url(url)
+    if canonical.startswith("http://"):
+        canonical = "https://" + canonical[len("http://"):]
+    head, sep, query = canonical.partition("?")
+    if head.endswith("/") and head.count("/") > 3:
+        head = head.rstrip("/")
+    return head + sep + query
+
+
+class URLFrontier:
+    def __init__(self, urls=()):
+        self._urls = {}    # canonical -> original, insertion ordered
+        self._heap = []    # (-date ordinal, seq, canonical) for pop()
+        self._popped = set()
+        self._seq = itertools.count()
+        for url in urls:
+            self.add(url)
+
+    def add(self, url, date=None):
+        """Add `url` (priority = `date`, newest first). Returns False if already known."""
+        if not url:
+            return False
+        key = canonical_url(url)
+        if key in self._urls:
+            return False
+        self._urls[key] = url
+        priority = -date.toordinal() if date is not None else 0
+        heapq.heappush(self._heap, (priority, next(self._seq), key))
+        return True
+
+    def update(self, urls):
+        """Add many; returns how many were new"""
+        return sum(self.add(url) for url in urls)
+
+    def pop(self):
+        """Highest-priority URL not popped yet, None when exhausted"""
+        while self._heap:
+            _, _, key = heapq.heappop(self._heap)
+            if key not in self._popped:
+                self._popped.add(key)
+                return self._urls[key]
+        return None
+
+    def pending(self, done=()):
+        """Known URLs not in `done` (any iterable of URLs), in discovery order"""
+        done_keys = {canonical_url(url) for url in done}
+        return [url for key, url in self._urls.items() if key not in done_keys]
+
+    def __contains__(self, url):
+        return canonical_url(url) in self._urls
+
+    def __iter__(self):
+        return iter(list(self._urls.values()))
+
+    def __len__(self):
+        return len(self._urls)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Leased work queue shared by crawl worker processes (SQLite, WAL mode).
+
+Usage:
+    queue = WorkQueue("brownfield_output/work_queue.sqlite")
+    queue.enqueue('listing', listing_url(1))
+    stop = queue.keep_alive(worker)          # background heartbeat
+    while (item := queue.lease(worker)) is not None:
+        ...                                  # crawl item.url
+        queue.complete(item.id)              # or queue.fail(item.id)
+    stop()
+
+Items are ('listing' | 'article', url) rows keyed by normalize_url(). lease()
+atomically hands the next pending item to one worker for `lease_seconds`;
+heartbeats keep extending a live worker's leases, so an item only goes back to
+the pool when its worker dies (lease expires) or gives up on it. Failed items
+are retried until `max_attempts`. Articles are leased before listing pages, so
+every worker keeps draining discovered articles instead of racing ahead through
+the listings, and the whole crawl resumes from the file after a restart.
+
+Statuses: 'pending', 'leased', 'done', 'failed' (gave up after max_attempts).
+
+Seeding a crawl: claim_seeding() lets exactly one worker seed a drained queue
+(others keep polling meanwhile, as drained() stays False while a live seed
+claim exists); seed() then queues its items and reopens finished listing
+pages, so a rerun walks the listings again instead of finding them all 'done'.
+"""
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from response_cache import normalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id          INTEGER PRIMARY KEY,
+    key         TEXT NOT NULL UNIQUE,
+    url         TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL,
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_next ON work_items(status, priority, id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker     TEXT PRIMARY KEY,
+    heartbeat  REAL NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seeding (
+    id          INTEGER PRIMARY KEY CHECK (id = 1),
+    worker      TEXT NOT NULL,
+    lease_until REAL NOT NULL
+);
+"""
+
+# Higher priority is leased first: finish discovered articles before opening more listing pages
+PRIORITY = {'article': 1, 'listing': 0}
+
+WorkItem = namedtuple('WorkItem', 'id kind url attempts')
+
+
+class WorkQueue:
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+        self.stats = {'leased': 0, 'completed': 0, 'failed': 0, 'enqueued': 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---- producing ----
+
+    def enqueue(self, kind, url, priority=None):
+        """Add one item; False if the URL is already queued (in any status)"""
+        return self.enqueue_many(kind, [url], priority) == 1
+
+    def _insert(self, kind, urls, priority, reopen):
+        """INSERT inside the caller's transaction; returns how many rows were added (or reopened)"""
+        priority = PRIORITY.get(kind, 0) if priority is None else priority
+        sql = ("INSERT INTO work_items (key, url, kind, priority, status, updated_at) "
+               "VALUES (?, ?, ?, ?, 'pending', ?) ")
+        if reopen:
+            # finished listing pages are walked again; finished articles stay done
+            sql += ("ON CONFLICT(key) DO UPDATE SET status = 'pending', worker = NULL, lease_until = NULL, "
+                    "attempts = 0, updated_at = excluded.updated_at "
+                    "WHERE work_items.kind = 'listing' AND work_items.status IN ('done', 'failed')")
+        else:
+            sql += "ON CONFLICT(key) DO NOTHING"
+        now = time.time()
+        added = 0
+        for url in urls:
+            added += self.conn.execute(sql, (normalize_url(url), url, kind, priority, now)).rowcount
+        return added
+
+    def enqueue_many(self, kind, urls, priority=None, reopen=False):
+        """Add many items of one kind in a transaction; returns how many were new (or reopened)"""
+        self.conn.execute("BEGIN")
+        try:
+            added = self._insert(kind, urls, priority, reopen)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self.stats['enqueued'] += added
+        return added
+
+    # ---- seeding ----
+
+    def claim_seeding(self, worker):
+        """
+        True if `worker` may seed: the queue is drained and no other live worker
+        is seeding. Held for lease_seconds (extended by heartbeats) until seed().
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            busy = self.conn.execute(
+                "SELECT 1 FROM work_items WHERE status = 'pending' OR (status = 'leased' AND lease_until >= ?) "
+                "UNION ALL SELECT 1 FROM seeding WHERE lease_until >= ? AND worker != ? LIMIT 1",
+                (now, now, str(worker)),
+            ).fetchone() is not None
+            if not busy:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO seeding (id, worker, lease_until) VALUES (1, ?, ?)",
+                    (str(worker), now + self.lease_seconds),
+                )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return not busy
+
+    def seed(self, worker, kind, urls, priority=None):
+        """Queue a claimed seed (reopening finished listings) and drop the claim, atomically"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = self._insert(kind, urls, priority, reopen=True)
+            self.conn.execute("DELETE FROM seeding WHERE worker = ?", (str(worker),))
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self.stats['enqueued'] += added
+        return added
+
+    # ---- consuming ----
+
+    def lease(self, worker):
+        """
+        Next pending (or expired) item, leased to `worker` for lease_seconds;
+        None when nothing is available right now (see drained()).
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")  # one leaser at a time across processes
+        try:
+            # expired leases that already used every attempt are given up on
+            self.conn.execute(
+                "UPDATE work_items SET status = 'failed', updated_at = ? "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT id, kind, url, attempts FROM work_items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE work_items SET status = 'leased', worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (str(worker), now + self.lease_seconds, now, row[0]),
+                )
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        if row is None:
+            return None
+        self.stats['leased'] += 1
+        return WorkItem(row[0], row[1], row[2], row[3] + 1)
+
+    def complete(self, item_id):
+        self.conn.execute(
+            "UPDATE work_items SET status = 'done', lease_until = NULL, updated_at = ? WHERE id = ?",
+            (time.time(), item_id),
+        )
+        self.stats['completed'] += 1
+
+    def complete_urls(self, urls):
+        """Mark items done by URL in one transaction (e.g. once their rows are fsynced)"""
+        now = time.time()
+        self.conn.execute("BEGIN")
+        try:
+            for url in urls:
+                cur = self.conn.execute(
+                    "UPDATE work_items SET status = 'done', lease_until = NULL, updated_at = ? WHERE key = ?",
+                    (now, normalize_url(url)),
+                )
+                self.stats['completed'] += cur.rowcount
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def fail(self, item_id, retry=True):
+        """Give an item back for another worker, or mark it failed once attempts run out"""
+        self.conn.execute(
+            "UPDATE work_items SET status = CASE WHEN ? AND attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "worker = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+            (int(retry), self.max_attempts, time.time(), item_id),
+        )
+        self.stats['failed'] += 1
+
+    def release(self, worker):
+        """Return a restarted worker's leftover leases (and seed claim) to the pool without waiting for expiry"""
+        self.conn.execute("DELETE FROM seeding WHERE worker = ?", (str(worker),))
+        cur = self.conn.execute(
+            "UPDATE work_items SET status = 'pending', worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND worker = ?",
+            (time.time(), str(worker)),
+        )
+        return cur.rowcount
+
+    # ---- liveness ----
+
+    def heartbeat(self, worker, conn=None):
+        """Extend every lease `worker` holds and record that it is alive"""
+        conn = conn or self.conn
+        now = time.time()
+        conn.execute(
+            "INSERT INTO workers (worker, heartbeat, started_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(worker) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (str(worker), now, now),
+        )
+        conn.execute(
+            "UPDATE work_items SET lease_until = ? WHERE status = 'leased' AND worker = ?",
+            (now + self.lease_seconds, str(worker)),
+        )
+        conn.execute("UPDATE seeding SET lease_until = ? WHERE worker = ?", (now + self.lease_seconds, str(worker)))
+
+    def keep_alive(self, worker, interval=None):
+        """
+        Heartbeat from a daemon thread (own connection) every `interval` s,
+        default a third of the lease. Returns stop().
+        """
+        interval = interval or self.lease_seconds / 3
+        stopped = threading.Event()
+
+        def beat():
+            conn = self._connect()
+            try:
+                while True:
+                    try:
+                        self.heartbeat(worker, conn)
+                    except sqlite3.OperationalError as e:
+                        print(f"  ⚠️ Heartbeat failed: {e}")
+                    if stopped.wait(interval):
+                        break
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{worker}", daemon=True)
+        thread.start()
+
+        def stop():
+            stopped.set()
+            thread.join()
+        return stop
+
+    # ---- inspection ----
+
+    def counts(self, kind=None):
+        """{status: n}, optionally for one kind"""
+        sql = "SELECT status, COUNT(*) FROM work_items"
+        params = ()
+        if kind is not None:
+            sql += " WHERE kind = ?"
+            params = (kind,)
+        return dict(self.conn.execute(sql + " GROUP BY status", params).fetchall())
+
+    def drained(self):
+        """True when nothing is pending or leased and nobody is seeding (the crawl is finished)"""
+        return self.conn.execute(
+            "SELECT 1 FROM work_items WHERE status IN ('pending', 'leased') "
+            "UNION ALL SELECT 1 FROM seeding WHERE lease_until >= ? LIMIT 1",
+            (time.time(),),
+        ).fetchone() is None
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM work_items LIMIT 1").fetchone() is None
+
+    def workers(self, within=None):
+        """{worker: seconds since last heartbeat} (only those seen within `within` s if given)"""
+        now = time.time()
+        ages = {w: now - hb for w, hb in self.conn.execute("SELECT worker, heartbeat FROM workers")}
+        return {w: age for w, age in ages.items() if within is None or age <= within}
+
+    def summary(self):
+        s = self.stats
+        parts = []
+        for kind in PRIORITY:
+            c = self.counts(kind)
+            if c:
+                parts.append(f"{kind} {c.get('done', 0)} done/{c.get('pending', 0)} pending/"
+                             f"{c.get('leased', 0)} leased/{c.get('failed', 0)} failed")
+        return (f"Queue: {'; '.join(parts) or 'empty'} | this worker: {s['leased']} leased, "
+                f"{s['completed']} completed, {s['failed']} failed, {s['enqueued']} enqueued")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Bulk article discovery for the WordPress sites: REST API first, sitemaps second.
+
+Usage:
+    discovery = WPDiscovery("https://www.brownfieldagnews.com", fetcher.get, cache=fetcher.cache)
+    posts = discovery.posts(term="crops-markets", after=CUT_OFF)
+    if posts is None:
+        ...  # neither endpoint usable: crawl the rendered listing pages as before
+    for post in posts:  # newest first
+        frontier.add(post.url, date=post.date)
+    print(discovery.summary())
+
+posts() pages through /wp-json/wp/v2/posts 100 at a time with `_fields`
+trimmed to link/date/modified/categories/title and `after` / `before` /
+`modified_after` applied server-side, so a few dozen JSON requests replace
+hundreds of rendered listing pages. `term` is a slug of `taxonomy` (a REST
+base: 'categories', or a custom one such as Producer's 'commodity'), resolved
+to its id once.
+
+When the REST API is disabled, challenged or does not expose the taxonomy, the
+post sitemaps are read instead (core wp-sitemap.xml, Yoast/Rank Math
+sitemap_index.xml, plain sitemap.xml). Sitemaps carry only <loc> and <lastmod>:
+`date` is the lastmod, `after` is applied to it client-side, and there are no
+categories, so a term-filtered query only uses them when `url_filter` can tell
+the term's URLs apart. None means neither source worked.
+
+`get(url, headers)` -> (status, text, headers), e.g. Fetcher.get; defaults to
+urllib. With a ResponseCache, responses follow its TTL rules (wp-json and
+sitemaps: 1 hour) and replay offline.
+"""
+import html
+import json
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from date_parser import parse_date
+from metrics import METRICS
+from rate_control import urllib_fetch
+
+PER_PAGE = 100  # WordPress' maximum per_page
+POST_FIELDS = "link,date,modified,categories,title"
+SITEMAP_PATHS = ["/wp-sitemap.xml", "/sitemap_index.xml", "/sitemap.xml"]
+# Sub-sitemaps holding posts: core wp-sitemap-posts-post-1.xml, Yoast post-sitemap2.xml, Rank Math post-sitemap1.xml
+POST_SITEMAP = re.compile(r"(?:^|[/_-])post-sitemap\d*\.xml$|wp-sitemap-posts-post-\d+\.xml$")
+
+Post = namedtuple('Post', 'url date modified categories title')
+
+
+def _iso(value):
+    """date / datetime -> naive ISO 8601 timestamp as WordPress expects it"""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return value.replace(tzinfo=None).isoformat(timespec='seconds')
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _is_json(text):
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_sitemap(text):
+    head = text[:2000]
+    return "<urlset" in head or "<sitemapindex" in head
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(text):
+    """('index' | 'urlset', [(loc, lastmod or None), ...]); namespace-agnostic"""
+    root = ET.fromstring(text.strip().encode("utf-8"))
+    entries = []
+    for node in root:
+        fields = {_local(child.tag): (child.text or "").strip() for child in node}
+        if fields.get("loc"):
+            entries.append((fields["loc"], fields.get("lastmod") or None))
+    return ("index" if _local(root.tag) == "sitemapindex" else "urlset"), entries
+
+
+class WPDiscovery:
+    def __init__(self, root, get=None, cache=None, rate=None, timeout=30):
+        self.root = root.rstrip("/")
+        self.get = get or (lambda url, headers=None: urllib_fetch(url, timeout, headers))
+        self.cache = cache
+        self.rate = rate  # only for a `get` that does not pace itself
+        self.stats = {'requests': 0, 'posts': 0, 'via': None, 'seconds': 0.0, 'unavailable': []}
+        self._category_names = {}
+
+    # ---- transport ----
+
+    def _http_get(self, url, headers=None):
+        if self.rate is not None:
+            self.rate.wait(url)
+        self.stats['requests'] += 1
+        return self.get(url, headers)
+
+    def _fetch(self, url, accept):
+        """(status, text) through the cache when there is one; (None, None) on network errors"""
+        try:
+            if self.cache is not None:
+                return self.cache.fetch(url, self._http_get, accept=accept)
+            status, text, _ = self._http_get(url)
+            return status, text
+        except Exception as e:
+            print(f"  ⚠️ Discovery request failed for {url}: {type(e).__name__}")
+            return None, None
+
+    def _json(self, path, params):
+        """Decoded JSON of a REST call, or None (error status, challenge page, not JSON)"""
+        status, text = self._fetch(f"{self.root}{path}?{urlencode(params)}", _is_json)
+        if status != 200 or not text:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    # ---- REST API ----
+
+    def term_id(self, taxonomy, slug):
+        found = self._json(f"/wp-json/wp/v2/{taxonomy}", {'slug': slug, '_fields': 'id'})
+        if isinstance(found, list) and found and isinstance(found[0], dict):
+            return found[0].get('id')
+        return None
+
+    def category_names(self, ids):
+        """{id: name} for category ids, fetched 100 at a time and remembered"""
+        missing = sorted(set(ids) - set(self._category_names))
+        for i in range(0, len(missing), PER_PAGE):
+            chunk = missing[i:i + PER_PAGE]
+            found = self._json("/wp-json/wp/v2/categories", {
+                'include': ",".join(map(str, chunk)), 'per_page': PER_PAGE, '_fields': 'id,name'})
+            for term in found or []:
+                self._category_names[term['id']] = html.unescape(term['name'])
+            for term_id in chunk:
+                self._category_names.setdefault(term_id, str(term_id))
+        return {term_id: self._category_names[term_id] for term_id in ids}
+
+    def rest_posts(self, taxonomy="categories", term=None, after=None, modified_after=None, limit=None, before=None):
+        """Posts from /wp-json/wp/v2/posts, newest first; None if the API (or the term) is unavailable"""
+        params = {'per_page': PER_PAGE, 'orderby': 'date', 'order': 'desc', '_fields': POST_FIELDS}
+        if term is not None:
+            term_id = self.term_id(taxonomy, term)
+            if term_id is None:
+                self.stats['unavailable'].append(f"REST: no {taxonomy} '{term}'")
+                return None
+            params[taxonomy] = term_id
+        if after is not None:
+            params['after'] = _iso(after)
+        if before is not None:
+            # a plain date is inclusive: everything before the next midnight
+            params['before'] = _iso(before if isinstance(before, datetime) else before + timedelta(days=1))
+        if modified_after is not None:
+            params['modified_after'] = _iso(modified_after)
+
+        raw = []
+        page = 1
+        while limit is None or len(raw) < limit:
+            batch = self._json("/wp-json/wp/v2/posts", {**params, 'page': page})
+            if not isinstance(batch, list):
+                if page == 1:
+                    self.stats['unavailable'].append("REST: posts endpoint unusable")
+                    return None
+                # past the last page WordPress answers 400 rest_post_invalid_page_number
+                break
+            raw.extend(batch)
+            if len(batch) < PER_PAGE:
+                break
+            page += 1
+        raw = raw[:limit]
+
+        names = self.category_names({c for item in raw for c in item.get('categories') or []})
+        posts = []
+        for item in raw:
+            if not item.get('link'):
+                continue
+            title = item.get('title')
+            posts.append(Post(
+                url=item['link'],
+                date=parse_date(item.get('date'), default=None),
+                modified=parse_date(item.get('modified'), default=None),
+                categories=tuple(names[c] for c in item.get('categories') or []),
+                title=html.unescape(title.get('rendered', '')) if isinstance(title, dict) else None,
+            ))
+        return posts
+
+    # ---- sitemaps ----
+
+    def sitemap_posts(self, after=None, url_filter=None, limit=None):
+        """Posts from the post sitemaps (newest lastmod first); None if no sitemap is found"""
+        after = _as_date(after)
+        for path in SITEMAP_PATHS:
+            status, text = self._fetch(self.root + path, _is_sitemap)
+            if status != 200 or not text or not _is_sitemap(text):
+                continue
+            try:
+                kind, entries = parse_sitemap(text)
+            except ET.ParseError:
+                continue
+            if kind == "urlset":
+                urls = entries
+            else:
+                urls = []
+                for loc, lastmod in entries:
+                    if not POST_SITEMAP.search(loc):
+                        continue
+                    # a child sitemap last modified before `after` holds nothing newer
+                    changed = parse_date(lastmod, default=None)
+                    if after is not None and changed is not None and changed < after:
+                        continue
+                    status, text = self._fetch(loc, _is_sitemap)
+                    if status != 200 or not text or not _is_sitemap(text):
+                        print(f"  ⚠️ Skipping sitemap {loc} (status {status})")
+                        continue
+                    try:
+                        urls.extend(parse_sitemap(text)[1])
+                    except ET.ParseError:
+                        print(f"  ⚠️ Skipping unparsable sitemap {loc}")
+            posts = []
+            for loc, lastmod in urls:
+                changed = parse_date(lastmod, default=None)
+                if after is not None and changed is not None and changed < after:
+                    continue
+                if url_filter is not None and not url_filter(loc):
+                    continue
+                posts.append(Post(url=loc, date=changed, modified=changed, categories=(), title=None))
+            posts.sort(key=lambda post: post.date or date.min, reverse=True)
+            return posts[:limit]
+        self.stats['unavailable'].append("sitemaps: none found")
+        return None
+
+    # ---- both ----
+
+    def posts(self, taxonomy="categories", term=None, after=None, modified_after=None,
+              url_filter=None, limit=None, before=None):
+        """
+        REST API posts, else sitemap posts, else None (caller falls back to the
+        listing crawl). The sitemap fallback ignores `modified_after` (lastmod
+        already is one) and `before` (an edited old post has a recent lastmod),
+        and is skipped for a `term` without `url_filter`.
+        """
+        start = time.perf_counter()
+        self.stats['via'], self.stats['unavailable'] = None, []  # summary() describes the latest call
+        with METRICS.span("discover", root=self.root, term=term):
+            posts = self.rest_posts(taxonomy, term, after, modified_after, limit, before)
+            via = 'rest'
+            if posts is None and (term is None or url_filter is not None):
+                posts = self.sitemap_posts(after or modified_after, url_filter, limit)
+                via = 'sitemap'
+            elif posts is not None and url_filter is not None:
+                posts = [post for post in posts if url_filter(post.url)]
+        self.stats['seconds'] += time.perf_counter() - start
+        if posts is None:
+            METRICS.inc("discovery_unavailable_total")
+            return None
+        self.stats['via'] = via
+        self.stats['posts'] += len(posts)
+        METRICS.inc("discovered_posts_total", len(posts), via=via)
+        return posts
+
+    def summary(self):
+        s = self.stats
+        if s['via'] is None:
+            reasons = "; ".join(s['unavailable']) or "not run"
+            return f"Discovery: unavailable ({reasons}) after {s['requests']} requests, falling back to listing pages"
+        via = "REST API" if s['via'] == 'rest' else "sitemaps"
+        return f"Discovery: {s['posts']} posts via {via} in {s['requests']} requests ({s['seconds']:.1f}s)"